@@ -0,0 +1,239 @@
+"""
+Time and memory-profile the public analysis API on synthetic logs of growing size.
+
+    python benchmarks/run_benchmarks.py --sizes 10k,100k,1M,10M --output results.json
+    python benchmarks/run_benchmarks.py --sizes 10k,100k --compare results.json
+
+Every public method of EventLogProcessor, ProcessDiscovery, PerformanceAnalyzer,
+ProcessStatistics and ChartGenerator runs on a fresh log (no memoized state, no
+result cache), first timed, then once more under tracemalloc for its peak
+allocation. Inputs are prepared outside the measurement. A method that exceeds
+``--time-budget`` seconds at one size is skipped at larger sizes.
+"""
+import argparse
+import inspect
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pm4py  # noqa: E402
+
+from process_mining.discovery import ProcessDiscovery  # noqa: E402
+from process_mining.performance import PerformanceAnalyzer  # noqa: E402
+from process_mining.statistics import ProcessStatistics  # noqa: E402
+from utils.columnar_log import ColumnarEventLog  # noqa: E402
+from utils.data_processing import EventLogProcessor  # noqa: E402
+from utils.synthetic import generate_event_log_by_events  # noqa: E402
+from visualization.charts import ChartGenerator  # noqa: E402
+
+CLASSES = [EventLogProcessor, ProcessDiscovery, PerformanceAnalyzer, ProcessStatistics, ChartGenerator]
+SIZE_SUFFIXES = {'k': 10**3, 'M': 10**6}
+
+
+def parse_size(text):
+    text = text.strip()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def fresh_log(log):
+    """
+    Copy of a columnar log that shares its arrays but none of its memoized state.
+    """
+    return ColumnarEventLog(
+        log.case_codes, log.activity_codes, log.resource_codes, log.timestamps,
+        log.cases, log.activities, log.resources,
+        attributes=log.attributes, timezone=log.timezone, case_attributes=log.case_attributes
+    )
+
+
+class Workload:
+    """
+    One synthetic log and the prepared inputs for every benchmarked method.
+    """
+
+    def __init__(self, n_events, seed, tmp_dir):
+        self.df = generate_event_log_by_events(n_events, seed=seed)
+        self.csv_path = os.path.join(tmp_dir, f'log_{n_events}.csv')
+        self.df.to_csv(self.csv_path, index=False)
+        self._xes_path = os.path.join(tmp_dir, f'log_{n_events}.xes')
+        self.log = EventLogProcessor().convert_csv_to_columnar_log(self.df.copy())
+        self.cycle_times = PerformanceAnalyzer().calculate_cycle_time(self.log)
+        self.activity_counts = ProcessDiscovery().get_activity_counts(self.log)
+
+    @property
+    def xes_path(self):
+        # Exported only when the XES reader is benchmarked
+        if not os.path.exists(self._xes_path):
+            pm4py.write_xes(self.df.astype({'case:concept:name': str}), self._xes_path)
+        return self._xes_path
+
+    def arguments(self, method_name):
+        """
+        Build the positional arguments of a benchmarked method (called outside timing).
+        """
+        builders = {
+            'convert_csv_to_event_log': lambda: (self.df.copy(),),
+            'convert_csv_to_columnar_log': lambda: (self.df.copy(),),
+            'stream_csv_to_columnar_log': lambda: (self.csv_path,),
+            'stream_xes_to_columnar_log': lambda: (self.xes_path,),
+            'parse_columns': lambda: (self.df.copy(),),
+            'create_cycle_time_chart': lambda: (self.cycle_times,),
+            'create_activity_frequency_chart': lambda: (self.activity_counts,),
+        }
+        if method_name in builders:
+            return builders[method_name]()
+        return (fresh_log(self.log),)
+
+
+def public_methods(cls):
+    return [name for name, member in inspect.getmembers(cls, inspect.isfunction)
+            if not name.startswith('_')]
+
+
+def measure(method, args, repeat):
+    """
+    Best wall time over ``repeat`` runs, then the tracemalloc peak of one more run.
+    """
+    timings = []
+    for _ in range(repeat):
+        call_args = args()
+        start = time.perf_counter()
+        method(*call_args)
+        timings.append(time.perf_counter() - start)
+
+    call_args = args()
+    tracemalloc.start()
+    try:
+        method(*call_args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return timings, peak
+
+
+def run(sizes, repeat, time_budget, seed, only=None):
+    results = []
+    over_budget = set()
+    with tempfile.TemporaryDirectory(prefix='pm_bench_') as tmp_dir:
+        for n_events in sizes:
+            print(f"Generating {n_events:,} events...", flush=True)
+            workload = Workload(n_events, seed, tmp_dir)
+            for cls in CLASSES:
+                for name in public_methods(cls):
+                    label = f"{cls.__name__}.{name}"
+                    if only and not any(pattern in label for pattern in only):
+                        continue
+                    entry = {'events': n_events, 'cases': workload.log.n_cases,
+                             'class': cls.__name__, 'method': name}
+                    if label in over_budget:
+                        entry.update(status='skipped', reason=f'exceeded {time_budget}s at a smaller size')
+                        results.append(entry)
+                        continue
+                    try:
+                        method = getattr(cls(), name)
+                        timings, peak = measure(method, lambda: workload.arguments(name), repeat)
+                        entry.update(status='ok', seconds=min(timings), timings=timings,
+                                     peak_memory_mb=peak / 1024 ** 2)
+                        if min(timings) > time_budget:
+                            over_budget.add(label)
+                    except Exception as e:
+                        entry.update(status='error', error=str(e))
+                    results.append(entry)
+                    print(format_entry(entry), flush=True)
+            del workload
+    return results
+
+
+def format_entry(entry):
+    label = f"{entry['class']}.{entry['method']}"
+    if entry['status'] != 'ok':
+        return f"  {entry['events']:>12,}  {label:<55} {entry['status']}: {entry.get('error', entry.get('reason'))}"
+    return (f"  {entry['events']:>12,}  {label:<55} {entry['seconds']:>10.4f}s "
+            f"{entry['peak_memory_mb']:>10.1f} MB")
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit or None,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'versions': {'numpy': np.__version__, 'pandas': pd.__version__, 'pm4py': pm4py.__version__},
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Print the time ratio against a baseline JSON file; return the regressions.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['events'], r['class'], r['method']): r
+                    for r in json.load(f)['results'] if r['status'] == 'ok'}
+    regressions = []
+    print(f"\nComparison with {baseline_path} (ratio = new / baseline):")
+    for entry in results:
+        key = (entry['events'], entry['class'], entry['method'])
+        if entry['status'] != 'ok' or key not in baseline:
+            continue
+        ratio = entry['seconds'] / max(baseline[key]['seconds'], 1e-9)
+        flag = '  REGRESSION' if ratio > threshold else ''
+        print(f"  {entry['events']:>12,}  {entry['class']}.{entry['method']:<40} {ratio:>7.2f}x{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10k,100k,1M,10M',
+                        help='comma-separated event counts, k/M suffixes allowed')
+    parser.add_argument('--repeat', type=int, default=1, help='timed runs per method (best is kept)')
+    parser.add_argument('--time-budget', type=float, default=300,
+                        help='skip a method at larger sizes once it takes longer than this (seconds)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', help='comma-separated substrings of Class.method names to run')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='time ratio above which a method counts as a regression')
+    args = parser.parse_args()
+
+    # Streamlit warns on every chart rendered outside `streamlit run`
+    logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').disabled = True
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    only = args.only.split(',') if args.only else None
+
+    results = run(sizes, args.repeat, args.time_budget, args.seed, only)
+    report = {'metadata': metadata(args), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+import numpy as np
+
+from process_mining.discovery import ProcessDiscovery
+from process_mining.performance import PerformanceAnalyzer
+from process_mining.statistics import ProcessStatistics
+from process_mining.variants import VariantIndex
+from utils.cache import cached_analysis
+from utils.columnar_log import as_columnar_log
+from utils.profiling import profiled
+
+# Conservative characters-per-token estimate; digits and symbols tokenize worse than prose
+CHARS_PER_TOKEN = 3
+DEFAULT_CONTEXT_TOKENS = 4000
+# Rows considered per section before the budget is applied
+MAX_SECTION_ROWS = 200
+# Room kept for a "... N more omitted" line in every section that gets cut
+OMISSION_RESERVE = 32
+
+
+def _number(value):
+    """
+    Short text for a number: three significant digits, thousands separators for large values.
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return '-'
+    if isinstance(value, (int, np.integer)):
+        return f'{int(value):,}'
+    if isinstance(value, (float, np.floating)):
+        return f'{value:,.0f}' if abs(value) >= 1000 else f'{value:.3g}'
+    return str(value)
+
+
+class Section:
+    """
+    One titled table of a summary; rows are ordered most important first.
+
+    ``total`` is the number of rows the full table would have, when only
+    the first ``rows`` of it were formatted.
+    """
+
+    def __init__(self, title, header, rows, total=None):
+        self.title = title
+        self.header = header
+        self.rows = rows
+        self.total = len(rows) if total is None else total
+        self.kept = 0
+
+    @property
+    def preamble(self):
+        return f'## {self.title}\n{self.header}\n' if self.header else f'## {self.title}\n'
+
+    def render(self):
+        lines = [self.preamble.rstrip('\n')] + self.rows[:self.kept]
+        omitted = self.total - self.kept
+        if omitted:
+            lines.append(f'... {omitted:,} more omitted')
+        return '\n'.join(lines)
+
+
+def fit_sections(sections, max_chars):
+    """
+    Render sections within ``max_chars``, adding rows round-robin so every section gets its top rows.
+
+    A section appears only if its title, header and first row fit. Sections
+    that are cut end with a line counting the omitted rows, which is
+    budgeted for, so the result never exceeds ``max_chars``.
+    """
+    used = 0
+    progress = True
+    while progress:
+        progress = False
+        for section in sections:
+            if section.kept >= len(section.rows):
+                continue
+            cost = len(section.rows[section.kept]) + 1
+            if not section.kept:
+                cost += len(section.preamble) + 2
+            section.kept += 1
+            # Every started section that is still cut may need its omission line
+            reserve = OMISSION_RESERVE * sum(1 for s in sections if 0 < s.kept < s.total)
+            if used + cost + reserve > max_chars:
+                section.kept -= 1
+                continue
+            used += cost
+            progress = True
+    text = '\n\n'.join(section.render() for section in sections if section.kept)
+    return text[:max_chars]
+
+
+class LogSummarizer:
+    """
+    Compress an event log into a bounded-size text context for language model prompts.
+
+    The summary covers process KPIs, the most frequent variants, the
+    transitions with the most total waiting time, directly-follows edges with
+    their durations and per-activity and per-resource tables, and is cached
+    per log fingerprint and budget.
+    """
+
+    def __init__(self, cache=None, executor=None):
+        self.cache = cache
+        self.discovery = ProcessDiscovery(cache=cache)
+        self.performance = PerformanceAnalyzer(cache=cache, executor=executor)
+        self.statistics = ProcessStatistics(cache=cache, executor=executor)
+
+    @profiled('LogSummarizer.summarize')
+    @cached_analysis('LogSummarizer.summarize')
+    def summarize(self, event_log, max_tokens=DEFAULT_CONTEXT_TOKENS, max_chars=None):
+        """
+        Summarize the log in at most ``max_chars`` characters (``max_tokens`` * CHARS_PER_TOKEN by default).
+        """
+        log = as_columnar_log(event_log)
+        if max_chars is None:
+            max_chars = max_tokens * CHARS_PER_TOKEN
+        sections = [
+            self._overview_section(log),
+            self._variant_section(log),
+            self._bottleneck_section(log),
+            self._edge_section(log),
+            self._activity_section(log),
+            self._resource_section(log),
+        ]
+        return fit_sections([s for s in sections if s.rows], max_chars)
+
+    def _overview_section(self, log):
+        kpis = self.statistics.get_process_kpis(log)
+        rows = []
+        if log.n_events:
+            first, last = log.to_datetime(np.array([log.timestamps.min(), log.timestamps.max()]))
+            rows.append(f'period: {first} to {last}')
+        for group, values in kpis.items():
+            rows.append(f'{group}: ' + ', '.join(f'{name}={_number(value)}' for name, value in values.items()))
+        return Section('Process overview (durations in hours)', None, rows)
+
+    def _variant_section(self, log):
+        variants = self.discovery.get_top_variants(log, MAX_SECTION_ROWS)
+        rows = [
+            f'{count:,} | {share:.1%} | {activities}'
+            for count, share, activities in zip(variants['count'], variants['share'], variants['activities'])
+        ]
+        return Section('Top variants', 'cases | share | activity sequence', rows,
+                       total=VariantIndex.for_log(log).n_variants)
+
+    def _bottleneck_section(self, log):
+        stats = self.performance.calculate_waiting_time_statistics(log)
+        n_transitions = len(stats)
+        total = stats['count'] * stats['mean']
+        stats = stats.iloc[np.argsort(-total.to_numpy(), kind='stable')[:MAX_SECTION_ROWS]]
+        rows = [
+            f'{row.source} -> {row.target} | {row.count:,} | {_number(row.mean)} | '
+            f'{_number(row.median)} | {_number(row.p90)}'
+            for row in stats.itertuples(index=False)
+        ]
+        return Section('Bottleneck transitions by total waiting time (hours)',
+                       'transition | count | mean | median | p90', rows, total=n_transitions)
+
+    def _edge_section(self, log):
+        performance, _, _ = self.discovery.discover_performance_dfg(log)
+        edges = sorted(performance.items(), key=lambda item: -item[1]['count'])[:MAX_SECTION_ROWS]
+        rows = [
+            f"{source} -> {target} | {values['count']:,} | {_number(values['mean'] / 3600)} | "
+            f"{_number(values['median'] / 3600)}"
+            for (source, target), values in edges
+        ]
+        return Section('Directly-follows edges by frequency (durations in hours)',
+                       'edge | count | mean | median', rows, total=len(performance))
+
+    def _activity_section(self, log):
+        activities = self.statistics.compute_all(log)['activities']
+        n_activities = len(activities)
+        activities = activities.sort_values('total_occurrences', ascending=False, kind='stable')
+        has_cost = 'avg_cost' in activities.columns
+        rows = [
+            f"{name} | {_number(row['total_occurrences'])} | {_number(row['unique_cases'])} | "
+            f"{_number(row['avg_duration'])}" + (f" | {_number(row['avg_cost'])}" if has_cost else '')
+            for name, row in activities.head(MAX_SECTION_ROWS).iterrows()
+        ]
+        header = 'activity | events | cases | avg hours in case' + (' | avg cost' if has_cost else '')
+        return Section('Activities', header, rows, total=n_activities)
+
+    def _resource_section(self, log):
+        resources = self.statistics.compute_all(log)['resources']
+        n_resources = len(resources)
+        resources = resources.sort_values('total_activities', ascending=False, kind='stable')
+        rows = [
+            f"{name} | {_number(row['total_activities'])} | {_number(row['unique_cases'])} | "
+            f"{_number(row['unique_activities'])}"
+            for name, row in resources.head(MAX_SECTION_ROWS).iterrows()
+        ]
+        return Section('Resources', 'resource | events | cases | activities', rows, total=n_resources)
+
+
+def estimate_tokens(text):
+    """
+    Rough token count of ``text`` using the same estimate as the summary budget.
+    """
+    return -(-len(text) // CHARS_PER_TOKEN)
+
@@ -1,30 +1,247 @@
-import google.generativeai as genai
+import asyncio
+import hashlib
 import os
+import random
+import threading
+
+import google.generativeai as genai
 from dotenv import load_dotenv
 
 load_dotenv()
 
-class GeminiInterface:
-    def __init__(self):
-        # Configure the Gemini API
-        api_key = os.getenv("GEMINI_API_KEY")
+DEFAULT_MODEL = 'gemini-1.5-flash-001'
+
+
+class TransientBackendError(ConnectionError):
+    """
+    A failure worth retrying, such as a rate limit or an overloaded server.
+    """
+
+
+class GeminiBackend:
+    """
+    Streams completions from the Gemini API.
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL, api_key=None):
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("Gemini API key not found. Please set the GEMINI_API_KEY environment variable.")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash-001')
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+        from google.api_core import exceptions
+        self.retryable_errors = (
+            exceptions.ResourceExhausted, exceptions.ServiceUnavailable,
+            exceptions.DeadlineExceeded, exceptions.InternalServerError,
+            exceptions.TooManyRequests
+        )
+
+    async def stream(self, prompt):
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class StubBackend:
+    """
+    Offline stand-in for load tests: streams a canned answer after a simulated latency.
+
+    ``failure_rate`` of the requests fail with a TransientBackendError before
+    the first chunk, to exercise retries.
+    """
+
+    retryable_errors = ()
+
+    def __init__(self, latency=0.2, chunk_delay=0.01, failure_rate=0.0, seed=None, model_name='stub'):
+        self.model_name = model_name
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    async def stream(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self._random.random() < self.failure_rate:
+            raise TransientBackendError("Simulated transient failure")
+        answer = (f"Stub answer for a prompt of {len(prompt):,} characters "
+                  f"(sha256 {hashlib.sha256(prompt.encode()).hexdigest()[:12]}).")
+        for word in answer.split(' '):
+            await asyncio.sleep(self.chunk_delay)
+            yield word + ' '
+
+
+def create_backend(name=None, model_name=DEFAULT_MODEL):
+    """
+    Backend by name: 'gemini' (default) or 'stub'.
+    """
+    name = (name or 'gemini').lower()
+    if name == 'stub':
+        return StubBackend()
+    if name == 'gemini':
+        return GeminiBackend(model_name)
+    raise ValueError(f"Unknown AI backend: {name}")
+
+
+class GeminiInterface:
+    """
+    Concurrent, retrying and cached client for a text generation backend.
+
+    Requests run on a private event loop thread, at most ``max_concurrency``
+    at a time. Failed attempts that are transient or produce no chunk for
+    ``timeout`` seconds are retried up to ``max_retries`` times with
+    exponential backoff and jitter, as long as nothing has been streamed yet.
+    Complete answers are cached under (model, prompt hash); concurrent
+    requests for the same prompt share one backend call.
+    """
+
+    def __init__(self, backend=None, cache=None, max_concurrency=4, timeout=60.0,
+                 max_retries=3, backoff=1.0):
+        self.backend = backend if backend is not None else create_backend(os.getenv('AI_BACKEND'))
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.retryable_errors = (asyncio.TimeoutError, ConnectionError) + tuple(self.backend.retryable_errors)
+        self._loop = None
+        self._semaphore = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def model_name(self):
+        return self.backend.model_name
+
+    def cache_key(self, prompt):
+        return hashlib.sha256(f"{self.model_name}\0{prompt}".encode()).hexdigest()
+
+    def _event_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='gemini-client', daemon=True).start()
+            return self._loop
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._event_loop()).result()
+
+    async def _attempts(self, prompt):
+        """
+        Stream chunks from the backend, retrying failures that happen before the first chunk.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                started = False
+                stream = self.backend.stream(prompt)
+                try:
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                        except StopAsyncIteration:
+                            return
+                        started = True
+                        yield chunk
+                except self.retryable_errors as e:
+                    if started or attempt == self.max_retries:
+                        if isinstance(e, asyncio.TimeoutError):
+                            raise asyncio.TimeoutError(
+                                f"No response from {self.model_name} within {self.timeout:g}s"
+                            ) from e
+                        raise
+                finally:
+                    await stream.aclose()
+                await asyncio.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    async def astream(self, prompt):
+        """
+        Yield the answer to ``prompt`` in chunks as they arrive; cached answers come as one chunk.
+        """
+        key = self.cache_key(prompt)
+        cached = self.cache.get_key(key) if self.cache is not None else None
+        if cached is not None:
+            yield cached
+            return
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            try:
+                yield await asyncio.shield(pending)
+                return
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The first requester stopped reading; ask the backend ourselves
+
+        result = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = result
+        chunks = []
+        try:
+            async for chunk in self._attempts(prompt):
+                chunks.append(chunk)
+                yield chunk
+            text = ''.join(chunks)
+            if self.cache is not None:
+                self.cache.put_key(key, text)
+            result.set_result(text)
+        except Exception as e:
+            result.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting for it
+            result.exception()
+            raise
+        finally:
+            if not result.done():
+                result.cancel()
+            if self._in_flight.get(key) is result:
+                del self._in_flight[key]
+
+    async def agenerate(self, prompt):
+        """
+        The complete answer to ``prompt``.
+        """
+        return ''.join([chunk async for chunk in self.astream(prompt)])
 
     def generate_response(self, prompt):
         """
         Generate a response from the Gemini API based on the given prompt.
         """
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self._run(self.agenerate(prompt))
         except Exception as e:
             return f"Error generating response: {e}"
 
+    def stream_response(self, prompt):
+        """
+        Yield the answer in chunks from synchronous code, e.g. for ``st.write_stream``.
+        """
+        stream = self.astream(prompt)
+        try:
+            while True:
+                try:
+                    yield self._run(stream.__anext__())
+                except StopAsyncIteration:
+                    return
+        except Exception as e:
+            yield f"Error generating response: {e}"
+        finally:
+            self._run(stream.aclose())
+
+    def generate_many(self, prompts):
+        """
+        Answer several prompts concurrently; failed prompts give their exception instead of text.
+        """
+        async def gather():
+            return await asyncio.gather(*(self.agenerate(p) for p in prompts), return_exceptions=True)
+        return self._run(gather())
+
+
 # Example usage:
 if __name__ == '__main__':
     gemini = GeminiInterface()
-    response = gemini.generate_response("What is process mining?")
-    print(response)
+    for chunk in gemini.stream_response("What is process mining?"):
+        print(chunk, end='', flush=True)
+    print()
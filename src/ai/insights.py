@@ -1,27 +1,44 @@
+from ai.context import DEFAULT_CONTEXT_TOKENS, LogSummarizer
+
+
 class InsightGenerator:
-    def __init__(self, gemini_interface):
+    def __init__(self, gemini_interface, summarizer=None, context_tokens=DEFAULT_CONTEXT_TOKENS):
         self.gemini_interface = gemini_interface
+        self.summarizer = summarizer or LogSummarizer()
+        self.context_tokens = context_tokens
 
-    def generate_process_insights(self, event_log, process_model):
+    def log_context(self, event_log):
+        """
+        Prompt text for an event log: a budgeted summary, or the text itself when already a string.
+        """
+        if isinstance(event_log, str):
+            return event_log
+        return self.summarizer.summarize(event_log, max_tokens=self.context_tokens)
+
+    def _respond(self, prompt, stream):
+        if stream:
+            return self.gemini_interface.stream_response(prompt)
+        return self.gemini_interface.generate_response(prompt)
+
+    def generate_process_insights(self, event_log, process_model, stream=False):
         """
         Generate insights about the process based on the event log and process model.
+
+        With ``stream`` a generator of answer chunks is returned instead of the text.
         """
-        prompt = f"Analyze the following process model and event log to identify bottlenecks, inefficiencies, and areas for improvement. {process_model} {event_log}"
-        insights = self.gemini_interface.generate_response(prompt)
-        return insights
+        prompt = f"Analyze the following process model and event log to identify bottlenecks, inefficiencies, and areas for improvement. {process_model} {self.log_context(event_log)}"
+        return self._respond(prompt, stream)
 
-    def generate_kpi_recommendations(self, event_log):
+    def generate_kpi_recommendations(self, event_log, stream=False):
         """
         Generate KPI recommendations based on the event log.
         """
-        prompt = f"Based on the following event log, recommend relevant KPIs for process monitoring and improvement. {event_log}"
-        kpis = self.gemini_interface.generate_response(prompt)
-        return kpis
+        prompt = f"Based on the following event log, recommend relevant KPIs for process monitoring and improvement. {self.log_context(event_log)}"
+        return self._respond(prompt, stream)
 
-    def generate_conversational_analysis(self, query, event_log):
+    def generate_conversational_analysis(self, query, event_log, stream=False):
         """
         Generate a conversational analysis based on the given query and event log.
         """
-        prompt = f"Answer the following question about the event log: {query} {event_log}"
-        answer = self.gemini_interface.generate_response(prompt)
-        return answer
+        prompt = f"Answer the following question about the event log: {query} {self.log_context(event_log)}"
+        return self._respond(prompt, stream)
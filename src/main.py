@@ -1,20 +1,209 @@
 import streamlit as st
 import os
+import uuid
 from dotenv import load_dotenv
 from pathlib import Path
 import pandas as pd
-import pm4py
 
 # Import our custom modules
 from process_mining.discovery import ProcessDiscovery
 from process_mining.performance import PerformanceAnalyzer
 from process_mining.statistics import ProcessStatistics
-from ai.gemini import GeminiInterface
+from process_mining.parallel import PartitionedExecutor
+from process_mining.jobs import JobScheduler
+from process_mining.graph import run_analyses
+from process_mining.filters import AttributeIn, CaseIndex, MonthIn, VariantIn, all_of, filter_log
+from ai.gemini import GeminiInterface, create_backend
 from ai.insights import InsightGenerator
+from ai.context import LogSummarizer, estimate_tokens
 from visualization.process_maps import ProcessMapVisualizer
 from visualization.charts import ChartGenerator
 from utils.data_processing import EventLogProcessor
 from utils.config import load_config
+from utils.log_store import LogStore
+from utils.compaction import memory_report
+from utils.ingestion import preview_xes
+from utils.cache import AnalysisCache
+from utils.profiling import profiler
+
+@st.cache_resource
+def get_analysis_cache():
+    """Analysis result cache shared across reruns and sessions"""
+    performance_config = load_config(require_api_key=False)['PERFORMANCE']
+    return AnalysisCache(
+        max_bytes=performance_config['RESULT_CACHE_MB'] * 1024 * 1024,
+        disk_dir=performance_config['RESULT_CACHE_DIR']
+    )
+
+@st.cache_resource
+def get_executor():
+    """Process pool for per-case analyses, shared across reruns and sessions"""
+    performance_config = load_config(require_api_key=False)['PERFORMANCE']
+    return PartitionedExecutor(
+        workers=performance_config['WORKERS'],
+        min_events=performance_config['PARALLEL_MIN_EVENTS']
+    )
+
+@st.cache_resource
+def get_job_scheduler():
+    """Background processes for long analyses, shared across reruns and sessions"""
+    performance_config = load_config(require_api_key=False)['PERFORMANCE']
+    return JobScheduler(
+        cache=get_analysis_cache(),
+        workers=performance_config['JOB_WORKERS'],
+        timeout=performance_config['JOB_TIMEOUT']
+    )
+
+def run_in_background(method, event_log, label, **kwargs):
+    """
+    Run an analyzer method as a background job and return its result, or None until it is done.
+
+    Small logs are analyzed inline. A job keeps running when the user leaves
+    the page, and coming back picks up the same job or its cached result.
+    """
+    performance_config = load_config(require_api_key=False)['PERFORMANCE']
+    if event_log.n_events < performance_config['JOB_MIN_EVENTS']:
+        return method(event_log, **kwargs)
+    
+    scheduler = get_job_scheduler()
+    name = f"{type(method.__self__).__name__}.{method.__name__}"
+    job = scheduler.submit(event_log, name, **kwargs)
+    if job.status == 'done':
+        return job.result
+    if job.done:
+        st.warning(f"{label} {job.status}" + (f": {job.error}" if job.error else ""))
+        if st.button(f"Run {label.lower()} again", key=f"retry_{job.id}"):
+            scheduler.submit(event_log, name, retry=True, **kwargs)
+            st.rerun()
+        return None
+    render_job_progress(scheduler, job, label)
+    return None
+
+@st.fragment(run_every=1)
+def render_job_progress(scheduler, job, label):
+    """Poll a running job; the whole page reruns once it finishes"""
+    if job.done:
+        st.rerun()
+    st.progress(job.progress, text=f"{label}: {job.message or job.status} ({job.elapsed:.0f}s)")
+    if st.button("Cancel", key=f"cancel_{job.id}"):
+        scheduler.cancel(job.id)
+        st.rerun()
+
+@st.cache_resource
+def get_render_cache():
+    """Cache of laid-out process map SVGs, shared across reruns and sessions"""
+    performance_config = load_config(require_api_key=False)['PERFORMANCE']
+    return AnalysisCache(max_bytes=performance_config['RENDER_CACHE_MB'] * 1024 * 1024)
+
+def render_pruning_controls():
+    """Render process map pruning controls and return them as keyword arguments"""
+    with st.expander("Simplify map"):
+        method = st.radio(
+            "Pruning method",
+            ["coverage", "percentile"],
+            format_func=lambda m: {"coverage": "Share of total frequency",
+                                   "percentile": "Share of most frequent items"}[m],
+            horizontal=True
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            activity_keep = st.slider("Activities kept (%)", 1, 100, 100)
+        with col2:
+            edge_keep = st.slider("Edges kept (%)", 1, 100, 100)
+    return {'activity_keep': activity_keep / 100, 'edge_keep': edge_keep / 100,
+            'pruning_method': method}
+
+@st.cache_resource
+def get_gemini_interface():
+    """One AI client per server, so its concurrency limit and response cache span all sessions"""
+    ai_config = load_config(require_api_key=False)['AI']
+    return GeminiInterface(
+        backend=create_backend(ai_config['BACKEND']),
+        cache=AnalysisCache(max_bytes=ai_config['RESPONSE_CACHE_MB'] * 1024 * 1024,
+                            disk_dir=ai_config['RESPONSE_CACHE_DIR']),
+        max_concurrency=ai_config['MAX_CONCURRENCY'],
+        timeout=ai_config['TIMEOUT'],
+        max_retries=ai_config['MAX_RETRIES']
+    )
+
+def get_chart_generator():
+    """Chart generator with the configured level-of-detail limits"""
+    chart_config = load_config(require_api_key=False)['VISUALIZATION']['CHARTS']
+    return ChartGenerator(
+        max_timeline_cases=chart_config['TIMELINE_MAX_CASES'],
+        timeline_bins=chart_config['TIMELINE_BINS'],
+        full_point_limit=chart_config['FULL_POINT_LIMIT'],
+        distribution_bins=chart_config['DISTRIBUTION_BINS'],
+        max_outlier_points=chart_config['MAX_OUTLIER_POINTS']
+    )
+
+def render_cache_stats(cache):
+    """Render result cache counters in the sidebar"""
+    stats = cache.stats()
+    with st.expander("Result Cache"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Hits", stats['hits'] + stats['disk_hits'])
+            st.metric("Entries", stats['entries'])
+        with col2:
+            st.metric("Misses", stats['misses'])
+            st.metric("Evictions", stats['evictions'])
+        st.caption(f"{stats['bytes'] / 1024 ** 2:.1f} of {stats['max_bytes'] / 1024 ** 2:.0f} MB used, "
+                   f"{stats['disk_hits']} disk hits")
+
+def render_profiling_panel(since):
+    """Render this run's stage timings in the sidebar, with JSON and trace-event exports"""
+    with st.expander("Profiling"):
+        st.checkbox("Enable profiling", key="profiling_enabled")
+        if not profiler.enabled:
+            st.caption("Times ingestion, analysis and rendering stages of this session once enabled.")
+            return
+        summary = profiler.summary(since)
+        if summary.empty:
+            st.caption("No stages recorded in this run.")
+            return
+        st.dataframe(summary, hide_index=True)
+        st.download_button("Download JSON", profiler.to_json(),
+                           file_name="profile.json", mime="application/json")
+        st.download_button("Download trace events", profiler.to_trace_events(),
+                           file_name="profile_trace.json", mime="application/json")
+
+def render_filter_panel(event_log):
+    """Render case filters in the sidebar and return the log the analysis pages should use"""
+    if event_log is None:
+        return None
+    index = CaseIndex.for_log(event_log)
+    # Selections belong to one log; a new log starts unfiltered
+    prefix = f"filter.{event_log.fingerprint[:12]}"
+    with st.expander("Filter cases"):
+        filters = []
+        for name in index.filterable_attributes():
+            postings = index.attribute(name)
+            label = {'concept:name': "Activities", 'org:resource': "Resources"}.get(name, name)
+            selected = st.multiselect(label, postings.values, key=f"{prefix}.{name}")
+            if selected:
+                filters.append(AttributeIn(name, selected))
+        months = st.multiselect("Case start month", index.months().values, key=f"{prefix}.months")
+        if months:
+            filters.append(MonthIn(months))
+        variants = index.variants()
+        variant_ids = st.multiselect(
+            "Variants", range(min(len(variants.values), 50)), key=f"{prefix}.variants",
+            format_func=lambda v: f"#{v + 1} ({variants.case_counts[v]:,} cases)"
+        )
+        if variant_ids:
+            filters.append(VariantIn(variant_ids))
+
+        expression = all_of(filters)
+        if expression is None:
+            return event_log
+        filtered = filter_log(event_log, expression)
+        if filtered.n_cases == 0:
+            st.warning("No cases match these filters; the full log is analyzed.")
+            return event_log
+        st.caption(f"{filtered.n_cases:,} of {event_log.n_cases:,} cases, "
+                   f"{filtered.n_events:,} events")
+        return filtered
 
 def initialize_session_state():
     """Initialize session state variables"""
@@ -24,23 +213,88 @@ def initialize_session_state():
         st.session_state.process_model = None
     if 'current_analysis' not in st.session_state:
         st.session_state.current_analysis = None
+    if 'profiling_enabled' not in st.session_state:
+        st.session_state.profiling_enabled = load_config(require_api_key=False)['PERFORMANCE']['PROFILING']
+    if 'profiling_session' not in st.session_state:
+        st.session_state.profiling_session = uuid.uuid4().hex
+
+def render_append_section(store, processor):
+    """Append a CSV batch of new events to the current stored log"""
+    key = st.session_state.get('log_key')
+    if st.session_state.event_log is None or key is None or not store.contains(key):
+        return
+    meta = store.meta(key)
+    with st.expander(f"Append new events to {meta['name']}"):
+        st.caption("Only the cases that receive events are recomputed. The result is stored as a new log; "
+                   "the current one is kept.")
+        batch_file = st.file_uploader("CSV with new events (same columns as the original file)",
+                                      type=["csv"], key='append_batch')
+        if batch_file is not None and st.button("Append events"):
+            try:
+                batch = pd.read_csv(batch_file).rename(columns=meta.get('column_mapping') or {})
+                batch = processor.parse_columns(batch, meta.get('column_mapping'))
+                event_log, meta = store.append(key, batch, log=st.session_state.event_log)
+                st.session_state.event_log = event_log
+                st.session_state.log_key = meta['key']
+                st.success(f"Appended {len(batch):,} events: now {meta['n_cases']:,} cases "
+                           f"and {meta['n_events']:,} events")
+            except Exception as e:
+                st.error(f"Error appending events: {e}")
+
+def render_memory_section():
+    """Show how much memory each column of the current log takes"""
+    event_log = st.session_state.event_log
+    if event_log is None or not hasattr(event_log, 'case_attributes'):
+        return
+    with st.expander("Memory usage"):
+        report = memory_report(event_log)
+        total, uncompacted = report['bytes'].sum(), report['uncompacted_bytes'].sum()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("In memory", f"{total / 2**20:,.1f} MiB")
+        col2.metric("As a plain DataFrame", f"{uncompacted / 2**20:,.1f} MiB")
+        col3.metric("Compaction ratio", f"{uncompacted / max(total, 1):.1f}x")
+        st.dataframe(report)
 
 def render_upload_page():
     """Render the file upload page"""
     st.header("Upload Event Log")
     
     # Initialize EventLogProcessor
-    processor = EventLogProcessor()
+    performance_config = load_config(require_api_key=False)['PERFORMANCE']
+    processor = EventLogProcessor(case_level_attributes=performance_config['CASE_LEVEL_ATTRIBUTES'])
+    store = LogStore(performance_config['LOG_STORE_DIR'])
+    
+    # Offer logs processed in earlier sessions
+    stored_logs = store.list_logs()
+    if stored_logs:
+        with st.expander("Previously processed logs"):
+            entry = st.selectbox(
+                "Select a stored log",
+                stored_logs,
+                format_func=lambda e: f"{e['name']} ({e['n_cases']} cases, {e['n_events']} events, {e['created']})"
+            )
+            if st.button("Load stored log"):
+                try:
+                    st.session_state.event_log = store.load(entry['key'])
+                    st.session_state.log_key = entry['key']
+                    st.success(f"Loaded {entry['name']}")
+                except Exception as e:
+                    st.error(f"Error loading stored log: {e}")
     
-    uploaded_file = st.file_uploader("Choose a CSV or XES file", type=["csv", "xes"])
+    render_append_section(store, processor)
+    render_memory_section()
+
+    uploaded_file = st.file_uploader("Choose a CSV, XES or .xes.gz file", type=["csv", "xes", "gz"])
     
     if uploaded_file is not None:
-        file_extension = uploaded_file.name.split(".")[-1].lower()
+        file_name = uploaded_file.name.lower()
+        file_extension = "xes" if file_name.endswith(".xes.gz") else file_name.split(".")[-1]
         
         if file_extension == "csv":
             try:
-                # Read CSV and show column mapping
-                df = pd.read_csv(uploaded_file)
+                # Read a sample for the preview and column mapping
+                df = pd.read_csv(uploaded_file, nrows=1000)
+                uploaded_file.seek(0)
                 st.subheader("CSV Column Mapping")
                 
                 # Display raw data sample
@@ -59,6 +313,11 @@ def render_upload_page():
                     resource_col = st.selectbox("Select Resource column (optional)", ["None"] + list(df.columns))
                     cost_col = st.selectbox("Select Cost column (optional)", ["None"] + list(df.columns))
                 
+                stream_csv = st.checkbox(
+                    "Stream in chunks (bounded memory, for large files)",
+                    value=uploaded_file.size > 100 * 1024 * 1024
+                )
+                
                 if st.button("Process CSV"):
                     # Create column mapping
                     column_mapping = {
@@ -73,31 +332,42 @@ def render_upload_page():
                     if cost_col != "None":
                         column_mapping[cost_col] = 'cost'
                     
-                    # Rename columns to PM4Py format
-                    df = df.rename(columns=column_mapping)
-                    
                     try:
-                        # Process the event log
-                        event_log = processor.convert_csv_to_event_log(df)
+                        # Process the event log into the shared columnar format,
+                        # reusing the stored result for an identical file and mapping
+                        store_key = store.make_key(uploaded_file, column_mapping)
+                        if store.contains_source(store_key):
+                            event_log = store.load(store_key)
+                        elif stream_csv:
+                            event_log = processor.stream_csv_to_columnar_log(
+                                uploaded_file, column_mapping,
+                                memory_budget_mb=performance_config['INGEST_MEMORY_MB'],
+                                spill_dir=performance_config['INGEST_SPILL_DIR']
+                            )
+                        else:
+                            # Rename columns to PM4Py format
+                            df = pd.read_csv(uploaded_file).rename(columns=column_mapping)
+                            event_log = processor.convert_csv_to_columnar_log(df, column_mapping)
+                        if not store.contains_source(store_key):
+                            store.save(store_key, event_log, name=uploaded_file.name,
+                                       column_mapping=column_mapping)
                         st.session_state.event_log = event_log
+                        st.session_state.log_key = store_key
                         
                         # Show success message and processed data
                         st.success("CSV file successfully processed!")
                         st.subheader("Processed Event Log Sample")
-                        
-                        # Convert event log back to DataFrame for display
-                        processed_df = pm4py.convert_to_dataframe(event_log)
-                        st.write(processed_df.head())
+                        st.write(event_log.to_dataframe().head())
                         
                         # Show event log statistics
                         st.subheader("Event Log Statistics")
                         col1, col2, col3 = st.columns(3)
                         with col1:
-                            st.metric("Total Cases", len(set(processed_df['case:concept:name'])))
+                            st.metric("Total Cases", event_log.n_cases)
                         with col2:
-                            st.metric("Total Events", len(processed_df))
+                            st.metric("Total Events", event_log.n_events)
                         with col3:
-                            st.metric("Unique Activities", len(set(processed_df['concept:name'])))
+                            st.metric("Unique Activities", len(event_log.activities))
                             
                     except Exception as e:
                         st.error(f"Error converting to event log: {str(e)}")
@@ -107,13 +377,23 @@ def render_upload_page():
         
         elif file_extension == "xes":
             try:
-                log = pm4py.read_xes(uploaded_file)
-                st.session_state.event_log = log
-                st.success("XES file successfully loaded!")
-                
-                # Show sample of loaded data
+                # The preview parses only the first traces of the file
                 st.subheader("Sample of Loaded Data")
-                st.write(pd.DataFrame(pm4py.convert_to_dataframe(log)[0:5]))
+                st.write(preview_xes(uploaded_file, n_rows=5))
+
+                store_key = store.make_key(uploaded_file)
+                if store.contains_source(store_key):
+                    log = store.load(store_key)
+                else:
+                    log = processor.stream_xes_to_columnar_log(
+                        uploaded_file,
+                        memory_budget_mb=performance_config['INGEST_MEMORY_MB'],
+                        spill_dir=performance_config['INGEST_SPILL_DIR']
+                    )
+                    store.save(store_key, log, name=uploaded_file.name)
+                st.session_state.event_log = log
+                st.session_state.log_key = store_key
+                st.success(f"XES file successfully loaded: {log.n_cases:,} cases, {log.n_events:,} events")
             except Exception as e:
                 st.error(f"Error loading XES file: {e}")
         else:
@@ -133,6 +413,16 @@ def main():
     
     # Initialize session state
     initialize_session_state()
+    cache = get_analysis_cache()
+    executor = get_executor()
+    
+    # Profile this run if enabled in this session's sidebar panel
+    profiler.bind_session(st.session_state.profiling_session)
+    if st.session_state.profiling_enabled:
+        profiler.enable()
+    else:
+        profiler.disable()
+    run_start = profiler.mark()
     
     # Main title
     st.title("Process Mining + AI Analytics Platform")
@@ -145,17 +435,30 @@ def main():
             ["Upload & Process", "Process Discovery", "Performance Analysis", 
              "Statistical Analysis", "AI Insights"]
         )
+        # Analysis pages see only the cases matching the sidebar filters
+        analysis_log = render_filter_panel(st.session_state.event_log)
     
     # Main content based on selected page
     if page == "Upload & Process":
         render_upload_page()
     elif page == "Process Discovery":
-        if st.session_state.event_log is not None:
+        if analysis_log is not None:
             st.header("Process Discovery")
             
             # Initialize components
-            discovery = ProcessDiscovery()
-            visualizer = ProcessMapVisualizer()
+            discovery = ProcessDiscovery(cache=cache)
+            visualizer = ProcessMapVisualizer(render_cache=get_render_cache())
+            
+            # Trace variants come from the same index that drives discovery
+            with st.expander("Top Variants"):
+                top_k = st.slider("Number of variants", 1, 50, 10)
+                try:
+                    st.dataframe(
+                        discovery.get_top_variants(analysis_log, top_k),
+                        hide_index=True
+                    )
+                except Exception as e:
+                    st.error(f"Error in variant analysis: {e}")
             
             # Discovery options
             discovery_type = st.selectbox(
@@ -165,40 +468,77 @@ def main():
             
             if discovery_type == "Petri Net":
                 try:
-                    net, initial_marking, final_marking = discovery.discover_process_map(st.session_state.event_log)
-                    visualizer.visualize_process_map(net, initial_marking, final_marking)
+                    pruning = render_pruning_controls()
+                    petri_net = run_in_background(
+                        discovery.discover_process_map, analysis_log,
+                        "Alpha mining", **pruning
+                    )
+                    if petri_net is not None:
+                        visualizer.visualize_process_map(*petri_net)
                 except Exception as e:
                     st.error(f"Error in process discovery: {e}")
             
             elif discovery_type == "BPMN":
                 try:
-                    bpmn_model = discovery.discover_bpmn_model(st.session_state.event_log)
-                    st.write("BPMN model generated successfully")
+                    bpmn_model = run_in_background(
+                        discovery.discover_bpmn_model, analysis_log, "Inductive mining"
+                    )
+                    if bpmn_model is not None:
+                        st.write("BPMN model generated successfully")
                 except Exception as e:
                     st.error(f"Error in BPMN discovery: {e}")
             
             elif discovery_type == "DFG":
                 try:
-                    dfg, start_activities, end_activities = discovery.discover_dfg(st.session_state.event_log)
-                    visualizer.visualize_dfg(dfg, start_activities, end_activities)
+                    dfg_metric = st.radio(
+                        "Edge annotation",
+                        ["Frequency", "Mean duration", "Median duration", "P95 duration"],
+                        horizontal=True
+                    )
+                    pruning = render_pruning_controls()
+                    dfg, start_activities, end_activities = discovery.discover_dfg(analysis_log)
+                    activities_count = discovery.get_activity_counts(analysis_log)
+                    if dfg_metric == "Frequency":
+                        visualizer.visualize_dfg(dfg, start_activities, end_activities,
+                                                 activities_count=activities_count, **pruning)
+                    else:
+                        performance_dfg, _, _ = discovery.discover_performance_dfg(analysis_log)
+                        visualizer.visualize_dfg(
+                            dfg, start_activities, end_activities,
+                            performance_dfg=performance_dfg,
+                            activities_count=activities_count,
+                            aggregation_measure={"Mean duration": "mean", "Median duration": "median",
+                                                 "P95 duration": "p95"}[dfg_metric],
+                            **pruning
+                        )
                 except Exception as e:
                     st.error(f"Error in DFG discovery: {e}")
         else:
             st.warning("Please upload an event log first")
 
     elif page == "Performance Analysis":
-        if st.session_state.event_log is not None:
+        if analysis_log is not None:
             st.header("Performance Analysis")
             
             # Initialize components
-            performance = PerformanceAnalyzer()
-            charts = ChartGenerator()
+            performance = PerformanceAnalyzer(cache=cache, executor=executor)
+            charts = get_chart_generator()
             
             try:
-                # Calculate performance metrics
-                cycle_time = performance.calculate_cycle_time(st.session_state.event_log)
-                waiting_time = performance.calculate_waiting_time(st.session_state.event_log)
-                sojourn_time = performance.calculate_sojourn_time(st.session_state.event_log)
+                # Calculate performance metrics concurrently, sharing their intermediates
+                metrics = run_analyses(
+                    analysis_log,
+                    {
+                        'cycle_time': performance.calculate_cycle_time,
+                        'waiting_time': performance.calculate_waiting_time_statistics,
+                        'sojourn_time': performance.calculate_sojourn_time,
+                    },
+                    executor=executor,
+                    max_workers=load_config(require_api_key=False)['PERFORMANCE']['ANALYSIS_THREADS']
+                )
+                cycle_time = metrics['cycle_time']
+                waiting_time = metrics['waiting_time']
+                sojourn_time = metrics['sojourn_time']
                 
                 # Display metrics
                 col1, col2 = st.columns(2)
@@ -207,11 +547,11 @@ def main():
                     charts.create_cycle_time_chart(cycle_time)
                 
                 with col2:
-                    st.subheader("Activity Waiting Times")
-                    st.write(waiting_time)
+                    st.subheader("Activity Waiting Times (hours)")
+                    st.dataframe(waiting_time, hide_index=True)
                 
                 st.subheader("Process Timeline")
-                charts.create_performance_timeline(st.session_state.event_log)
+                charts.create_performance_timeline(analysis_log)
             
             except Exception as e:
                 st.error(f"Error in performance analysis: {e}")
@@ -219,19 +559,20 @@ def main():
             st.warning("Please upload an event log first")
 
     elif page == "Statistical Analysis":
-        if st.session_state.event_log is not None:
+        if analysis_log is not None:
             st.header("Statistical Analysis")
             
             # Initialize components
-            stats = ProcessStatistics()
-            charts = ChartGenerator()
+            stats = ProcessStatistics(cache=cache, executor=executor)
+            charts = get_chart_generator()
             
             try:
-                # Get all statistics
-                case_stats = stats.get_case_statistics(st.session_state.event_log)
-                activity_stats = stats.get_activity_statistics(st.session_state.event_log)
-                resource_stats = stats.get_resource_statistics(st.session_state.event_log)
-                process_kpis = stats.get_process_kpis(st.session_state.event_log)
+                # Get all statistics in one pass
+                tables = stats.compute_all(analysis_log)
+                case_table = tables['cases']
+                activity_table = tables['activities']
+                resource_table = tables['resources']
+                process_kpis = tables['kpis']
                 
                 # Display Process Overview
                 st.subheader("Process Overview")
@@ -251,26 +592,21 @@ def main():
                 
                 with case_tabs[0]:
                     st.write("Case Duration Distribution")
-                    case_durations = [(case, stats['temporal']['duration_hours']) 
-                                    for case, stats in case_stats.items()]
-                    charts.create_cycle_time_chart(case_durations)
+                    charts.create_cycle_time_chart(case_table['duration_hours'])
                 
                 with case_tabs[1]:
                     col1, col2 = st.columns(2)
                     with col1:
                         st.write("Resource Utilization")
-                        resource_data = pd.DataFrame(
-                            [(r, stats['workload']['total_activities']) 
-                             for r, stats in resource_stats.items()],
-                            columns=['Resource', 'Activities']
+                        resource_data = resource_table[['total_activities']].rename(
+                            columns={'total_activities': 'Activities'}
                         )
-                        st.bar_chart(resource_data.set_index('Resource'))
+                        st.bar_chart(resource_data)
                     
                     with col2:
                         st.write("Activity Distribution")
                         charts.create_activity_frequency_chart(
-                            {act: stats['frequency']['total_occurrences'] 
-                             for act, stats in activity_stats.items()}
+                            activity_table['total_occurrences'].to_dict()
                         )
                 
                 with case_tabs[2]:
@@ -294,27 +630,24 @@ def main():
                 resource_tabs = st.tabs(["Workload", "Performance"])
                 
                 with resource_tabs[0]:
-                    for resource, stats in resource_stats.items():
+                    for resource, row in resource_table.iterrows():
                         with st.expander(f"Resource: {resource}"):
                             rcol1, rcol2 = st.columns(2)
                             with rcol1:
-                                st.metric("Total Activities", stats['workload']['total_activities'])
-                                st.metric("Unique Cases", stats['workload']['unique_cases'])
+                                st.metric("Total Activities", int(row['total_activities']))
+                                st.metric("Unique Cases", int(row['unique_cases']))
                             with rcol2:
-                                st.metric("Active Hours", f"{stats['time']['active_hours']:.1f}")
-                                if 'performance' in stats and 'total_cost' in stats['performance']:
-                                    st.metric("Total Cost", f"${stats['performance']['total_cost']:,.2f}")
+                                st.metric("Active Hours", f"{row['active_hours']:.1f}")
+                                if 'total_cost' in row.index:
+                                    st.metric("Total Cost", f"${row['total_cost']:,.2f}")
                 
                 with resource_tabs[1]:
-                    if any('costs' in stats['performance'] for stats in resource_stats.values()):
-                        performance_data = pd.DataFrame([
-                            {
-                                'Resource': r,
-                                'Total Cost': stats['performance'].get('total_cost', 0),
-                                'Avg Cost': stats['performance'].get('avg_cost_per_activity', 0)
-                            }
-                            for r, stats in resource_stats.items()
-                        ])
+                    if 'total_cost' in resource_table.columns:
+                        performance_data = pd.DataFrame({
+                            'Resource': resource_table.index,
+                            'Total Cost': resource_table['total_cost'].fillna(0).to_numpy(),
+                            'Avg Cost': resource_table['avg_cost_per_activity'].fillna(0).to_numpy()
+                        })
                         st.write("Resource Cost Analysis")
                         st.dataframe(performance_data)
                     else:
@@ -327,38 +660,53 @@ def main():
             st.warning("Please upload an event log first")
 
     elif page == "AI Insights":
-        if st.session_state.event_log is not None:
+        if analysis_log is not None:
             st.header("AI Insights")
             
             try:
-                # Initialize AI components
-                gemini = GeminiInterface()
-                insights = InsightGenerator(gemini)
-                
-                # Generate insights
-                process_insights = insights.generate_process_insights(
-                    str(st.session_state.event_log),
-                    "Process model analysis"  # Placeholder for process model
+                # The log is sent as a budgeted summary, never as raw events
+                context_tokens = st.slider(
+                    "Log context budget (tokens)", 500, 32000,
+                    load_config(require_api_key=False)['AI']['CONTEXT_TOKENS'], step=500
                 )
+                summarizer = LogSummarizer(cache=cache, executor=executor)
+                with st.expander("Log context sent to the model"):
+                    log_context = summarizer.summarize(analysis_log, max_tokens=context_tokens)
+                    st.caption(f"About {estimate_tokens(log_context):,} tokens")
+                    st.text(log_context)
+                
+                # Initialize AI components
+                gemini = get_gemini_interface()
+                insights = InsightGenerator(gemini, summarizer=summarizer, context_tokens=context_tokens)
                 
-                # Display insights
+                # Stream insights as they arrive; reruns are answered from the response cache
                 st.subheader("Process Insights")
-                st.write(process_insights)
+                st.write_stream(insights.generate_process_insights(
+                    analysis_log,
+                    "Process model analysis",  # Placeholder for process model
+                    stream=True
+                ))
                 
                 # Interactive query section
                 st.subheader("Ask Questions")
                 user_query = st.text_input("Ask a question about the process:")
                 if user_query:
-                    answer = insights.generate_conversational_analysis(
+                    st.write("Answer:")
+                    st.write_stream(insights.generate_conversational_analysis(
                         user_query,
-                        str(st.session_state.event_log)
-                    )
-                    st.write("Answer:", answer)
+                        analysis_log,
+                        stream=True
+                    ))
                 
             except Exception as e:
                 st.error(f"Error generating insights: {e}")
         else:
             st.warning("Please upload an event log first")
 
+    # Rendered last so the counters include this run
+    with st.sidebar:
+        render_cache_stats(cache)
+        render_profiling_panel(run_start)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,156 @@
+from collections import Counter
+
+import numpy as np
+
+from process_mining.graph import intermediates
+from utils.columnar_log import as_columnar_log, grouped_quantiles
+
+# Edge duration statistics computed for the performance DFG (seconds)
+PERFORMANCE_QUANTILES = {'median': 0.5, 'p95': 0.95}
+# Largest activity-pair space counted with a dense bincount
+DENSE_PAIR_LIMIT = 1 << 22
+
+
+def count_pairs(pair_codes, n_activities, weights=None):
+    """
+    Occurring (source, target) pair codes, ascending, with each code's edge index and count.
+
+    Pair codes are ``source * n_activities + target``. Counts are summed
+    ``weights`` if given. Pair spaces up to ``DENSE_PAIR_LIMIT`` are counted
+    with a dense ``bincount``, larger ones by sorting the codes.
+    """
+    if n_activities ** 2 <= DENSE_PAIR_LIMIT:
+        # Dense pair space: count with bincount, then compact to occurring edges
+        pair_counts = np.bincount(pair_codes, minlength=n_activities ** 2)
+        edges = np.flatnonzero(pair_counts)
+        if weights is not None:
+            pair_counts = np.bincount(pair_codes, weights=weights, minlength=n_activities ** 2)
+        edge_ids = np.full(n_activities ** 2, -1, dtype=np.int64)
+        edge_ids[edges] = np.arange(len(edges))
+        return edges, edge_ids[pair_codes], pair_counts[edges]
+    edges, edge_index, edge_counts = np.unique(pair_codes, return_inverse=True, return_counts=True)
+    if weights is not None:
+        edge_counts = np.bincount(edge_index, weights=weights, minlength=len(edges))
+    return edges, edge_index, edge_counts
+
+
+def compute_dfg(event_log):
+    """
+    Build the frequency and performance directly-follows graph in one pass.
+
+    Edge counts come from a ``bincount`` over integer (source, target) pair
+    codes, and edge durations (seconds) from the same pairs. Returns a dict
+    with ``frequency`` ({edge: count}), ``performance`` ({edge: {'mean',
+    'median', 'p95', 'count'}}), ``start_activities``, ``end_activities``
+    and ``activities_count``.
+    """
+    log = as_columnar_log(event_log)
+    activities = log.activities
+    n_activities = len(activities)
+
+    index, source, target, _ = intermediates.get(log, 'transitions')
+    durations = (log.timestamps[index + 1] - log.timestamps[index]) / 10**9
+    pair_codes = source.astype(np.int64) * n_activities + target
+
+    edges, edge_index, edge_counts = count_pairs(pair_codes, n_activities)
+    sums = np.bincount(edge_index, weights=durations, minlength=len(edges))
+    quantiles = grouped_quantiles(
+        durations, edge_index, len(edges), list(PERFORMANCE_QUANTILES.values())
+    )
+
+    frequency, performance = {}, {}
+    for i, code in enumerate(edges):
+        edge = (activities[code // n_activities], activities[code % n_activities])
+        frequency[edge] = int(edge_counts[i])
+        performance[edge] = {'mean': sums[i] / edge_counts[i], 'count': int(edge_counts[i])}
+        for j, name in enumerate(PERFORMANCE_QUANTILES):
+            performance[edge][name] = quantiles[i, j]
+
+    def activity_counts(codes):
+        codes = codes[codes >= 0]
+        totals = np.bincount(codes, minlength=n_activities)
+        return {activities[code]: int(totals[code]) for code in np.flatnonzero(totals)}
+
+    return {
+        'frequency': frequency,
+        'performance': performance,
+        'start_activities': activity_counts(log.activity_codes[log.case_offsets[:-1]]),
+        'end_activities': activity_counts(log.activity_codes[log.case_offsets[1:] - 1]),
+        'activities_count': activity_counts(log.activity_codes)
+    }
+
+
+def update_dfg(dfg, delta):
+    """
+    ``compute_dfg`` of the log after an append, from ``dfg`` of the log before it.
+
+    Counts are corrected by the touched cases' transitions and endpoints
+    before and after the append. Duration statistics are recomputed only
+    for the edges those transitions touch, over all of each edge's
+    transitions in event order, so every value equals a full ``compute_dfg``.
+    """
+    log = delta.new_log
+    activities = log.activities
+    n_activities = len(activities)
+    activity_index = {name: code for code, name in enumerate(activities)}
+
+    def edge_counts(sub):
+        _, source, target, _ = sub.transitions()
+        return Counter(zip(sub.activities[source], sub.activities[target]))
+
+    def name_counts(sub, codes):
+        codes = codes[codes >= 0]
+        return Counter(sub.activities[codes])
+
+    def ordered(counts):
+        return {name: int(counts[name]) for name in activities if counts.get(name, 0) > 0}
+
+    old, new = delta.old_touched, delta.new_touched
+    removed, added = edge_counts(old), edge_counts(new)
+    frequency = Counter(dfg['frequency'])
+    frequency.subtract(removed)
+    frequency.update(added)
+    edges = sorted((edge for edge, count in frequency.items() if count > 0),
+                   key=lambda edge: (activity_index[edge[0]], activity_index[edge[1]]))
+
+    # Every transition of an edge that gained or lost transitions
+    touched_codes = np.array(sorted(
+        activity_index[source] * n_activities + activity_index[target]
+        for source, target in set(removed) | set(added) if frequency[(source, target)] > 0
+    ), dtype=np.int64)
+    index, source, target, _ = intermediates.get(log, 'transitions')
+    pair_codes = source.astype(np.int64) * n_activities + target
+    selected = np.isin(pair_codes, touched_codes)
+    index, edge_index = index[selected], np.searchsorted(touched_codes, pair_codes[selected])
+    durations = (log.timestamps[index + 1] - log.timestamps[index]) / 10**9
+    counts = np.bincount(edge_index, minlength=len(touched_codes))
+    sums = np.bincount(edge_index, weights=durations, minlength=len(touched_codes))
+    quantiles = grouped_quantiles(
+        durations, edge_index, len(touched_codes), list(PERFORMANCE_QUANTILES.values())
+    )
+    recomputed = {}
+    for i, code in enumerate(touched_codes):
+        edge = (activities[code // n_activities], activities[code % n_activities])
+        recomputed[edge] = {'mean': sums[i] / counts[i], 'count': int(counts[i])}
+        for j, name in enumerate(PERFORMANCE_QUANTILES):
+            recomputed[edge][name] = quantiles[i, j]
+
+    def endpoints(key, last):
+        counts = Counter(dfg[key])
+        for sub, apply in ((old, counts.subtract), (new, counts.update)):
+            positions = sub.case_offsets[1:] - 1 if last else sub.case_offsets[:-1]
+            apply(name_counts(sub, sub.activity_codes[positions]))
+        return ordered(counts)
+
+    activities_count = Counter(dfg['activities_count'])
+    activities_count.subtract(name_counts(old, old.activity_codes))
+    activities_count.update(name_counts(new, new.activity_codes))
+
+    return {
+        'frequency': {edge: int(frequency[edge]) for edge in edges},
+        'performance': {edge: recomputed[edge] if edge in recomputed else dict(dfg['performance'][edge])
+                        for edge in edges},
+        'start_activities': endpoints('start_activities', last=False),
+        'end_activities': endpoints('end_activities', last=True),
+        'activities_count': ordered(activities_count),
+    }
@@ -1,44 +1,127 @@
 import pm4py
+from pm4py.algo.discovery.alpha.variants import classic as alpha_miner
+from pm4py.algo.discovery.inductive.dtypes.im_ds import IMDataStructureUVCL
+from pm4py.algo.discovery.inductive.variants.im import IMUVCL
+from pm4py.objects.process_tree.utils import generic as process_tree_util
+
+from process_mining.dfg import compute_dfg
+from process_mining.graph import requires
+from process_mining.jobs import report_progress
+from process_mining.pruning import prune_dfg
+from process_mining.variants import VariantIndex
+from utils.columnar_log import as_columnar_log
+from utils.cache import cached_analysis
+from utils.profiling import profiled, profiler
 
 class ProcessDiscovery:
-    def __init__(self):
-        pass
+    def __init__(self, cache=None):
+        self.cache = cache
 
-    def discover_process_map(self, event_log):
+    @profiled('ProcessDiscovery.discover_process_map')
+    @cached_analysis('ProcessDiscovery.discover_process_map')
+    def discover_process_map(self, event_log, activity_keep=1.0, edge_keep=1.0, pruning_method='coverage'):
         """
         Discover a process map from the event log using the Alpha algorithm.
+
+        ``activity_keep`` and ``edge_keep`` below 1 mine only the frequent part
+        of the directly-follows graph (see ``prune_dfg``).
         """
         try:
-            net, initial_marking, final_marking = pm4py.discover_petri_net_alpha(event_log)
+            # Alpha only needs directly-follows and start/end counts, which the
+            # deduplicated variants provide weighted by their frequency
+            with profiler.stage('variant index'):
+                dfg, start_activities, end_activities = VariantIndex.for_log(event_log).weighted_dfg()
+            report_progress(0.3, 'variants indexed')
+            if activity_keep < 1 or edge_keep < 1:
+                dfg, start_activities, end_activities, _ = prune_dfg(
+                    dfg, start_activities, end_activities, self.get_activity_counts(event_log),
+                    activity_keep=activity_keep, edge_keep=edge_keep, method=pruning_method
+                )
+            report_progress(0.4, 'running the Alpha miner')
+            with profiler.stage('alpha miner') as span:
+                span.rows = len(dfg)
+                net, initial_marking, final_marking = alpha_miner.apply_dfg_sa_ea(
+                    dfg, start_activities, end_activities
+                )
             return net, initial_marking, final_marking
         except Exception as e:
             raise ValueError(f"Error in process map discovery: {str(e)}")
 
+    @profiled('ProcessDiscovery.discover_bpmn_model')
+    @cached_analysis('ProcessDiscovery.discover_bpmn_model')
     def discover_bpmn_model(self, event_log):
         """
         Discover a BPMN model from the event log using the Inductive Miner.
         """
         try:
-            bpmn_model = pm4py.discover_bpmn_inductive(event_log)
+            # Mine the variant log (each distinct trace once, with its count)
+            with profiler.stage('variant index'):
+                uvcl = VariantIndex.for_log(event_log).to_uvcl()
+            report_progress(0.3, 'running the Inductive miner')
+            with profiler.stage('inductive miner') as span:
+                span.rows = len(uvcl)
+                process_tree = IMUVCL({}).apply(IMDataStructureUVCL(uvcl), {})
+                process_tree = process_tree_util.fold(process_tree)
+                process_tree_util.tree_sort(process_tree)
+            report_progress(0.8, 'converting to BPMN')
+            with profiler.stage('bpmn conversion'):
+                bpmn_model = pm4py.convert_to_bpmn(process_tree)
             return bpmn_model
         except Exception as e:
             raise ValueError(f"Error in BPMN discovery: {str(e)}")
 
+    @profiled('ProcessDiscovery.get_top_variants')
+    @cached_analysis('ProcessDiscovery.get_top_variants')
+    def get_top_variants(self, event_log, k=10):
+        """
+        Get the k most frequent trace variants with their counts.
+        """
+        try:
+            return VariantIndex.for_log(event_log).top_k(k)
+        except Exception as e:
+            raise ValueError(f"Error in variant analysis: {str(e)}")
+
+    @requires('transitions')
+    @profiled('ProcessDiscovery.discover_dfg')
+    @cached_analysis('ProcessDiscovery.discover_dfg')
     def discover_dfg(self, event_log):
         """
         Discover a Directly-Follows Graph (DFG) from the event log.
         """
         try:
-            # Get start and end activities first
-            start_activities = pm4py.get_start_activities(event_log)
-            end_activities = pm4py.get_end_activities(event_log)
-            
-            # Get the DFG with frequency
-            dfg = pm4py.discover_directly_follows_graph(event_log)
-            
-            # Convert frequency to dictionary for compatibility
-            dfg_dict = {(k[0], k[1]): v for k, v in dfg.items()}
-            
-            return dfg_dict, start_activities, end_activities
+            dfg = self._dfg(event_log)
+            return dfg['frequency'], dfg['start_activities'], dfg['end_activities']
         except Exception as e:
             raise ValueError(f"Error in DFG discovery: {str(e)}")
+
+    @requires('transitions')
+    @profiled('ProcessDiscovery.discover_performance_dfg')
+    @cached_analysis('ProcessDiscovery.discover_performance_dfg')
+    def discover_performance_dfg(self, event_log):
+        """
+        Discover a DFG annotated with mean, median and p95 edge durations (seconds).
+        """
+        try:
+            dfg = self._dfg(event_log)
+            return dfg['performance'], dfg['start_activities'], dfg['end_activities']
+        except Exception as e:
+            raise ValueError(f"Error in performance DFG discovery: {str(e)}")
+
+    @profiled('ProcessDiscovery.get_activity_counts')
+    def get_activity_counts(self, event_log):
+        """
+        Get the number of occurrences of each activity.
+        """
+        return self._dfg(event_log)['activities_count']
+
+    def _dfg(self, event_log):
+        """
+        Frequency and performance DFG of a log, built together once per log.
+        """
+        log = as_columnar_log(event_log)
+
+        def build():
+            with profiler.stage('dfg build', rows=log.n_events):
+                return compute_dfg(log)
+
+        return log.memo('dfg', build)
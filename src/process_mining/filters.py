@@ -0,0 +1,394 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from process_mining.variants import VariantIndex
+from utils.columnar_log import ColumnarEventLog, as_columnar_log
+from utils.profiling import profiler
+
+# Filtered logs kept per log, by filter expression; each holds a copy of its events
+MAX_VIEWS = 8
+
+
+class Postings:
+    """
+    Sorted case codes per value of one dimension of a log.
+
+    ``cases[offsets[v]:offsets[v + 1]]`` are the cases that have value
+    ``values[v]`` at least once, in ascending order.
+    """
+
+    def __init__(self, values, cases, offsets, n_cases):
+        self.values = np.asarray(values, dtype=object)
+        self.cases = cases
+        self.offsets = offsets
+        self.n_cases = n_cases
+
+    @classmethod
+    def from_codes(cls, values, value_codes, case_codes, n_cases):
+        """
+        Postings from one (value code, case code) pair per occurrence; value code -1 is skipped.
+        """
+        value_codes = np.asarray(value_codes)
+        valid = value_codes >= 0
+        pairs = np.unique(value_codes[valid].astype(np.int64) * n_cases + np.asarray(case_codes)[valid])
+        counts = np.bincount(pairs // n_cases, minlength=len(values)) if n_cases else np.zeros(len(values))
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(values, (pairs % max(n_cases, 1)).astype(np.int32), offsets, n_cases)
+
+    @property
+    def case_counts(self):
+        return np.diff(self.offsets)
+
+    def codes(self, values):
+        """
+        Value codes of ``values``, leaving out values the log does not have.
+        """
+        codes = pd.Index(self.values).get_indexer(pd.Index(list(values), dtype=object))
+        return codes[codes >= 0]
+
+    def mask(self, values):
+        """
+        Boolean mask over cases that have any of ``values``.
+        """
+        mask = np.zeros(self.n_cases, dtype=bool)
+        for code in self.codes(values):
+            mask[self.cases[self.offsets[code]:self.offsets[code + 1]]] = True
+        return mask
+
+
+class CaseIndex:
+    """
+    Case postings of a log per attribute value, case start month and variant.
+
+    Postings are built on first use of a dimension and memoized on the log,
+    so combining filters afterwards only ORs and ANDs boolean case masks.
+    Activity (``concept:name``) and resource (``org:resource``) postings come
+    straight from the event codes; other attributes are dictionary-encoded
+    first, per case for case-level ones.
+    """
+
+    def __init__(self, log):
+        self.log = log
+        self._views = OrderedDict()
+        self._views_lock = threading.Lock()
+
+    @classmethod
+    def for_log(cls, event_log):
+        """
+        Return the case index of a log, building it only once per log.
+        """
+        log = as_columnar_log(event_log)
+        return log.memo('case_index', lambda: cls(log))
+
+    def attribute(self, name):
+        """
+        Postings of an attribute: the cases having each of its values on any event.
+        """
+        log = self.log
+
+        def build():
+            if name == 'concept:name':
+                return Postings.from_codes(log.activities, log.activity_codes, log.case_codes, log.n_cases)
+            if name == 'org:resource':
+                return Postings.from_codes(log.resources, log.resource_codes, log.case_codes, log.n_cases)
+            if name in log.case_attributes.columns:
+                codes, values = pd.factorize(log.case_column(name), sort=True)
+                return Postings.from_codes(values, codes, np.arange(log.n_cases), log.n_cases)
+            codes, values = pd.factorize(log.column(name), sort=True)
+            return Postings.from_codes(values, codes, log.case_codes, log.n_cases)
+
+        if name not in ('concept:name', 'org:resource') and name not in log.attribute_names:
+            raise KeyError(f"Unknown attribute: {name}")
+        return log.memo(f'case_index.attribute.{name}', build)
+
+    def months(self):
+        """
+        Postings of the month ('YYYY-MM', in the log's timezone) in which each case starts.
+        """
+        log = self.log
+
+        def build():
+            starts = log.to_datetime(log.case_start)
+            buckets = np.asarray(starts.year * 12 + starts.month - 1, dtype=np.int64)
+            codes, uniques = pd.factorize(buckets, sort=True)
+            labels = [f"{bucket // 12:04d}-{bucket % 12 + 1:02d}" for bucket in uniques]
+            return Postings.from_codes(labels, codes, np.arange(log.n_cases), log.n_cases)
+
+        return log.memo('case_index.months', build)
+
+    def variants(self):
+        """
+        Postings of the variant ids of ``VariantIndex``, most frequent first.
+        """
+        log = self.log
+
+        def build():
+            variants = VariantIndex.for_log(log)
+            # Members are grouped by variant and ascending within each
+            return Postings(np.arange(variants.n_variants), variants.member_cases,
+                            variants.member_offsets, log.n_cases)
+
+        return log.memo('case_index.variants', build)
+
+    def filterable_attributes(self, max_values=50):
+        """
+        Attribute names with at most ``max_values`` distinct values, which make sensible filters.
+
+        Counted once per log and ``max_values``, like the postings.
+        """
+        log = self.log
+
+        def build():
+            names = ['concept:name'] + (['org:resource'] if len(log.resources) else [])
+            for name in list(log.attributes.columns) + list(log.case_attributes.columns):
+                values = log.case_attributes[name] if name in log.case_attributes.columns else log.attributes[name]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    distinct = len(values.cat.categories)
+                elif pd.api.types.is_bool_dtype(values.dtype) or pd.api.types.is_object_dtype(values.dtype) \
+                        or pd.api.types.is_string_dtype(values.dtype):
+                    distinct = values.nunique()
+                else:
+                    continue
+                if distinct <= max_values:
+                    names.append(name)
+            return names
+
+        return log.memo(f'case_index.filterable.{max_values}', build)
+
+    def select(self, expression):
+        """
+        Codes of the cases matching a filter expression, ascending.
+        """
+        return np.flatnonzero(expression.mask(self))
+
+    def view(self, expression):
+        """
+        The log restricted to the cases matching ``expression``; the log itself if all match.
+
+        Views are kept for the last ``MAX_VIEWS`` expressions, so switching
+        pages reuses the same view and the results cached for it.
+        """
+        key = expression.key
+        with self._views_lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                return self._views[key]
+        with profiler.stage('filter cases', rows=self.log.n_cases):
+            cases = self.select(expression)
+            view = self.log if len(cases) == self.log.n_cases else case_view(self.log, cases)
+        with self._views_lock:
+            self._views[key] = view
+            while len(self._views) > MAX_VIEWS:
+                self._views.popitem(last=False)
+        return view
+
+
+def _used_dictionary(codes, dictionary):
+    """
+    Codes renumbered to the dictionary values they use, and those values (still sorted).
+    """
+    used = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(dictionary)))
+    # The appended -1 keeps missing codes missing
+    remap = np.full(len(dictionary) + 1, -1, dtype=np.int32)
+    remap[used] = np.arange(len(used), dtype=np.int32)
+    return remap[codes], np.asarray(dictionary, dtype=object)[used]
+
+
+def _take_rows(frame, rows):
+    frame = frame.iloc[rows].reset_index(drop=True)
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].cat.remove_unused_categories()
+    return frame
+
+
+def event_view(log, events):
+    """
+    A log of only the given events (ascending indices or a boolean mask) with their attributes.
+
+    Unlike ``ColumnarEventLog.select_cases``, the case, activity and resource
+    dictionaries are reduced to the values the events use, so the result
+    equals the log built from those events alone and analyses of it show no
+    empty cases, activities or resources.
+    """
+    events = np.asarray(events)
+    if events.dtype == bool:
+        events = np.flatnonzero(events)
+    case_codes, cases = _used_dictionary(log.case_codes[events], log.cases)
+    activity_codes, activities = _used_dictionary(log.activity_codes[events], log.activities)
+    resource_codes, resources = _used_dictionary(log.resource_codes[events], log.resources)
+    kept_cases = np.flatnonzero(np.bincount(log.case_codes[events], minlength=log.n_cases))
+    return ColumnarEventLog(
+        case_codes, activity_codes, resource_codes, log.timestamps[events],
+        cases, activities, resources,
+        attributes=_take_rows(log.attributes, events), timezone=log.timezone,
+        case_attributes=_take_rows(log.case_attributes, kept_cases)
+    )
+
+
+def case_view(log, cases):
+    """
+    A log of only the given cases (ascending case codes), as ``event_view`` builds it.
+    """
+    return event_view(log, log.case_events(np.asarray(cases, dtype=np.int64)))
+
+
+class CaseFilter:
+    """
+    Filter expression over the cases of a log; combine with ``&``, ``|`` and ``~``.
+
+    ``mask(index)`` returns a boolean array over the cases of the
+    ``CaseIndex``; ``key`` is a canonical text form used to cache views.
+    """
+
+    def mask(self, index):
+        raise NotImplementedError
+
+    @property
+    def key(self):
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return Combined('&', [self, other])
+
+    def __or__(self, other):
+        return Combined('|', [self, other])
+
+    def __invert__(self):
+        return Not(self)
+
+    def __repr__(self):
+        return self.key
+
+
+class AttributeIn(CaseFilter):
+    """
+    Cases with any of ``values`` for an attribute on any event (or the case, for case-level ones).
+    """
+
+    def __init__(self, name, values):
+        self.name = name
+        self.values = list(values)
+
+    def mask(self, index):
+        return index.attribute(self.name).mask(self.values)
+
+    @property
+    def key(self):
+        return f"{self.name} in {sorted(map(str, self.values))}"
+
+
+class MonthIn(CaseFilter):
+    """
+    Cases starting in any of the given months ('YYYY-MM').
+    """
+
+    def __init__(self, months):
+        self.months = list(months)
+
+    def mask(self, index):
+        return index.months().mask(self.months)
+
+    @property
+    def key(self):
+        return f"month in {sorted(self.months)}"
+
+
+class VariantIn(CaseFilter):
+    """
+    Cases following any of the given variants (ids of ``VariantIndex``).
+    """
+
+    def __init__(self, variants):
+        self.variants = [int(v) for v in variants]
+
+    def mask(self, index):
+        return index.variants().mask(self.variants)
+
+    @property
+    def key(self):
+        return f"variant in {sorted(self.variants)}"
+
+
+class TimeRange(CaseFilter):
+    """
+    Cases starting at or after ``start`` and before ``end`` (either may be None).
+    """
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+
+    def _bound(self, log, value):
+        value = pd.Timestamp(value)
+        if log.timezone is not None and value.tzinfo is None:
+            value = value.tz_localize(log.timezone)
+        elif log.timezone is None and value.tzinfo is not None:
+            value = value.tz_convert('UTC').tz_localize(None)
+        return value.as_unit('ns').value
+
+    def mask(self, index):
+        log = index.log
+        mask = np.ones(log.n_cases, dtype=bool)
+        if self.start is not None:
+            mask &= log.case_start >= self._bound(log, self.start)
+        if self.end is not None:
+            mask &= log.case_start < self._bound(log, self.end)
+        return mask
+
+    @property
+    def key(self):
+        return f"start in [{self.start}, {self.end})"
+
+
+class Combined(CaseFilter):
+    def __init__(self, operator, parts):
+        self.operator = operator
+        self.parts = parts
+
+    def mask(self, index):
+        combine = np.logical_and if self.operator == '&' else np.logical_or
+        mask = self.parts[0].mask(index)
+        for part in self.parts[1:]:
+            mask = combine(mask, part.mask(index))
+        return mask
+
+    @property
+    def key(self):
+        return '(' + f" {self.operator} ".join(part.key for part in self.parts) + ')'
+
+
+class Not(CaseFilter):
+    def __init__(self, part):
+        self.part = part
+
+    def mask(self, index):
+        return ~self.part.mask(index)
+
+    @property
+    def key(self):
+        return f"~{self.part.key}"
+
+
+def all_of(filters):
+    """
+    The conjunction of a list of filters, or None for an empty list.
+    """
+    filters = list(filters)
+    if not filters:
+        return None
+    return filters[0] if len(filters) == 1 else Combined('&', filters)
+
+
+def filter_log(event_log, expression):
+    """
+    The cases of a log matching a filter expression, as a log the analyzers accept.
+    """
+    log = as_columnar_log(event_log)
+    if expression is None:
+        return log
+    return CaseIndex.for_log(log).view(expression)
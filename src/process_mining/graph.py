@@ -0,0 +1,167 @@
+import contextvars
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+from process_mining.parallel import case_metrics, concat_metrics, map_cases
+from utils.columnar_log import as_columnar_log
+from utils.profiling import profiler
+
+# Threads for independent nodes; numpy and pandas release the GIL in their kernels
+DEFAULT_THREADS = min(os.cpu_count() or 1, 8)
+
+
+class AnalysisGraph:
+    """
+    Named analysis steps over one log, each declaring the steps it depends on.
+
+    A node is ``compute(log, executor, **dependencies)``. Nodes are memoized
+    on the log unless added with ``memo=False``, so an intermediate such as
+    the transition arrays is computed once and shared by every analysis and
+    page that needs it. ``compute`` evaluates the requested nodes and their
+    dependencies, running nodes whose dependencies are ready concurrently in
+    a thread pool.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+
+    def add(self, name, compute, deps=(), memo=True):
+        for dep in deps:
+            if dep not in self.nodes:
+                raise ValueError(f"Node {name} depends on unknown node {dep}")
+        self.nodes[name] = (compute, tuple(deps), memo)
+
+    def node(self, name, deps=(), memo=True):
+        """
+        Decorator registering a function as node ``name``.
+        """
+        def decorator(compute):
+            self.add(name, compute, deps, memo)
+            return compute
+        return decorator
+
+    def closure(self, targets):
+        """
+        The targets and everything they depend on, dependencies first.
+        """
+        ordered, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            if name not in self.nodes:
+                raise KeyError(f"Unknown analysis node: {name}")
+            seen.add(name)
+            for dep in self.nodes[name][1]:
+                visit(dep)
+            ordered.append(name)
+
+        for target in targets:
+            visit(target)
+        return ordered
+
+    def _evaluate(self, log, name, executor, results):
+        compute, deps, memo = self.nodes[name]
+
+        def run():
+            with profiler.stage(f'graph {name}'):
+                return compute(log, executor, **{dep: results[dep] for dep in deps})
+        return log.memo(f'graph.{name}', run) if memo else run()
+
+    def get(self, event_log, name, executor=None):
+        """
+        Value of one node, computing it and its dependencies in-thread if needed.
+        """
+        log = as_columnar_log(event_log)
+        results = {}
+        for node in self.closure([name]):
+            results[node] = self._evaluate(log, node, executor, results)
+        return results[name]
+
+    def compute(self, event_log, targets, executor=None, max_workers=DEFAULT_THREADS):
+        """
+        Values of the ``targets`` nodes as a dict, evaluating independent nodes concurrently.
+        """
+        log = as_columnar_log(event_log)
+        pending = self.closure(targets)
+        results = {}
+        if max_workers <= 1:
+            for name in pending:
+                results[name] = self._evaluate(log, name, executor, results)
+            return {name: results[name] for name in targets}
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis') as pool:
+            running = {}
+            while pending or running:
+                for name in [n for n in pending if all(d in results for d in self.nodes[n][1])]:
+                    pending.remove(name)
+                    # Run in a copy of the caller's context so stages keep its profiling session
+                    running[pool.submit(contextvars.copy_context().run,
+                                        self._evaluate, log, name, executor, results)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return {name: results[name] for name in targets}
+
+
+# Intermediates shared by the analyzers
+intermediates = AnalysisGraph()
+
+
+@intermediates.node('case_metrics')
+def _case_metrics(log, executor):
+    # Start, end, event and distinct-value counts per case, computed per case partition
+    return concat_metrics(map_cases(executor, log, case_metrics))
+
+
+@intermediates.node('case_durations')
+def _case_durations(log, executor):
+    # Only the case boundaries are needed, not the partitioned per-case pass;
+    # shared with the derived case_duration column
+    return log.derived('case_duration')
+
+
+@intermediates.node('transitions')
+def _transitions(log, executor):
+    return log.transitions()
+
+
+@intermediates.node('transition_pairs', deps=['transitions'])
+def _transition_pairs(log, executor, transitions):
+    # Distinct (source, target) pair codes, where each first occurs, and the pair of every transition
+    _, source, target, _ = transitions
+    pair_codes = source.astype(np.int64) * len(log.activities) + target
+    pairs, first_seen, pair_index = np.unique(pair_codes, return_index=True, return_inverse=True)
+    return pairs, first_seen, pair_index
+
+
+def requires(*names):
+    """
+    Declare the intermediates an analyzer method reads, so ``run_analyses`` can prepare them first.
+    """
+    def decorator(method):
+        method.requires = names
+        return method
+    return decorator
+
+
+def run_analyses(event_log, analyses, executor=None, max_workers=DEFAULT_THREADS):
+    """
+    Run analyzer methods on one log concurrently, computing their shared intermediates once.
+
+    ``analyses`` maps result names to bound methods taking the log. The
+    intermediates the methods declare with ``requires`` are computed first,
+    each once and independent ones in parallel; the methods then run in
+    parallel and read the memoized intermediates. Returns a dict of results.
+    """
+    log = as_columnar_log(event_log)
+    graph = AnalysisGraph()
+    graph.nodes.update(intermediates.nodes)
+    for name, method in analyses.items():
+        deps = getattr(method, 'requires', ())
+        graph.add(f'analysis.{name}', lambda log, executor, method=method, **_: method(log), deps, memo=False)
+    results = graph.compute(log, [f'analysis.{name}' for name in analyses],
+                            executor=executor, max_workers=max_workers)
+    return {name: results[f'analysis.{name}'] for name in analyses}
@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+from process_mining.dfg import update_dfg
+from process_mining.parallel import case_metrics
+from utils.columnar_log import (
+    ACTIVITY_KEY, CASE_KEY, DERIVED_COLUMNS, RESOURCE_KEY, TIMESTAMP_KEY, ColumnarEventLog
+)
+from utils.compaction import compact_log
+from utils.profiling import profiler
+
+
+def _merge_dictionary(dictionary, values):
+    """
+    Sorted union of a dictionary and new values, as ``pd.factorize(sort=True)`` orders it.
+
+    Returns the union, the new code of every old code (with -1 appended, so
+    ``old_map[codes]`` keeps missing codes missing) and the codes of ``values``.
+    """
+    combined = np.concatenate([np.asarray(dictionary, dtype=object), np.asarray(values, dtype=object)])
+    codes, union = pd.factorize(combined, sort=True)
+    old_map = np.append(codes[:len(dictionary)], -1)
+    return np.asarray(union, dtype=object), old_map, codes[len(dictionary):]
+
+
+class LogDelta:
+    """
+    What appending a batch changed, relating the old log to the new one.
+
+    ``case_map``, ``activity_map`` and ``resource_map`` give the new code of
+    every old code (index -1 maps missing to missing). ``touched`` are the
+    new codes of the cases that received events, ``touched_old`` the old
+    codes of those among them that already existed. ``old_touched`` and
+    ``new_touched`` are the touched cases before and after the append as
+    logs of their own (see ``ColumnarEventLog.select_cases``), in old and new codes.
+    """
+
+    def __init__(self, old_log, new_log, case_map, activity_map, resource_map, touched):
+        self.old_log = old_log
+        self.new_log = new_log
+        self.case_map = case_map
+        self.activity_map = activity_map
+        self.resource_map = resource_map
+        self.touched = touched
+        is_touched = np.zeros(new_log.n_cases, dtype=bool)
+        is_touched[touched] = True
+        self.touched_old = np.flatnonzero(is_touched[case_map])
+        self.old_touched = old_log.select_cases(self.touched_old)
+        self.new_touched = new_log.select_cases(touched)
+
+    def carry_cases(self, old_values, touched_values):
+        """
+        Per-case array of the new log: old values moved to the new case codes, touched cases replaced.
+        """
+        values = np.empty(self.new_log.n_cases, dtype=np.result_type(old_values, touched_values))
+        values[self.case_map] = old_values
+        values[self.touched] = touched_values
+        return values
+
+
+def _batch_codes(log, batch):
+    """
+    Validate a batch and encode its cases, activities, resources and timestamps.
+    """
+    for col in (CASE_KEY, ACTIVITY_KEY, TIMESTAMP_KEY):
+        if col not in batch.columns:
+            raise ValueError(f"Missing required column: {col}")
+    # Events without a case cannot be placed in any trace
+    batch = batch[batch[CASE_KEY].notna()]
+
+    timestamps = pd.DatetimeIndex(pd.to_datetime(batch[TIMESTAMP_KEY]))
+    if (timestamps.tz is None) != (log.timezone is None):
+        raise ValueError("Batch timestamps must be timezone-aware exactly when the log's are")
+    return batch, timestamps.as_unit('ns').asi8
+
+
+def _is_compacted(attributes):
+    return any(isinstance(dtype, pd.CategoricalDtype) for dtype in attributes.dtypes)
+
+
+def _carry_forward(log, new_log, delta):
+    """
+    Update the derived structures already built on ``log`` for ``new_log``, touched cases only.
+    """
+    memo = log._memo
+    # The graph node shares the derived case_duration column
+    durations = memo.get('derived.case_duration', memo.get('graph.case_durations'))
+    if durations is not None:
+        durations = delta.carry_cases(durations, delta.new_touched.case_durations_hours())
+        new_log._memo['derived.case_duration'] = new_log._memo['graph.case_durations'] = durations
+    if 'graph.case_metrics' in memo:
+        touched_metrics = case_metrics(delta.new_touched)
+        new_log._memo['graph.case_metrics'] = {
+            name: delta.carry_cases(values, touched_metrics[name])
+            for name, values in memo['graph.case_metrics'].items()
+        }
+    if 'variant_index' in memo:
+        new_log._memo['variant_index'] = memo['variant_index'].appended(new_log, delta)
+    if 'dfg' in memo:
+        new_log._memo['dfg'] = update_dfg(memo['dfg'], delta)
+
+
+def append_events(log, batch):
+    """
+    Append a batch of events to a columnar log, recomputing only the cases it touches.
+
+    ``batch`` is a DataFrame with PM4Py column names, parsed like the log's
+    own input. The result equals a log rebuilt from the old events followed
+    by the batch: dictionaries stay sorted, events stay sorted by (case,
+    timestamp) with old events first among simultaneous ones, and columns
+    missing on either side are filled with NaN. Only the events of touched
+    cases are re-sorted; the other cases are moved as blocks.
+
+    The case durations, per-case metrics, variant index and DFG already
+    built on ``log`` are updated for the touched cases and edges rather than
+    recomputed, so analyses of the new log start from them; the other
+    derived columns are computed on first read as for any log. Returns the new log and the
+    ``LogDelta``.
+    """
+    batch, batch_timestamps = _batch_codes(log, batch)
+
+    with profiler.stage('append encode', category='ingest', rows=len(batch)):
+        cases, case_map, batch_cases = _merge_dictionary(log.cases, batch[CASE_KEY].astype(str))
+        activities, activity_map, batch_activities = _merge_dictionary(
+            log.activities, batch[ACTIVITY_KEY]
+        )
+        if RESOURCE_KEY in batch.columns:
+            resources, resource_map, batch_resources = _merge_dictionary(
+                log.resources, batch[RESOURCE_KEY]
+            )
+        else:
+            resources, resource_map, _ = _merge_dictionary(log.resources, [])
+            batch_resources = np.full(len(batch), -1)
+        case_map = case_map[:-1]
+
+    with profiler.stage('append merge', category='ingest', rows=len(batch)):
+        n_old = log.n_events
+        sizes = np.zeros(len(cases), dtype=np.int64)
+        sizes[case_map] = log.case_lengths
+        sizes += np.bincount(batch_cases, minlength=len(cases))
+        touched = np.unique(batch_cases)
+        is_touched = np.zeros(len(cases), dtype=bool)
+        is_touched[touched] = True
+
+        # Events of touched cases: old ones first, then the batch in input order,
+        # stably sorted by (case, timestamp) as a full rebuild would
+        touched_old = np.flatnonzero(is_touched[case_map])
+        old_events = log.case_events(touched_old)
+        sources = np.concatenate([old_events, n_old + np.arange(len(batch))])
+        source_cases = np.concatenate([case_map[log.case_codes[old_events]], batch_cases])
+        source_times = np.concatenate([log.timestamps[old_events], batch_timestamps])
+        merged = sources[np.lexsort((source_times, source_cases))]
+
+        # Untouched cases keep their events and their relative order
+        case_codes = np.repeat(np.arange(len(cases)), sizes)
+        order = np.empty(n_old + len(batch), dtype=np.int64)
+        order[is_touched[case_codes]] = merged
+        order[~is_touched[case_codes]] = log.case_events(np.flatnonzero(~is_touched[case_map]))
+
+        activity_codes = np.concatenate([activity_map[log.activity_codes], batch_activities])[order]
+        resource_codes = np.concatenate([resource_map[log.resource_codes], batch_resources])[order]
+        timestamps = np.concatenate([log.timestamps, batch_timestamps])[order]
+        extra_cols = [col for col in batch.columns
+                      if col not in (CASE_KEY, ACTIVITY_KEY, TIMESTAMP_KEY, RESOURCE_KEY)]
+        # Derived columns stored by older versions are recomputed lazily instead
+        stored = log.event_attributes().drop(columns=list(DERIVED_COLUMNS), errors='ignore')
+        attributes = pd.concat(
+            [stored, batch[extra_cols].reset_index(drop=True)], ignore_index=True
+        ).iloc[order].reset_index(drop=True)
+
+    new_log = ColumnarEventLog(
+        case_codes, activity_codes, resource_codes, timestamps,
+        cases, activities, resources, attributes=attributes, timezone=log.timezone
+    )
+    delta = LogDelta(log, new_log, case_map, activity_map, resource_map, touched)
+
+    with profiler.stage('append derived state', category='ingest', rows=delta.new_touched.n_events):
+        # Compacted dtypes and case-level placement may not hold for the new events
+        if len(log.case_attributes.columns) or _is_compacted(log.attributes):
+            new_log = compact_log(new_log, case_level=bool(len(log.case_attributes.columns)))
+            delta.new_log = new_log
+        _carry_forward(log, new_log, delta)
+    return new_log, delta
@@ -0,0 +1,300 @@
+import importlib
+import itertools
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, deque
+from multiprocessing.connection import wait
+
+from utils.cache import AnalysisCache
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED, TIMED_OUT = (
+    'queued', 'running', 'done', 'failed', 'cancelled', 'timed out'
+)
+FINISHED_STATES = (DONE, FAILED, CANCELLED, TIMED_OUT)
+# Finished jobs remembered for status display; older ones are forgotten
+MAX_FINISHED_JOBS = 100
+# Seconds between checks for timeouts while no worker reports anything
+POLL_INTERVAL = 0.1
+
+# Analyzer classes a job can call, by the class name used in task names
+ANALYZERS = {
+    'ProcessDiscovery': 'process_mining.discovery',
+    'PerformanceAnalyzer': 'process_mining.performance',
+    'ProcessStatistics': 'process_mining.statistics',
+}
+
+# Connection to the scheduler while running inside a job process
+_progress_conn = None
+
+
+def report_progress(fraction, message=''):
+    """
+    Report the progress of the current job (0 to 1); does nothing outside a job process.
+    """
+    if _progress_conn is not None:
+        _progress_conn.send(('progress', float(fraction), message))
+
+
+def resolve_task(name):
+    """
+    Bound analyzer method for a task name such as 'ProcessDiscovery.discover_bpmn_model'.
+    """
+    class_name, method_name = name.split('.')
+    if class_name not in ANALYZERS:
+        raise ValueError(f"Unknown analyzer: {class_name}")
+    analyzer = getattr(importlib.import_module(ANALYZERS[class_name]), class_name)()
+    return getattr(analyzer, method_name)
+
+
+def _run_job(conn, log, name, kwargs):
+    """
+    Job process entry point: run one task and send its result or error back.
+    """
+    global _progress_conn
+    _progress_conn = conn
+    try:
+        report_progress(0, 'started')
+        result = resolve_task(name)(log, **kwargs)
+        conn.send(('result', result))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class Job:
+    """
+    State of one submitted task; updated by the scheduler thread.
+    """
+
+    def __init__(self, job_id, key, name, kwargs, timeout):
+        self.id = job_id
+        self.key = key
+        self.name = name
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ''
+        self.error = None
+        self.result = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._log = None
+        self._process = None
+        self._conn = None
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.name}, {self.status}, {self.progress:.0%})"
+
+
+class JobScheduler:
+    """
+    Run analyzer methods in background processes, at most ``workers`` at a time.
+
+    Every job runs in its own spawned process, so it can be cancelled or
+    stopped at its ``timeout`` (seconds) by terminating the process. Results
+    are stored in ``cache`` under the key ``cached_analysis`` uses for the
+    same log, method and keyword arguments, so a later direct call is a
+    cache hit. Submitting a task that is already queued, running or done
+    returns the existing job instead of starting another one.
+    """
+
+    def __init__(self, cache=None, workers=2, timeout=None):
+        self.cache = cache if cache is not None else AnalysisCache()
+        self.workers = max(workers, 1)
+        self.timeout = timeout
+        self._jobs = OrderedDict()
+        self._by_key = {}
+        self._queue = deque()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._context = multiprocessing.get_context('spawn')
+
+    def job_key(self, log, name, kwargs):
+        return self.cache.make_key(log, name, {'args': (), 'kwargs': kwargs})
+
+    def find(self, log, name, **kwargs):
+        """
+        The latest job for this log, task and arguments, or None.
+        """
+        with self._lock:
+            return self._by_key.get(self.job_key(log, name, kwargs))
+
+    def submit(self, log, name, timeout=None, retry=False, **kwargs):
+        """
+        Submit ``name`` ('Class.method') on ``log`` with ``kwargs``, merging with an existing job.
+
+        A job that failed, timed out or was cancelled is returned as is
+        unless ``retry`` is set; results already in the cache complete the
+        job immediately.
+        """
+        key = self.job_key(log, name, kwargs)
+        with self._lock:
+            job = self._by_key.get(key)
+            if job is not None and (job.status in (QUEUED, RUNNING, DONE) or not retry):
+                return job
+            job = Job(next(self._ids), key, name, kwargs, timeout if timeout is not None else self.timeout)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+
+        cached = self.cache.get_key(key)
+        with self._lock:
+            if cached is not None:
+                job.result, job.status, job.progress = cached, DONE, 1.0
+                job.started = job.finished = time.time()
+            else:
+                job._log = log
+                self._queue.append(job)
+            self._forget_finished()
+        self._ensure_thread()
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job; returns whether it was still unfinished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            if job.status == QUEUED:
+                self._queue.remove(job)
+                job._log = None
+            self._finish(job, CANCELLED)
+        return True
+
+    def shutdown(self):
+        with self._lock:
+            for job in list(self._queue) + [j for j in self._jobs.values() if j.status == RUNNING]:
+                self._finish(job, CANCELLED)
+            self._queue.clear()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._monitor, name='job-scheduler', daemon=True)
+                self._thread.start()
+
+    def _finish(self, job, status, error=None):
+        """
+        Move a job to a finished state, stopping its process (caller holds the lock).
+        """
+        if job._process is not None and job._process.is_alive():
+            job._process.terminate()
+        if job._conn is not None:
+            job._conn.close()
+        if job._process is not None:
+            job._process.join(timeout=1)
+        job._process = job._conn = None
+        job.status = status
+        job.error = error
+        job.finished = time.time()
+
+    def _forget_finished(self):
+        finished = [job for job in self._jobs.values() if job.done]
+        for job in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+
+    def _start(self, job):
+        """
+        Spawn the process of a job already marked running; the log is pickled to it here.
+        """
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_run_job, args=(sender, job._log, job.name, job.kwargs),
+            name=f'job-{job.id}', daemon=True
+        )
+        process.start()
+        sender.close()
+        with self._lock:
+            job._log = None
+            if job.status != RUNNING:
+                # Cancelled while its process was starting
+                process.terminate()
+                process.join(timeout=1)
+                receiver.close()
+                return
+            job._process, job._conn = process, receiver
+
+    def _receive(self, job):
+        """
+        Handle the messages of a running job (caller holds the lock).
+        """
+        try:
+            while job._conn.poll():
+                kind, *payload = job._conn.recv()
+                if kind == 'progress':
+                    job.progress, job.message = payload
+                elif kind == 'result':
+                    job.result = payload[0]
+                    job.progress = 1.0
+                    self.cache.put_key(job.key, job.result)
+                    self._finish(job, DONE)
+                    return
+                else:
+                    self._finish(job, FAILED, payload[0])
+                    return
+        except (EOFError, OSError):
+            exitcode = job._process.exitcode if job._process is not None else None
+            self._finish(job, FAILED, f"Job process exited unexpectedly (exit code {exitcode})")
+
+    def _monitor(self):
+        while True:
+            self._wakeup.clear()
+            with self._lock:
+                running = [job for job in self._jobs.values() if job.status == RUNNING]
+                starting = []
+                while self._queue and len(running) + len(starting) < self.workers:
+                    job = self._queue.popleft()
+                    job.status, job.started = RUNNING, time.time()
+                    starting.append(job)
+            # Spawning pickles the log, so it happens without holding the lock
+            for job in starting:
+                self._start(job)
+
+            with self._lock:
+                now = time.time()
+                for job in running + starting:
+                    if job.status == RUNNING and job.timeout is not None and now - job.started > job.timeout:
+                        self._finish(job, TIMED_OUT, f"Stopped after {job.timeout:g}s")
+                connections = {job._conn: job for job in running + starting
+                               if job.status == RUNNING and job._conn is not None}
+            if not connections:
+                self._wakeup.wait()
+                continue
+            try:
+                ready = wait(list(connections), timeout=POLL_INTERVAL)
+            except (OSError, ValueError):
+                # A connection was closed by a cancellation while waiting
+                continue
+            with self._lock:
+                for conn in ready:
+                    job = connections[conn]
+                    if job.status == RUNNING:
+                        self._receive(job)
@@ -0,0 +1,218 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from utils.columnar_log import ColumnarEventLog
+
+# Below this many events the pool costs more than it saves
+MIN_PARALLEL_EVENTS = 200_000
+# More partitions than workers evens out cases of very different sizes
+PARTITIONS_PER_WORKER = 2
+SHARED_ARRAYS = ['case_codes', 'activity_codes', 'resource_codes', 'timestamps']
+
+
+def partition_bounds(log, n_partitions):
+    """
+    Split the cases into at most ``n_partitions`` contiguous ranges of similar event count.
+
+    Returns the case boundaries; partition ``i`` holds cases
+    ``bounds[i]:bounds[i + 1]``.
+    """
+    targets = np.linspace(0, log.n_events, n_partitions + 1)
+    bounds = np.searchsorted(log.case_offsets, targets, side='left')
+    bounds[0], bounds[-1] = 0, log.n_cases
+    return np.unique(bounds)
+
+
+def _run_partition(specs, dictionaries, case_start, case_end, kernel, kwargs):
+    """
+    Worker entry point: map the shared arrays and run ``kernel`` on one case range.
+    """
+    blocks = {name: shared_memory.SharedMemory(name=spec[0]) for name, spec in specs.items()}
+    try:
+        arrays = {
+            name: np.ndarray(shape, dtype=dtype, buffer=blocks[name].buf)
+            for name, (_, dtype, shape) in specs.items()
+        }
+        event_start = int(arrays['case_offsets'][case_start])
+        event_end = int(arrays['case_offsets'][case_end])
+        events = slice(event_start, event_end)
+        columns = {name: values[events] for name, values in arrays.items()
+                   if name not in SHARED_ARRAYS and name != 'case_offsets'}
+
+        part = ColumnarEventLog(
+            arrays['case_codes'][events] - case_start, arrays['activity_codes'][events],
+            arrays['resource_codes'][events], arrays['timestamps'][events],
+            np.arange(case_start, case_end), dictionaries['activities'], dictionaries['resources'],
+            attributes=pd.DataFrame(columns, index=pd.RangeIndex(event_end - event_start), copy=False)
+        )
+        result = kernel(part, **kwargs)
+        # Views into the blocks must be gone before the blocks can be closed
+        del part, columns, arrays
+        return result
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+class PartitionedExecutor:
+    """
+    Run per-case kernels on case partitions of a columnar log in a process pool.
+
+    The code, timestamp and requested numeric attribute arrays are copied once
+    per call into shared memory, and every worker maps them and runs the kernel
+    on a contiguous range of cases, so no case crosses a partition. A kernel
+    takes a ColumnarEventLog holding only its cases (case codes rebased to 0)
+    and returns a partial result; callers merge the partials in case order.
+    Logs smaller than ``min_events`` are processed in-process.
+    """
+
+    def __init__(self, workers=None, min_events=MIN_PARALLEL_EVENTS):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_events = min_events
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Forking a threaded server process is unsafe, so workers are spawned
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def map_cases(self, log, kernel, columns=(), **kwargs):
+        """
+        Run ``kernel(partition, **kwargs)`` on every case partition of ``log``.
+
+        ``columns`` names numeric attribute columns the kernel reads. Returns a
+        list of (first event index, partial result) in case order.
+        """
+        if self.workers <= 1 or log.n_events < self.min_events:
+            return [(0, kernel(log, **kwargs))]
+
+        arrays = {name: getattr(log, name) for name in SHARED_ARRAYS}
+        arrays['case_offsets'] = log.case_offsets
+        for col in columns:
+            arrays[col] = log.column(col).to_numpy(dtype=np.float64, na_value=np.nan)
+        dictionaries = {'activities': log.activities, 'resources': log.resources}
+
+        blocks = []
+        try:
+            specs = {}
+            for name, values in arrays.items():
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                blocks.append(block)
+                np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+                specs[name] = (block.name, values.dtype.str, values.shape)
+
+            bounds = partition_bounds(log, self.workers * PARTITIONS_PER_WORKER)
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_run_partition, specs, dictionaries, int(start), int(end), kernel, kwargs)
+                for start, end in zip(bounds[:-1], bounds[1:])
+            ]
+            return [(int(log.case_offsets[start]), future.result())
+                    for start, future in zip(bounds[:-1], futures)]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+def map_cases(executor, log, kernel, columns=(), **kwargs):
+    """
+    Run a per-case kernel through ``executor``, or in-process when it is None.
+    """
+    if executor is None:
+        return [(0, kernel(log, **kwargs))]
+    return executor.map_cases(log, kernel, columns=columns, **kwargs)
+
+
+def case_metrics(log, sum_columns=(), mean_columns=()):
+    """
+    Per-case start, end, event count, distinct activities and resources, and column sums/means.
+
+    Missing activities or resources count as one distinct value, as
+    ``Series.unique`` does. Sums skip NaN; means of all-NaN cases are NaN.
+    """
+    n_cases = log.n_cases
+    case_codes = log.case_codes.astype(np.int64)
+
+    def count_distinct(codes):
+        codes = codes.astype(np.int64) + 1
+        space = int(codes.max()) + 1 if len(codes) else 1
+        pairs = np.unique(case_codes * space + codes)
+        return np.bincount(pairs // space, minlength=n_cases)
+
+    metrics = {
+        'start': log.case_start,
+        'end': log.case_end,
+        'num_events': log.case_lengths,
+        'unique_activities': count_distinct(log.activity_codes),
+        'unique_resources': count_distinct(log.resource_codes),
+    }
+    for col in set(sum_columns) | set(mean_columns):
+        values = log.column(col).to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(values)
+        sums = np.bincount(case_codes[valid], weights=values[valid], minlength=n_cases)
+        if col in sum_columns:
+            metrics[f'{col}_sum'] = sums
+        if col in mean_columns:
+            counts = np.bincount(case_codes[valid], minlength=n_cases)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                metrics[f'{col}_mean'] = np.where(counts > 0, sums / counts, np.nan)
+    return metrics
+
+
+def concat_metrics(partials):
+    """
+    Merge per-case kernel results from consecutive partitions.
+    """
+    results = [result for _, result in partials]
+    return {key: np.concatenate([result[key] for result in results]) for key in results[0]}
+
+
+def transition_totals(log):
+    """
+    Count and total waiting hours per directly-follows pair, with the first event of each pair.
+
+    Returns (pair codes, counts, hour sums, first source event index) over
+    the pairs present in this log; pair code is ``source * n_activities + target``.
+    """
+    index, source, target, wait = log.transitions()
+    pair_codes = source.astype(np.int64) * len(log.activities) + target
+    pairs, first_seen, pair_index = np.unique(pair_codes, return_index=True, return_inverse=True)
+    counts = np.bincount(pair_index, minlength=len(pairs))
+    sums = np.bincount(pair_index, weights=wait, minlength=len(pairs))
+    return pairs, counts, sums, index[first_seen]
+
+
+def merge_transition_totals(partials):
+    """
+    Combine partition transition totals into global ones, first event index made global.
+    """
+    if len(partials) == 1:
+        return partials[0][1]
+    pairs = np.concatenate([result[0] for _, result in partials])
+    counts = np.concatenate([result[1] for _, result in partials])
+    sums = np.concatenate([result[2] for _, result in partials])
+    first = np.concatenate([result[3] + event_start for event_start, result in partials])
+
+    merged, inverse = np.unique(pairs, return_inverse=True)
+    merged_first = np.full(len(merged), np.iinfo(np.int64).max)
+    np.minimum.at(merged_first, inverse, first)
+    return (merged, np.bincount(inverse, weights=counts, minlength=len(merged)).astype(np.int64),
+            np.bincount(inverse, weights=sums, minlength=len(merged)), merged_first)
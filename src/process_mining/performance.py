@@ -1,70 +1,103 @@
-import pm4py
+import numpy as np
+import pandas as pd
+
+from utils.columnar_log import as_columnar_log, grouped_quantiles
+from utils.cache import cached_analysis
+from utils.profiling import profiled
+from process_mining.graph import intermediates, requires
+from process_mining.parallel import map_cases, transition_totals, merge_transition_totals
 
 class PerformanceAnalyzer:
-    def __init__(self):
-        pass
+    def __init__(self, cache=None, executor=None):
+        self.cache = cache
+        self.executor = executor
 
+    @requires('case_durations')
+    @profiled('PerformanceAnalyzer.calculate_cycle_time')
+    @cached_analysis('PerformanceAnalyzer.calculate_cycle_time')
     def calculate_cycle_time(self, event_log):
         """
         Calculate the cycle time for each case in the event log.
         """
-        # Convert to dataframe for easier manipulation
-        df = pm4py.convert_to_dataframe(event_log)
-        
-        # Calculate cycle time for each case
-        cycle_times = []
-        for case_id in df['case:concept:name'].unique():
-            case_data = df[df['case:concept:name'] == case_id]
-            start_time = case_data['time:timestamp'].min()
-            end_time = case_data['time:timestamp'].max()
-            duration = (end_time - start_time).total_seconds() / 3600  # Convert to hours
-            cycle_times.append((case_id, duration))
-        
-        return cycle_times
+        log = as_columnar_log(event_log)
+
+        # Case boundaries are the first and last event of each sorted case
+        durations = intermediates.get(log, 'case_durations', self.executor)  # Hours
+        return list(zip(log.cases.tolist(), durations.tolist()))
 
+    @profiled('PerformanceAnalyzer.calculate_waiting_time')
+    @cached_analysis('PerformanceAnalyzer.calculate_waiting_time')
     def calculate_waiting_time(self, event_log):
         """
         Calculate the waiting time between activities.
         """
-        # Convert to dataframe for easier manipulation
-        df = pm4py.convert_to_dataframe(event_log)
-        df = df.sort_values(['case:concept:name', 'time:timestamp'])
-        
-        # Calculate waiting times between activities
-        waiting_times = {}
-        for case_id in df['case:concept:name'].unique():
-            case_data = df[df['case:concept:name'] == case_id].reset_index()
-            for i in range(len(case_data)-1):
-                activity = case_data.loc[i, 'concept:name']
-                next_activity = case_data.loc[i+1, 'concept:name']
-                wait_time = (case_data.loc[i+1, 'time:timestamp'] - 
-                           case_data.loc[i, 'time:timestamp']).total_seconds() / 3600
-                
-                key = f"{activity} → {next_activity}"
-                if key not in waiting_times:
-                    waiting_times[key] = []
-                waiting_times[key].append(wait_time)
-        
-        # Calculate average waiting times
-        avg_waiting_times = {k: sum(v)/len(v) for k, v in waiting_times.items()}
-        return avg_waiting_times
+        log = as_columnar_log(event_log)
+        pairs, counts, sums, first_seen = merge_transition_totals(
+            map_cases(self.executor, log, transition_totals)
+        )
+
+        # Average waiting times keyed like "A → B", in order of first occurrence
+        n_activities = len(log.activities)
+        return {
+            f"{log.activities[pairs[i] // n_activities]} → {log.activities[pairs[i] % n_activities]}":
+                sums[i] / counts[i]
+            for i in np.argsort(first_seen, kind='stable')
+        }
+
+    @requires('transition_pairs')
+    @profiled('PerformanceAnalyzer.calculate_waiting_time_statistics')
+    @cached_analysis('PerformanceAnalyzer.calculate_waiting_time_statistics')
+    def calculate_waiting_time_statistics(self, event_log):
+        """
+        Calculate count, mean, median, p90 and p99 waiting time (hours) per transition.
+
+        Rows are ordered by the first occurrence of each transition in the log.
+        """
+        log = as_columnar_log(event_log)
+        _, _, _, wait = intermediates.get(log, 'transitions')
+        pairs, first_seen, pair_index = intermediates.get(log, 'transition_pairs')
+        n_pairs = len(pairs)
+
+        counts = np.bincount(pair_index, minlength=n_pairs)
+        sums = np.bincount(pair_index, weights=wait, minlength=n_pairs)
+        quantiles = grouped_quantiles(wait, pair_index, n_pairs, [0.5, 0.9, 0.99])
+
+        order = np.argsort(first_seen, kind='stable')
+        stats = pd.DataFrame({
+            'source': log.activities[pairs // len(log.activities)],
+            'target': log.activities[pairs % len(log.activities)],
+            'count': counts,
+            'mean': sums / np.maximum(counts, 1),
+            'median': quantiles[:, 0],
+            'p90': quantiles[:, 1],
+            'p99': quantiles[:, 2]
+        })
+        return stats.iloc[order].reset_index(drop=True)
 
+    @profiled('PerformanceAnalyzer.calculate_sojourn_time')
+    @cached_analysis('PerformanceAnalyzer.calculate_sojourn_time')
     def calculate_sojourn_time(self, event_log):
         """
         Calculate the time spent in each activity.
         """
-        # Convert to dataframe
-        df = pm4py.convert_to_dataframe(event_log)
-        
-        # Group by activity and calculate statistics
+        log = as_columnar_log(event_log)
+        valid = log.activity_codes >= 0
+        timestamps = pd.Series(log.to_datetime(log.timestamps[valid]))
+
+        # Group by activity code and calculate statistics in one pass
+        grouped = timestamps.groupby(log.activity_codes[valid]).agg(
+            ['count', 'mean', 'min', 'max']
+        )
+        first_seen = np.unique(log.activity_codes[valid], return_index=True)[1]
+        grouped = grouped.iloc[np.argsort(first_seen, kind='stable')]
+
         activity_times = {}
-        for activity in df['concept:name'].unique():
-            activity_data = df[df['concept:name'] == activity]
-            activity_times[activity] = {
-                'count': len(activity_data),
-                'avg_timestamp': activity_data['time:timestamp'].mean(),
-                'min_timestamp': activity_data['time:timestamp'].min(),
-                'max_timestamp': activity_data['time:timestamp'].max()
+        for code, row in zip(grouped.index, grouped.itertuples(index=False)):
+            activity_times[log.activities[code]] = {
+                'count': row.count,
+                'avg_timestamp': row.mean,
+                'min_timestamp': row.min,
+                'max_timestamp': row.max
             }
-            
+
         return activity_times
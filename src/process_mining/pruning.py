@@ -0,0 +1,76 @@
+import hashlib
+import math
+
+import numpy as np
+
+PRUNING_METHODS = ['coverage', 'percentile']
+
+
+def select_frequent(counts, keep=1.0, method='coverage'):
+    """
+    Keys of ``counts`` to keep, most frequent first.
+
+    ``coverage`` keeps the fewest keys whose counts sum to at least ``keep``
+    of the total; ``percentile`` keeps the ``keep`` share of keys with the
+    highest counts. At least one key is kept from a non-empty dict.
+    """
+    if method not in PRUNING_METHODS:
+        raise ValueError(f"Unknown pruning method: {method}")
+    keys = list(counts)
+    if not keys or keep >= 1:
+        return set(keys)
+    values = np.fromiter((counts[key] for key in keys), dtype=np.float64, count=len(keys))
+    order = np.argsort(-values, kind='stable')
+    if method == 'coverage':
+        cumulative = np.cumsum(values[order])
+        n_keep = int(np.searchsorted(cumulative, keep * cumulative[-1])) + 1
+    else:
+        n_keep = math.ceil(keep * len(keys))
+    n_keep = min(max(n_keep, 1), len(keys))
+    return {keys[i] for i in order[:n_keep]}
+
+
+def prune_dfg(dfg, start_activities, end_activities, activities_count=None,
+              activity_keep=1.0, edge_keep=1.0, method='coverage'):
+    """
+    Drop infrequent activities, then infrequent edges among the remaining ones.
+
+    Activities are ranked by ``activities_count`` (or their edge frequency
+    when not given) and edges by their frequency in ``dfg``; activities that
+    lose all their edges are dropped as well. Returns the
+    pruned (dfg, start activities, end activities, activity counts).
+    """
+    if activities_count is None:
+        activities_count = {}
+        for (source, target), count in dfg.items():
+            activities_count[source] = activities_count.get(source, 0) + count
+            activities_count[target] = activities_count.get(target, 0) + count
+    activities = select_frequent(activities_count, activity_keep, method)
+
+    candidate_edges = {edge: count for edge, count in dfg.items()
+                       if edge[0] in activities and edge[1] in activities}
+    edges = select_frequent(candidate_edges, edge_keep, method)
+    if edges:
+        # Activities left without any edge would have no node to draw
+        activities = {act for edge in edges for act in edge}
+    return (
+        {edge: count for edge, count in dfg.items() if edge in edges},
+        {act: count for act, count in start_activities.items() if act in activities},
+        {act: count for act, count in end_activities.items() if act in activities},
+        {act: count for act, count in activities_count.items() if act in activities}
+    )
+
+
+def model_hash(*parts):
+    """
+    Stable hash of model structures (dicts, lists, tuples of plain values) for render caching.
+    """
+    def canonical(value):
+        if isinstance(value, dict):
+            return sorted((repr(key), canonical(item)) for key, item in value.items())
+        if isinstance(value, (list, tuple, set, frozenset)):
+            items = [canonical(item) for item in value]
+            return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+        return repr(value)
+
+    return hashlib.sha256(repr([canonical(part) for part in parts]).encode()).hexdigest()
@@ -1,190 +1,278 @@
-import pm4py
 import pandas as pd
 import numpy as np
-from collections import defaultdict
+
+from utils.columnar_log import as_columnar_log, ns_to_hours
+from utils.cache import cached_analysis
+from utils.profiling import profiled
+from process_mining.graph import intermediates, requires
+
+BUSINESS_ATTRIBUTES = ['request_type', 'claim_category', 'customer_segment', 'claim_value', 'risk_level']
 
 class ProcessStatistics:
-    def __init__(self):
-        pass
+    def __init__(self, cache=None, executor=None):
+        self.cache = cache
+        self.executor = executor
+
+    @requires('case_metrics', 'case_durations')
+    @profiled('ProcessStatistics.compute_all')
+    @cached_analysis('ProcessStatistics.compute_all')
+    def compute_all(self, event_log):
+        """
+        Compute case, activity, resource and KPI tables in one vectorized pass.
+
+        Returns a dict with the DataFrames ``cases`` (indexed by case id),
+        ``activities``, ``resources`` (indexed by name), the long count table
+        ``activity_resources`` and the ``kpis`` dict.
+        """
+        log = as_columnar_log(event_log)
+        n_cases, n_activities = log.n_cases, len(log.activities)
+        n_resources = len(log.resources)
+        attribute_names = log.attribute_names
+
+        # Shift codes so missing values (-1) are counted as their own value
+        case_codes = log.case_codes.astype(np.int64)
+        activity_codes = log.activity_codes.astype(np.int64) + 1
+        resource_codes = log.resource_codes.astype(np.int64) + 1
+        activity_space, resource_space = n_activities + 1, n_resources + 1
+        timestamps = log.timestamps
+
+        def count_distinct(outer, outer_space, inner, inner_space):
+            pairs = np.unique(outer * inner_space + inner)
+            return np.bincount(pairs // inner_space, minlength=outer_space)
+
+        # Case table, computed per case partition
+        metrics = intermediates.get(log, 'case_metrics', self.executor)
+        durations = intermediates.get(log, 'case_durations', self.executor)
+        num_events = metrics['num_events']
+        cases = pd.DataFrame({
+            'start_time': log.to_datetime(metrics['start']),
+            'end_time': log.to_datetime(metrics['end']),
+            'duration_hours': durations,
+            'num_events': num_events,
+            'unique_activities': metrics['unique_activities'],
+            'unique_resources': metrics['unique_resources'],
+        }, index=pd.Index(log.cases, name='case'))
+        cases['avg_activity_duration'] = durations / num_events
+        cases['resource_handovers'] = cases['unique_resources'] - 1
+        for col in BUSINESS_ATTRIBUTES:
+            if col in attribute_names:
+                cases[col] = log.case_column(col).to_numpy()
+
+        # Activity table (missing activities are excluded, as in a groupby)
+        has_activity = activity_codes > 0
+        act = activity_codes[has_activity] - 1
+        act_cases = case_codes[has_activity]
+        act_times = timestamps[has_activity]
+
+        # Events are sorted by (case, time), so the first and last occurrence of
+        # an (activity, case) pair are its earliest and latest timestamps
+        pair_codes = act * n_cases + act_cases
+        pairs, first = np.unique(pair_codes, return_index=True)
+        last = len(pair_codes) - 1 - np.unique(pair_codes[::-1], return_index=True)[1]
+        pair_activity = pairs // n_cases
+        pair_span = ns_to_hours(act_times[last] - act_times[first])
+        pairs_per_activity = np.bincount(pair_activity, minlength=n_activities)
 
+        activity_times = pd.Series(act_times).groupby(act).agg(
+            total_occurrences='count', min_timestamp='min', max_timestamp='max'
+        ).reindex(range(n_activities))
+        activities = pd.DataFrame({
+            'total_occurrences': activity_times['total_occurrences'].to_numpy(),
+            'unique_cases': pairs_per_activity,
+            'unique_resources': count_distinct(
+                act, n_activities, resource_codes[has_activity], resource_space
+            ),
+            'min_timestamp': log.to_datetime(activity_times['min_timestamp'].to_numpy()),
+            'max_timestamp': log.to_datetime(activity_times['max_timestamp'].to_numpy()),
+            'avg_duration': np.bincount(pair_activity, weights=pair_span, minlength=n_activities)
+                            / np.maximum(pairs_per_activity, 1),
+        }, index=pd.Index(log.activities, name='activity'))
+        if 'costs' in attribute_names:
+            costs = log.column('costs').to_numpy()[has_activity]
+            cost_stats = pd.Series(costs).groupby(act).agg(
+                total_cost='sum', avg_cost='mean', min_cost='min', max_cost='max'
+            ).reindex(range(n_activities))
+            activities = activities.join(cost_stats.set_axis(activities.index))
+
+        # (activity, resource) event counts, the basis of both distributions
+        has_both = has_activity & (resource_codes > 0)
+        counts = np.bincount(
+            (activity_codes[has_both] - 1) * n_resources + (resource_codes[has_both] - 1),
+            minlength=n_activities * n_resources
+        )
+        nonzero = np.flatnonzero(counts)
+        activity_resources = pd.DataFrame({
+            'activity': log.activities[nonzero // n_resources],
+            'resource': log.resources[nonzero % n_resources],
+            'count': counts[nonzero]
+        })
+
+        # Resource table (missing resources are excluded, as in a groupby)
+        has_resource = resource_codes > 0
+        res = resource_codes[has_resource] - 1
+        resource_times = pd.Series(timestamps[has_resource]).groupby(res).agg(
+            total_activities='count', first_activity='min', last_activity='max'
+        ).reindex(range(n_resources))
+        first_activity = resource_times['first_activity'].to_numpy()
+        last_activity = resource_times['last_activity'].to_numpy()
+        resources = pd.DataFrame({
+            'total_activities': resource_times['total_activities'].to_numpy(),
+            'unique_cases': count_distinct(res, n_resources, case_codes[has_resource], n_cases),
+            'unique_activities': count_distinct(
+                res, n_resources, activity_codes[has_resource], activity_space
+            ),
+            'first_activity': log.to_datetime(first_activity),
+            'last_activity': log.to_datetime(last_activity),
+            'active_hours': ns_to_hours(last_activity - first_activity),
+        }, index=pd.Index(log.resources, name='resource'))
+        if 'costs' in attribute_names:
+            costs = log.column('costs').to_numpy()[has_resource]
+            cost_stats = pd.Series(costs).groupby(res).agg(
+                total_cost='sum', avg_cost_per_activity='mean'
+            ).reindex(range(n_resources))
+            resources = resources.join(cost_stats.set_axis(resources.index))
+
+        # KPIs
+        kpis = {
+            'time': {
+                'avg_case_duration': cases['duration_hours'].mean(),
+                'median_case_duration': cases['duration_hours'].median(),
+                'min_case_duration': cases['duration_hours'].min(),
+                'max_case_duration': cases['duration_hours'].max()
+            },
+            'process': {
+                'total_cases': n_cases,
+                'total_events': log.n_events,
+                'unique_activities': len(np.unique(activity_codes)),
+                'unique_resources': len(np.unique(resource_codes)),
+                'events_per_case': log.n_events / n_cases
+            }
+        }
+        if 'claim_value' in attribute_names and 'costs' in attribute_names:
+            kpis['business'] = {
+                'total_claim_value': cases['claim_value'].sum(),
+                'total_process_cost': log.column('costs').sum(),
+                'avg_claim_value': cases['claim_value'].mean(),
+                'avg_process_cost': log.column('costs').mean()
+            }
+
+        return {
+            'cases': cases,
+            'activities': activities,
+            'resources': resources,
+            'activity_resources': activity_resources,
+            'kpis': kpis
+        }
+
+    @profiled('ProcessStatistics.get_case_statistics')
+    @cached_analysis('ProcessStatistics.get_case_statistics')
     def get_case_statistics(self, event_log):
         """
         Get comprehensive statistics about cases in the event log.
         """
-        df = pm4py.convert_to_dataframe(event_log)
+        log = as_columnar_log(event_log)
+        table = self.compute_all(log)['cases']
+        activity_names = log.decode(log.activity_codes, log.activities)
+        sequences = np.split(activity_names, log.case_offsets[1:-1])
+        business_cols = [col for col in BUSINESS_ATTRIBUTES if col in table.columns]
+
         cases = {}
-        
-        # Group by case
-        for case_id, case_data in df.groupby('case:concept:name'):
-            # Temporal metrics
-            temporal = {
-                'start_time': case_data['time:timestamp'].min(),
-                'end_time': case_data['time:timestamp'].max(),
-                'duration_hours': (case_data['time:timestamp'].max() - 
-                                 case_data['time:timestamp'].min()).total_seconds() / 3600
-            }
-            
-            # Process metrics
-            process = {
-                'num_events': len(case_data),
-                'unique_activities': len(case_data['concept:name'].unique()),
-                'unique_resources': len(case_data['org:resource'].unique()),
-                'activities': case_data['concept:name'].tolist()
-            }
-            
-            # Performance metrics
-            performance = {
-                'avg_activity_duration': temporal['duration_hours'] / process['num_events'],
-                'resource_handovers': len(case_data['org:resource'].unique()) - 1
-            }
-            
-            # Business metrics
-            business = {}
-            if 'request_type' in case_data.columns:
-                business['request_type'] = case_data['request_type'].iloc[0]
-            if 'claim_category' in case_data.columns:
-                business['claim_category'] = case_data['claim_category'].iloc[0]
-            if 'customer_segment' in case_data.columns:
-                business['customer_segment'] = case_data['customer_segment'].iloc[0]
-            if 'claim_value' in case_data.columns:
-                business['claim_value'] = case_data['claim_value'].iloc[0]
-            if 'risk_level' in case_data.columns:
-                business['risk_level'] = case_data['risk_level'].iloc[0]
-            
-            # Combine all metrics
+        for case_id, row, sequence in zip(table.index, table.to_dict('records'), sequences):
             cases[case_id] = {
-                'temporal': temporal,
-                'process': process,
-                'performance': performance,
-                'business': business
+                'temporal': {
+                    'start_time': row['start_time'],
+                    'end_time': row['end_time'],
+                    'duration_hours': row['duration_hours']
+                },
+                'process': {
+                    'num_events': row['num_events'],
+                    'unique_activities': row['unique_activities'],
+                    'unique_resources': row['unique_resources'],
+                    'activities': sequence.tolist()
+                },
+                'performance': {
+                    'avg_activity_duration': row['avg_activity_duration'],
+                    'resource_handovers': row['resource_handovers']
+                },
+                'business': {col: row[col] for col in business_cols}
             }
-        
+
         return cases
 
+    @profiled('ProcessStatistics.get_activity_statistics')
+    @cached_analysis('ProcessStatistics.get_activity_statistics')
     def get_activity_statistics(self, event_log):
         """
         Get detailed statistics about activities in the event log.
         """
-        df = pm4py.convert_to_dataframe(event_log)
+        tables = self.compute_all(event_log)
+        distribution = tables['activity_resources'].sort_values('count', ascending=False, kind='stable')
+        resource_dist = {
+            activity: dict(zip(group['resource'], group['count']))
+            for activity, group in distribution.groupby('activity', sort=False)
+        }
+
         activities = {}
-        
-        # Group by activity
-        for activity, activity_data in df.groupby('concept:name'):
-            # Frequency metrics
-            frequency = {
-                'total_occurrences': len(activity_data),
-                'unique_cases': len(activity_data['case:concept:name'].unique()),
-                'unique_resources': len(activity_data['org:resource'].unique())
-            }
-            
-            # Time metrics
-            time_metrics = {
-                'min_timestamp': activity_data['time:timestamp'].min(),
-                'max_timestamp': activity_data['time:timestamp'].max(),
-                'avg_duration': activity_data.groupby('case:concept:name')['time:timestamp'].agg(lambda x: (x.max() - x.min()).total_seconds() / 3600).mean()
-            }
-            
-            # Resource distribution
-            resource_dist = activity_data['org:resource'].value_counts().to_dict()
-            
-            # Performance metrics
-            if 'costs' in activity_data.columns:
-                performance = {
-                    'total_cost': activity_data['costs'].sum(),
-                    'avg_cost': activity_data['costs'].mean(),
-                    'min_cost': activity_data['costs'].min(),
-                    'max_cost': activity_data['costs'].max()
-                }
-            else:
-                performance = {}
-            
+        for activity, row in tables['activities'].iterrows():
             activities[activity] = {
-                'frequency': frequency,
-                'time': time_metrics,
-                'resources': resource_dist,
-                'performance': performance
+                'frequency': {
+                    'total_occurrences': row['total_occurrences'],
+                    'unique_cases': row['unique_cases'],
+                    'unique_resources': row['unique_resources']
+                },
+                'time': {
+                    'min_timestamp': row['min_timestamp'],
+                    'max_timestamp': row['max_timestamp'],
+                    'avg_duration': row['avg_duration']
+                },
+                'resources': resource_dist.get(activity, {}),
+                'performance': {
+                    key: row[key] for key in ('total_cost', 'avg_cost', 'min_cost', 'max_cost')
+                    if key in row.index
+                }
             }
-        
+
         return activities
 
+    @profiled('ProcessStatistics.get_resource_statistics')
+    @cached_analysis('ProcessStatistics.get_resource_statistics')
     def get_resource_statistics(self, event_log):
         """
         Get detailed statistics about resources in the event log.
         """
-        df = pm4py.convert_to_dataframe(event_log)
+        tables = self.compute_all(event_log)
+        distribution = tables['activity_resources'].sort_values('count', ascending=False, kind='stable')
+        activity_dist = {
+            resource: dict(zip(group['activity'], group['count']))
+            for resource, group in distribution.groupby('resource', sort=False)
+        }
+
         resources = {}
-        
-        # Group by resource
-        for resource, resource_data in df.groupby('org:resource'):
-            # Workload metrics
-            workload = {
-                'total_activities': len(resource_data),
-                'unique_cases': len(resource_data['case:concept:name'].unique()),
-                'unique_activities': len(resource_data['concept:name'].unique())
-            }
-            
-            # Time metrics
-            time_metrics = {
-                'first_activity': resource_data['time:timestamp'].min(),
-                'last_activity': resource_data['time:timestamp'].max(),
-                'active_hours': (resource_data['time:timestamp'].max() - 
-                               resource_data['time:timestamp'].min()).total_seconds() / 3600
-            }
-            
-            # Activity distribution
-            activity_dist = resource_data['concept:name'].value_counts().to_dict()
-            
-            # Performance metrics
-            performance = {}
-            if 'costs' in resource_data.columns:
-                performance.update({
-                    'total_cost': resource_data['costs'].sum(),
-                    'avg_cost_per_activity': resource_data['costs'].mean()
-                })
-            
+        for resource, row in tables['resources'].iterrows():
             resources[resource] = {
-                'workload': workload,
-                'time': time_metrics,
-                'activities': activity_dist,
-                'performance': performance
+                'workload': {
+                    'total_activities': row['total_activities'],
+                    'unique_cases': row['unique_cases'],
+                    'unique_activities': row['unique_activities']
+                },
+                'time': {
+                    'first_activity': row['first_activity'],
+                    'last_activity': row['last_activity'],
+                    'active_hours': row['active_hours']
+                },
+                'activities': activity_dist.get(resource, {}),
+                'performance': {
+                    key: row[key] for key in ('total_cost', 'avg_cost_per_activity')
+                    if key in row.index
+                }
             }
-        
+
         return resources
 
+    @profiled('ProcessStatistics.get_process_kpis')
+    @cached_analysis('ProcessStatistics.get_process_kpis')
     def get_process_kpis(self, event_log):
         """
         Calculate key performance indicators (KPIs) for the process.
         """
-        df = pm4py.convert_to_dataframe(event_log)
-        kpis = {}
-        
-        # Time-based KPIs
-        case_durations = df.groupby('case:concept:name')['time:timestamp'].agg(['min', 'max'])
-        case_durations['duration'] = (case_durations['max'] - case_durations['min']).dt.total_seconds() / 3600
-        
-        kpis['time'] = {
-            'avg_case_duration': case_durations['duration'].mean(),
-            'median_case_duration': case_durations['duration'].median(),
-            'min_case_duration': case_durations['duration'].min(),
-            'max_case_duration': case_durations['duration'].max()
-        }
-        
-        # Process KPIs
-        kpis['process'] = {
-            'total_cases': len(df['case:concept:name'].unique()),
-            'total_events': len(df),
-            'unique_activities': len(df['concept:name'].unique()),
-            'unique_resources': len(df['org:resource'].unique()),
-            'events_per_case': len(df) / len(df['case:concept:name'].unique())
-        }
-        
-        # Business KPIs
-        if 'claim_value' in df.columns and 'costs' in df.columns:
-            kpis['business'] = {
-                'total_claim_value': df.groupby('case:concept:name')['claim_value'].first().sum(),
-                'total_process_cost': df['costs'].sum(),
-                'avg_claim_value': df.groupby('case:concept:name')['claim_value'].first().mean(),
-                'avg_process_cost': df['costs'].mean()
-            }
-        
-        return kpis
+        return self.compute_all(event_log)['kpis']
@@ -0,0 +1,262 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from process_mining.dfg import count_pairs
+from utils.columnar_log import as_columnar_log
+
+# Odd 64-bit multiplier for the polynomial sequence hash (arithmetic wraps mod 2**64)
+HASH_BASE = np.uint64(0x9E3779B97F4A7C15)
+LENGTH_SALT = np.uint64(0xC2B2AE3D27D4EB4F)
+
+
+def sequence_hashes(activity_codes, offsets):
+    """
+    64-bit hash of the activity sequence ``activity_codes[offsets[c]:offsets[c + 1]]`` of every case.
+
+    The hash is the sum of (activity + 1) * base**position, salted with the
+    sequence length; equal sequences always hash equally.
+    """
+    case_lengths = np.diff(offsets)
+    n_cases = len(case_lengths)
+    codes = np.asarray(activity_codes).astype(np.uint64) + np.uint64(1)
+    positions = np.arange(len(codes)) - np.repeat(offsets[:-1], case_lengths)
+    max_length = int(case_lengths.max()) if n_cases else 0
+    powers = np.cumprod(np.full(max_length, HASH_BASE, dtype=np.uint64))
+    if n_cases:
+        case_hashes = np.add.reduceat(codes * powers[positions], offsets[:-1])
+    else:
+        case_hashes = np.zeros(0, dtype=np.uint64)
+    return case_hashes ^ case_lengths.astype(np.uint64) * LENGTH_SALT
+
+
+class VariantIndex:
+    """
+    Index of the distinct activity sequences (trace variants) of a columnar log.
+
+    Variants are numbered by descending frequency. ``case_variants[c]`` is the
+    variant of case ``c``; ``counts``, ``lengths`` and ``representatives``
+    (the first case with that sequence) are indexed by variant id, and
+    ``member_cases[member_offsets[v]:member_offsets[v + 1]]`` lists its cases.
+    """
+
+    def __init__(self, log):
+        self.log = log
+        n_cases = log.n_cases
+        offsets = log.case_offsets
+        case_lengths = log.case_lengths
+        positions = np.arange(log.n_events) - np.repeat(offsets[:-1], case_lengths)
+        case_hashes = sequence_hashes(log.activity_codes, offsets)
+
+        _, first_case, case_variants = np.unique(
+            case_hashes, return_index=True, return_inverse=True
+        )
+        case_variants = case_variants.astype(np.int64)
+        representatives = first_case
+
+        # Verify every case against its variant's representative so hash
+        # collisions can never merge different sequences
+        rep_of_case = representatives[case_variants]
+        event_case = log.case_codes
+        shifted = offsets[rep_of_case][event_case] + positions
+        mismatch = log.activity_codes != log.activity_codes[np.minimum(shifted, log.n_events - 1)]
+        mismatch |= (case_lengths[rep_of_case] != case_lengths)[event_case]
+        collided = np.flatnonzero(np.bincount(event_case, weights=mismatch, minlength=n_cases))
+        if len(collided):
+            case_variants, representatives = self._resolve_collisions(
+                case_variants, representatives, collided
+            )
+
+        self._assign(case_variants, representatives)
+
+    def _assign(self, case_variants, representatives):
+        """
+        Number the variants of a case-to-variant assignment and build the member lists.
+
+        ``representatives[v]`` is the first case of provisional variant ``v``;
+        every provisional variant must have at least one case.
+        """
+        case_lengths = self.log.case_lengths
+
+        # Renumber variants by descending count, ties by first occurrence
+        counts = np.bincount(case_variants, minlength=len(representatives))
+        order = np.lexsort((representatives, -counts))
+        renumber = np.empty(len(order), dtype=np.int64)
+        renumber[order] = np.arange(len(order))
+
+        self.case_variants = renumber[case_variants].astype(np.int32)
+        self.counts = counts[order]
+        self.representatives = representatives[order]
+        self.lengths = case_lengths[self.representatives]
+        self.member_cases = np.argsort(self.case_variants, kind='stable')
+        self.member_offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(self.counts, out=self.member_offsets[1:])
+
+    def _resolve_collisions(self, case_variants, representatives, collided):
+        """
+        Split hash buckets that hold different sequences, comparing them exactly.
+        """
+        log = self.log
+        representatives = list(representatives)
+        seen = {}
+        for case in collided:
+            sequence = tuple(log.activity_codes[log.case_offsets[case]:log.case_offsets[case + 1]])
+            if sequence not in seen:
+                seen[sequence] = len(representatives)
+                representatives.append(case)
+            case_variants[case] = seen[sequence]
+        representatives = np.asarray(representatives)
+        # Drop buckets that lost all their cases
+        used = np.unique(case_variants)
+        remap = np.full(len(representatives), -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        return remap[case_variants], representatives[used]
+
+    def appended(self, new_log, delta):
+        """
+        Variant index of ``new_log``, this index's log after an append described by ``delta``.
+
+        Only the touched cases are hashed and matched against the existing
+        variants; the result equals ``VariantIndex(new_log)``, which is built
+        instead if a hash collision makes the shortcut unsafe.
+        """
+        old_log = self.log
+        touched = delta.new_touched
+        if not self.n_variants:
+            return VariantIndex(new_log)
+
+        # Sequences of the existing variants in the new activity codes
+        variant_codes = delta.activity_map[old_log.activity_codes[old_log.case_events(self.representatives)]]
+        variant_offsets = np.zeros(self.n_variants + 1, dtype=np.int64)
+        np.cumsum(self.lengths, out=variant_offsets[1:])
+        variant_hashes = sequence_hashes(variant_codes, variant_offsets)
+        touched_hashes = sequence_hashes(touched.activity_codes, touched.case_offsets)
+        if len(np.unique(variant_hashes)) < self.n_variants:
+            return VariantIndex(new_log)
+
+        # Touched cases join the variant with their hash or start a new one
+        sorter = np.argsort(variant_hashes)
+        position = np.searchsorted(variant_hashes, touched_hashes, sorter=sorter)
+        matched = sorter[np.minimum(position, self.n_variants - 1)]
+        found = variant_hashes[matched] == touched_hashes
+        _, first, inverse = np.unique(touched_hashes[~found], return_index=True, return_inverse=True)
+        touched_variants = matched.astype(np.int64)
+        touched_variants[~found] = self.n_variants + inverse
+
+        # Verify every touched case against the sequence it was matched with
+        new_variants = np.flatnonzero(~found)[first]
+        reference_codes = np.concatenate([
+            variant_codes, touched.activity_codes[touched.case_events(new_variants)]
+        ])
+        reference_lengths = np.concatenate([self.lengths, touched.case_lengths[new_variants]])
+        reference_offsets = np.zeros(len(reference_lengths) + 1, dtype=np.int64)
+        np.cumsum(reference_lengths, out=reference_offsets[1:])
+        case_lengths = touched.case_lengths
+        if (reference_lengths[touched_variants] != case_lengths).any():
+            return VariantIndex(new_log)
+        positions = np.arange(touched.n_events) - np.repeat(touched.case_offsets[:-1], case_lengths)
+        reference = reference_codes[np.repeat(reference_offsets[touched_variants], case_lengths) + positions]
+        if (reference != touched.activity_codes).any():
+            return VariantIndex(new_log)
+
+        # Drop variants left without cases; each variant's first case represents it
+        case_variants = delta.carry_cases(self.case_variants.astype(np.int64), touched_variants)
+        counts = np.bincount(case_variants, minlength=len(reference_lengths))
+        used = np.flatnonzero(counts)
+        renumber = np.full(len(counts), -1, dtype=np.int64)
+        renumber[used] = np.arange(len(used))
+        case_variants = renumber[case_variants]
+        first_member = np.zeros(len(used), dtype=np.int64)
+        np.cumsum(counts[used][:-1], out=first_member[1:])
+        representatives = np.argsort(case_variants, kind='stable')[first_member]
+
+        index = VariantIndex.__new__(VariantIndex)
+        index.log = new_log
+        index._assign(case_variants, representatives)
+        return index
+
+    @classmethod
+    def for_log(cls, event_log):
+        """
+        Return the variant index of a log, building it only once per log.
+        """
+        log = as_columnar_log(event_log)
+        return log.memo('variant_index', lambda: cls(log))
+
+    @property
+    def n_variants(self):
+        return len(self.counts)
+
+    def activity_codes(self, variant_id):
+        case = self.representatives[variant_id]
+        return self.log.activity_codes[self.log.case_offsets[case]:self.log.case_offsets[case + 1]]
+
+    def sequence(self, variant_id):
+        """
+        Activity names of a variant.
+        """
+        return tuple(self.log.decode(self.activity_codes(variant_id), self.log.activities))
+
+    def members(self, variant_id):
+        """
+        Case ids that follow a variant.
+        """
+        start, end = self.member_offsets[variant_id], self.member_offsets[variant_id + 1]
+        return self.log.cases[self.member_cases[start:end]]
+
+    def top_k(self, k=10):
+        """
+        The ``k`` most frequent variants as a DataFrame.
+        """
+        k = min(k, self.n_variants)
+        return pd.DataFrame({
+            'variant': np.arange(k),
+            'count': self.counts[:k],
+            'share': self.counts[:k] / max(self.log.n_cases, 1),
+            'length': self.lengths[:k],
+            'activities': [' → '.join(map(str, self.sequence(v))) for v in range(k)]
+        })
+
+    def to_uvcl(self):
+        """
+        Variants as PM4Py's univariate variant log: a Counter of activity tuples.
+        """
+        return Counter({self.sequence(v): int(self.counts[v]) for v in range(self.n_variants)})
+
+    def weighted_dfg(self):
+        """
+        Directly-follows counts, start and end activities from variants weighted by count.
+        """
+        log = self.log
+        activities = log.activities
+        starts = log.case_offsets[self.representatives]
+        ends = starts + self.lengths
+
+        # Event positions of the representative traces only
+        event_index = np.repeat(starts, self.lengths) + (
+            np.arange(self.lengths.sum()) - np.repeat(np.cumsum(self.lengths) - self.lengths, self.lengths)
+        )
+        weights = np.repeat(self.counts, self.lengths)
+        is_last = np.zeros(len(event_index), dtype=bool)
+        is_last[np.cumsum(self.lengths) - 1] = True
+
+        source = log.activity_codes[event_index[~is_last]].astype(np.int64)
+        target = log.activity_codes[event_index[~is_last] + 1].astype(np.int64)
+        edge_weights = weights[~is_last]
+        valid = (source >= 0) & (target >= 0)
+        edges, _, edge_counts = count_pairs(
+            source[valid] * len(activities) + target[valid], len(activities), weights=edge_weights[valid]
+        )
+        dfg = {
+            (activities[code // len(activities)], activities[code % len(activities)]): int(count)
+            for code, count in zip(edges, edge_counts)
+        }
+
+        def endpoint_counts(event_positions):
+            codes = log.activity_codes[event_positions]
+            valid = codes >= 0
+            counts = np.bincount(codes[valid], weights=self.counts[valid], minlength=len(activities))
+            return {activities[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+        return dfg, endpoint_counts(starts), endpoint_counts(ends - 1)
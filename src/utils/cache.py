@@ -0,0 +1,182 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.columnar_log import ColumnarEventLog
+
+# Distinguishes a miss from a cached None
+_MISSING = object()
+
+
+def estimate_size(value):
+    """
+    Approximate the in-memory size of an analysis result in bytes.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return sys.getsizeof(value)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class AnalysisCache:
+    """
+    LRU cache of analysis results keyed by (log fingerprint, analysis name, parameters).
+
+    Entries are evicted least-recently-used first once their estimated size
+    exceeds ``max_bytes``. With ``disk_dir`` set, results are also pickled to
+    disk and survive process restarts. Cached results are shared between
+    callers and must not be mutated.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, log, name, params=None):
+        payload = json.dumps([log.fingerprint, name, params], sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_or_compute(self, log, name, params, compute):
+        """
+        Return the cached result for this log, analysis and parameters, computing it on a miss.
+        """
+        return self.get_or_compute_key(self.make_key(log, name, params), compute)
+
+    def get_or_compute_key(self, key, compute):
+        """
+        Return the cached result for a precomputed key, computing it on a miss.
+        """
+        value = self.get_key(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put_key(key, value)
+        return value
+
+    def get_key(self, key, default=None):
+        """
+        Return the cached result for a precomputed key from memory or disk, or ``default`` on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+
+        value = self._load_from_disk(key)
+        with self._lock:
+            if value is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        if value is None:
+            return default
+        self._store(key, value)
+        return value
+
+    def put_key(self, key, value):
+        """
+        Store a result under a precomputed key, on disk too when a directory is set.
+        """
+        self._save_to_disk(key, value)
+        self._store(key, value)
+
+    def _store(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _load_from_disk(self, key):
+        if not self.disk_dir or not os.path.exists(self._disk_path(key)):
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _save_to_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        try:
+            tmp_path = self._disk_path(key) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+        except Exception:
+            # Unpicklable results are still cached in memory
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+def cached_analysis(name):
+    """
+    Cache an analyzer method through ``self.cache`` when the log is columnar.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, event_log, *args, **kwargs):
+            cache = getattr(self, 'cache', None)
+            if cache is None or not isinstance(event_log, ColumnarEventLog):
+                return method(self, event_log, *args, **kwargs)
+            return cache.get_or_compute(
+                event_log, name, {'args': args, 'kwargs': kwargs},
+                lambda: method(self, event_log, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,400 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+import pm4py
+
+CASE_KEY = 'case:concept:name'
+ACTIVITY_KEY = 'concept:name'
+TIMESTAMP_KEY = 'time:timestamp'
+RESOURCE_KEY = 'org:resource'
+
+NAT = np.iinfo(np.int64).min
+
+
+def ns_to_hours(delta):
+    """
+    Convert int64 nanosecond durations to hours the way Timedelta.total_seconds() does.
+    """
+    return np.asarray(delta) / 10**9 / 3600
+
+
+def grouped_quantiles(values, groups, n_groups, quantiles):
+    """
+    Linearly interpolated quantiles of ``values`` for every integer group code.
+
+    Returns an array of shape (n_groups, len(quantiles)) with NaN for empty
+    groups. Uses one sort, so the cost does not depend on the number of groups.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups)
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.zeros(n_groups, dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+    sorted_values = values[np.lexsort((values, groups))]
+
+    result = np.full((n_groups, len(quantiles)), np.nan)
+    present = counts > 0
+    starts, counts = starts[present], counts[present]
+    for j, q in enumerate(quantiles):
+        position = q * (counts - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        low_values = sorted_values[starts + lower]
+        high_values = sorted_values[starts + upper]
+        result[present, j] = low_values + (high_values - low_values) * (position - lower)
+    return result
+
+
+# Columns computed from the codes and timestamps on first access, by name:
+# (compute(log), per_case); per-case columns are broadcast to events on read
+DERIVED_COLUMNS = {}
+
+
+def derived_column(name, per_case=False):
+    """
+    Decorator registering ``compute(log)`` as the lazily computed attribute column ``name``.
+    """
+    def decorator(compute):
+        DERIVED_COLUMNS[name] = (compute, per_case)
+        return compute
+    return decorator
+
+
+class ColumnarEventLog:
+    """
+    Integer-encoded event log sorted by (case, timestamp).
+
+    Case, activity and resource values are dictionary-encoded as int32 codes
+    into the ``cases``, ``activities`` and ``resources`` arrays (missing values
+    are coded -1), timestamps are int64 nanoseconds since the epoch (UTC), and
+    ``case_offsets[c]:case_offsets[c + 1]`` is the event range of case ``c``.
+    Any other columns are kept, in the same order, in ``attributes``; columns
+    constant within every case may instead be stored once per case in
+    ``case_attributes`` (see ``utils.compaction``). Columns registered with
+    ``derived_column`` are not stored but computed and memoized when first
+    read. ``column`` and ``case_column`` read all three kinds.
+    """
+
+    def __init__(self, case_codes, activity_codes, resource_codes, timestamps,
+                 cases, activities, resources, attributes=None, timezone=None,
+                 case_attributes=None):
+        self.case_codes = np.asarray(case_codes, dtype=np.int32)
+        self.activity_codes = np.asarray(activity_codes, dtype=np.int32)
+        self.resource_codes = np.asarray(resource_codes, dtype=np.int32)
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.cases = np.asarray(cases, dtype=object)
+        self.activities = np.asarray(activities, dtype=object)
+        self.resources = np.asarray(resources, dtype=object)
+        if attributes is None:
+            attributes = pd.DataFrame(index=pd.RangeIndex(len(self.case_codes)))
+        self.attributes = attributes
+        if case_attributes is None:
+            case_attributes = pd.DataFrame(index=pd.RangeIndex(len(self.cases)))
+        self.case_attributes = case_attributes
+        self.timezone = timezone
+
+        case_sizes = np.bincount(self.case_codes, minlength=len(self.cases))
+        self.case_offsets = np.zeros(len(self.cases) + 1, dtype=np.int64)
+        np.cumsum(case_sizes, out=self.case_offsets[1:])
+
+        self._dataframe = None
+        self._fingerprint = None
+        self._memo = {}
+        self._memo_locks = {}
+        self._memo_lock = threading.Lock()
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Build a columnar log from a DataFrame with PM4Py column names.
+        """
+        for col in (CASE_KEY, ACTIVITY_KEY, TIMESTAMP_KEY):
+            if col not in df.columns:
+                raise ValueError(f"Missing required column: {col}")
+
+        # Events without a case cannot be placed in any trace
+        df = df[df[CASE_KEY].notna()]
+
+        case_codes, cases = pd.factorize(df[CASE_KEY].astype(str), sort=True)
+        activity_codes, activities = pd.factorize(df[ACTIVITY_KEY], sort=True)
+        if RESOURCE_KEY in df.columns:
+            resource_codes, resources = pd.factorize(df[RESOURCE_KEY], sort=True)
+        else:
+            resource_codes, resources = np.full(len(df), -1), []
+
+        timestamps = pd.DatetimeIndex(pd.to_datetime(df[TIMESTAMP_KEY]))
+        timezone = timestamps.tz
+        timestamps = timestamps.as_unit('ns').asi8
+
+        # Stable sort keeps the input order of simultaneous events
+        order = np.lexsort((timestamps, case_codes))
+
+        extra_cols = [col for col in df.columns
+                      if col not in (CASE_KEY, ACTIVITY_KEY, TIMESTAMP_KEY, RESOURCE_KEY)]
+        attributes = df[extra_cols].iloc[order].reset_index(drop=True)
+
+        return cls(
+            case_codes[order], activity_codes[order], resource_codes[order],
+            timestamps[order], cases, activities, resources,
+            attributes=attributes, timezone=timezone
+        )
+
+    @classmethod
+    def from_event_log(cls, event_log):
+        """
+        Build a columnar log from a PM4Py EventLog.
+        """
+        return cls.from_dataframe(pm4py.convert_to_dataframe(event_log))
+
+    @property
+    def fingerprint(self):
+        """
+        Content hash of the log, used to key cached analysis results.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for values in (self.case_codes, self.activity_codes, self.resource_codes,
+                           self.timestamps, self.case_offsets):
+                digest.update(np.ascontiguousarray(values).tobytes())
+            for categories in (self.cases, self.activities, self.resources):
+                digest.update(repr(categories.tolist()).encode())
+            for frame in (self.attributes, self.case_attributes):
+                digest.update(repr(list(frame.columns)).encode())
+                if len(frame.columns):
+                    hashes = pd.util.hash_pandas_object(frame, index=False)
+                    digest.update(hashes.to_numpy().tobytes())
+            digest.update(str(self.timezone).encode())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def memo(self, name, compute):
+        """
+        Compute a derived structure (e.g. the variant index) once per log and reuse it.
+
+        Threads asking for the same structure at once wait for one computation.
+        """
+        if name in self._memo:
+            return self._memo[name]
+        with self._memo_lock:
+            lock = self._memo_locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._memo:
+                self._memo[name] = compute()
+        return self._memo[name]
+
+    @property
+    def n_events(self):
+        return len(self.case_codes)
+
+    @property
+    def n_cases(self):
+        return len(self.cases)
+
+    @property
+    def attribute_names(self):
+        """
+        Names of the event-level, case-level and derived attribute columns.
+        """
+        stored = list(self.attributes.columns) + list(self.case_attributes.columns)
+        return stored + [name for name in DERIVED_COLUMNS if name not in stored]
+
+    def derived(self, name):
+        """
+        Values of a derived column, per case for per-case ones; computed once per log.
+        """
+        compute, _ = DERIVED_COLUMNS[name]
+        return self.memo(f'derived.{name}', lambda: compute(self))
+
+    def column(self, name):
+        """
+        Values of an attribute column per event, broadcasting case-level attributes.
+        """
+        if name in self.attributes.columns:
+            return self.attributes[name]
+        if name in self.case_attributes.columns:
+            return self.case_attributes[name].take(self.case_codes).reset_index(drop=True)
+        values = self.derived(name)
+        if DERIVED_COLUMNS[name][1]:
+            values = values[self.case_codes]
+        return pd.Series(values, name=name)
+
+    def case_column(self, name):
+        """
+        Values of an attribute column per case, taken from the first event for event-level ones.
+        """
+        if name in self.case_attributes.columns:
+            return self.case_attributes[name]
+        if name in self.attributes.columns:
+            return self.attributes[name].take(self.case_offsets[:-1]).reset_index(drop=True)
+        values = self.derived(name)
+        if not DERIVED_COLUMNS[name][1]:
+            values = values[self.case_offsets[:-1]]
+        return pd.Series(values, name=name)
+
+    def event_attributes(self):
+        """
+        The stored attribute columns per event as one DataFrame; derived columns are left out.
+        """
+        if not len(self.case_attributes.columns):
+            return self.attributes
+        names = list(self.attributes.columns) + list(self.case_attributes.columns)
+        return pd.DataFrame({name: self.column(name) for name in names},
+                            index=pd.RangeIndex(self.n_events))
+
+    @property
+    def case_lengths(self):
+        return np.diff(self.case_offsets)
+
+    @property
+    def case_start(self):
+        """
+        First timestamp of every case (int64 ns).
+        """
+        return self.timestamps[self.case_offsets[:-1]]
+
+    @property
+    def case_end(self):
+        """
+        Last timestamp of every case (int64 ns).
+        """
+        return self.timestamps[self.case_offsets[1:] - 1]
+
+    def case_events(self, cases):
+        """
+        Event indices of the given cases (ascending case codes), in event order.
+        """
+        cases = np.asarray(cases, dtype=np.int64)
+        starts = self.case_offsets[cases]
+        sizes = self.case_offsets[cases + 1] - starts
+        return np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+
+    def select_cases(self, cases):
+        """
+        A log of only the given cases (ascending case codes), rebased to case codes 0..len(cases) - 1.
+
+        Activity and resource codes and dictionaries are shared with this
+        log; attributes are not copied.
+        """
+        cases = np.asarray(cases, dtype=np.int64)
+        events = self.case_events(cases)
+        return ColumnarEventLog(
+            np.repeat(np.arange(len(cases)), self.case_lengths[cases]),
+            self.activity_codes[events], self.resource_codes[events], self.timestamps[events],
+            self.cases[cases], self.activities, self.resources, timezone=self.timezone
+        )
+
+    def case_durations_hours(self):
+        """
+        Duration of every case in hours, in case-code order.
+        """
+        return ns_to_hours(self.case_end - self.case_start)
+
+    def transitions(self):
+        """
+        Directly-follows pairs inside cases as (event index, source, target, wait hours).
+
+        ``event index`` points at the source event; transitions touching an
+        event without an activity are left out.
+        """
+        same_case = self.case_codes[1:] == self.case_codes[:-1]
+        index = np.flatnonzero(same_case)
+        source = self.activity_codes[index]
+        target = self.activity_codes[index + 1]
+        valid = (source >= 0) & (target >= 0)
+        index, source, target = index[valid], source[valid], target[valid]
+        wait = ns_to_hours(self.timestamps[index + 1] - self.timestamps[index])
+        return index, source, target, wait
+
+    def to_datetime(self, timestamps):
+        """
+        Convert int64 nanosecond timestamps back to pandas datetimes.
+        """
+        values = pd.to_datetime(np.asarray(timestamps, dtype=np.int64), unit='ns',
+                                utc=self.timezone is not None)
+        if self.timezone is not None:
+            values = values.tz_convert(self.timezone)
+        return values
+
+    def decode(self, codes, categories):
+        """
+        Map integer codes back to their values, with None for missing codes.
+        """
+        codes = np.asarray(codes)
+        values = np.empty(len(codes), dtype=object)
+        valid = codes >= 0
+        values[valid] = categories[codes[valid]]
+        values[~valid] = None
+        return values
+
+    def to_dataframe(self):
+        """
+        Materialize the log as a PM4Py-compatible DataFrame (computed once).
+        """
+        if self._dataframe is None:
+            df = pd.DataFrame({
+                CASE_KEY: self.cases[self.case_codes],
+                ACTIVITY_KEY: self.decode(self.activity_codes, self.activities),
+                TIMESTAMP_KEY: self.to_datetime(self.timestamps),
+            })
+            if len(self.resources):
+                df[RESOURCE_KEY] = self.decode(self.resource_codes, self.resources)
+            for col in self.attribute_names:
+                df[col] = self.column(col).to_numpy()
+            self._dataframe = df
+        return self._dataframe
+
+    def __len__(self):
+        return self.n_cases
+
+    def __getstate__(self):
+        # Copies sent to other processes rebuild their derived structures on demand
+        state = self.__dict__.copy()
+        state['_dataframe'] = None
+        state['_memo'] = {}
+        state['_memo_locks'] = {}
+        del state['_memo_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._memo_lock = threading.Lock()
+
+    def __repr__(self):
+        return (f"ColumnarEventLog(cases={self.n_cases}, events={self.n_events}, "
+                f"activities={len(self.activities)}, resources={len(self.resources)})")
+
+
+@derived_column('case_duration', per_case=True)
+def _case_duration(log):
+    return log.case_durations_hours()
+
+
+@derived_column('wait_time')
+def _wait_time(log):
+    # Hours since the previous event of the same case; NaN for the first event of each case
+    waits = np.full(log.n_events, np.nan)
+    same_case = log.case_codes[1:] == log.case_codes[:-1]
+    waits[1:][same_case] = ns_to_hours(np.diff(log.timestamps)[same_case])
+    return waits
+
+
+@derived_column('complexity_score', per_case=True)
+def _complexity_score(log):
+    # Event count and duration, each relative to the largest case, weighted equally
+    sizes = log.case_lengths
+    durations = log.derived('case_duration')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (sizes / sizes.max(initial=1)) * 0.5 + (durations / durations.max(initial=0)) * 0.5
+
+
+def as_columnar_log(event_log):
+    """
+    Return ``event_log`` as a ColumnarEventLog, converting only if needed.
+    """
+    if isinstance(event_log, ColumnarEventLog):
+        return event_log
+    if isinstance(event_log, pd.DataFrame):
+        return ColumnarEventLog.from_dataframe(event_log)
+    return ColumnarEventLog.from_event_log(event_log)
@@ -0,0 +1,139 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from utils.columnar_log import ColumnarEventLog
+
+# Text columns with at most this share of distinct values become categorical
+CATEGORY_RATIO = 0.5
+POINTER_BYTES = 8
+
+
+def _distinct_codes(values):
+    """
+    Dense codes of a column's values, with -1 for missing ones.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy()
+    return pd.factorize(values)[0]
+
+
+def compact_column(values):
+    """
+    Smallest lossless dtype for one column.
+
+    Text with few distinct values becomes categorical and integers are
+    downcast to the smallest signed type holding their range (pandas sums
+    them as int64). Floats stay float64: float32 sums and means of exactly
+    representable values, such as costs, still lose precision.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return values.cat.remove_unused_categories()
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype):
+        return values
+    if pd.api.types.is_integer_dtype(dtype):
+        return pd.to_numeric(values, downcast='integer')
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        if values.nunique(dropna=True) <= CATEGORY_RATIO * len(values):
+            return values.astype('category')
+    return values
+
+
+def compact_log(log, case_level=True):
+    """
+    Copy of ``log`` with compacted attribute dtypes, sharing its code and timestamp arrays.
+
+    With ``case_level``, attributes that are constant within every case are
+    stored once per case in ``case_attributes`` instead of once per event;
+    ``ColumnarEventLog.column`` still returns them per event.
+    """
+    attributes = log.event_attributes()
+    first_events = log.case_offsets[:-1]
+    event_columns, case_columns = {}, {}
+    for col in attributes.columns:
+        values = compact_column(attributes[col])
+        if case_level and log.n_events:
+            codes = _distinct_codes(values)
+            if np.array_equal(codes, np.repeat(codes[first_events], log.case_lengths)):
+                case_columns[col] = values.iloc[first_events].reset_index(drop=True)
+                continue
+        event_columns[col] = values
+
+    return ColumnarEventLog(
+        log.case_codes, log.activity_codes, log.resource_codes, log.timestamps,
+        log.cases, log.activities, log.resources,
+        attributes=pd.DataFrame(event_columns, index=pd.RangeIndex(log.n_events)),
+        timezone=log.timezone,
+        case_attributes=pd.DataFrame(case_columns, index=pd.RangeIndex(log.n_cases))
+    )
+
+
+def _text_bytes(categories):
+    return np.array([sys.getsizeof(str(value)) for value in categories], dtype=np.int64)
+
+
+def _object_column_bytes(values):
+    """
+    Bytes of a column as one Python string per event, as ``astype(str)`` leaves it.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        sizes = _text_bytes(values.cat.categories)
+        valid = codes >= 0
+        return int(sizes[codes[valid]].sum()) + POINTER_BYTES * len(codes)
+    return int(values.memory_usage(index=False, deep=True))
+
+
+def memory_report(log):
+    """
+    Bytes held by every column of a log, next to its size as a plain per-event DataFrame column.
+
+    ``bytes`` counts codes, dictionaries and attribute columns as stored
+    (case-level attributes once per case). ``uncompacted_bytes`` is the
+    column as the text or 64-bit per-event column an uncompacted DataFrame
+    holds: one string object per event for text and categorical columns,
+    8 bytes per event for numbers and timestamps, one for booleans.
+    """
+    n_events = log.n_events
+    rows = []
+
+    def dictionary_row(name, codes, categories):
+        sizes = _text_bytes(categories)
+        valid = codes >= 0
+        rows.append({
+            'column': name, 'storage': 'codes', 'dtype': str(codes.dtype),
+            'bytes': codes.nbytes + int(sizes.sum()) + POINTER_BYTES * len(categories),
+            'uncompacted_bytes': int(sizes[codes[valid]].sum()) + POINTER_BYTES * n_events,
+        })
+
+    dictionary_row('case:concept:name', log.case_codes, log.cases)
+    dictionary_row('concept:name', log.activity_codes, log.activities)
+    if len(log.resources):
+        dictionary_row('org:resource', log.resource_codes, log.resources)
+    rows.append({'column': 'time:timestamp', 'storage': 'event', 'dtype': str(log.timestamps.dtype),
+                 'bytes': log.timestamps.nbytes, 'uncompacted_bytes': 8 * n_events})
+
+    for storage, frame in (('event', log.attributes), ('case', log.case_attributes)):
+        for col in frame.columns:
+            values = frame[col]
+            per_event = log.column(col) if storage == 'case' else values
+            dtype = per_event.dtype
+            if pd.api.types.is_bool_dtype(dtype):
+                uncompacted = n_events
+            elif isinstance(dtype, pd.CategoricalDtype) or not (
+                pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype)
+            ):
+                uncompacted = _object_column_bytes(per_event)
+            else:
+                uncompacted = 8 * n_events
+            rows.append({
+                'column': col, 'storage': storage, 'dtype': str(values.dtype),
+                'bytes': int(values.memory_usage(index=False, deep=True)),
+                'uncompacted_bytes': uncompacted,
+            })
+
+    report = pd.DataFrame(rows).set_index('column')
+    report['ratio'] = report['uncompacted_bytes'] / report['bytes'].clip(lower=1)
+    return report
@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 
-def load_config():
+def load_config(require_api_key=True):
     """
     Load configuration from environment variables.
     """
@@ -19,6 +19,21 @@ def load_config():
             'RESOURCE_KEY': 'org:resource'
         },
 
+        # AI Settings
+        'AI': {
+            # Default size of the event log summary sent with each prompt
+            'CONTEXT_TOKENS': int(os.getenv('AI_CONTEXT_TOKENS', '4000')),
+            # 'gemini', or 'stub' for offline load tests without an API key
+            'BACKEND': os.getenv('AI_BACKEND', 'gemini'),
+            'MAX_CONCURRENCY': int(os.getenv('AI_MAX_CONCURRENCY', '4')),
+            # Seconds without a streamed chunk before an attempt is retried
+            'TIMEOUT': float(os.getenv('AI_TIMEOUT', '60')),
+            'MAX_RETRIES': int(os.getenv('AI_MAX_RETRIES', '3')),
+            # Answers keyed by (model, prompt hash); also pickled to disk when a directory is set
+            'RESPONSE_CACHE_MB': int(os.getenv('AI_RESPONSE_CACHE_MB', '32')),
+            'RESPONSE_CACHE_DIR': os.getenv('AI_RESPONSE_CACHE_DIR')
+        },
+
         # Visualization Settings
         'VISUALIZATION': {
             'PROCESS_MAP': {
@@ -27,19 +42,51 @@ def load_config():
             },
             'CHARTS': {
                 'THEME': 'plotly',
-                'COLOR_PALETTE': 'Set3'
+                'COLOR_PALETTE': 'Set3',
+                # Cases drawn individually in the timeline before it aggregates
+                'TIMELINE_MAX_CASES': int(os.getenv('TIMELINE_MAX_CASES', '2000')),
+                'TIMELINE_BINS': 200,
+                # Cycle-time charts draw every case only up to this many cases
+                'FULL_POINT_LIMIT': int(os.getenv('FULL_POINT_LIMIT', '5000')),
+                'DISTRIBUTION_BINS': 50,
+                'MAX_OUTLIER_POINTS': 500
             }
         },
 
         # Performance Settings
         'PERFORMANCE': {
             'TIMEUNIT': 'hours',
-            'AGGREGATE_METHOD': 'mean'
+            'AGGREGATE_METHOD': 'mean',
+            # Working memory for chunked CSV ingestion, on top of the compact log
+            'INGEST_MEMORY_MB': int(os.getenv('INGEST_MEMORY_MB', '512')),
+            'INGEST_SPILL_DIR': os.getenv('INGEST_SPILL_DIR'),
+            # Store attributes that are constant within each case once per case
+            'CASE_LEVEL_ATTRIBUTES': os.getenv('CASE_LEVEL_ATTRIBUTES', 'true').lower() in ('1', 'true', 'yes'),
+            # Processed logs are persisted here as memory-mappable Arrow files
+            'LOG_STORE_DIR': os.getenv('LOG_STORE_DIR', os.path.join('.cache', 'event_logs')),
+            # Analysis result cache; results are also pickled to disk when a directory is set
+            'RESULT_CACHE_MB': int(os.getenv('RESULT_CACHE_MB', '512')),
+            'RESULT_CACHE_DIR': os.getenv('RESULT_CACHE_DIR'),
+            # Laid-out process map SVGs, keyed by model and pruning
+            'RENDER_CACHE_MB': int(os.getenv('RENDER_CACHE_MB', '64')),
+            # Worker processes for per-case analyses; 1 runs everything in-process
+            'WORKERS': int(os.getenv('ANALYSIS_WORKERS', str(os.cpu_count() or 1))),
+            # Threads for independent analyses of one page (see process_mining.graph)
+            'ANALYSIS_THREADS': int(os.getenv('ANALYSIS_THREADS', str(min(os.cpu_count() or 1, 8)))),
+            # Smaller logs are analyzed in-process, where a pool costs more than it saves
+            'PARALLEL_MIN_EVENTS': int(os.getenv('PARALLEL_MIN_EVENTS', '200000')),
+            # Background processes for discovery on logs of at least JOB_MIN_EVENTS events
+            'JOB_WORKERS': int(os.getenv('JOB_WORKERS', '2')),
+            'JOB_MIN_EVENTS': int(os.getenv('JOB_MIN_EVENTS', '100000')),
+            # Seconds before a background job is stopped; 0 disables the limit
+            'JOB_TIMEOUT': float(os.getenv('JOB_TIMEOUT', '1800')) or None,
+            # Stage timings and memory sampling; can also be switched on in the sidebar
+            'PROFILING': os.getenv('PROFILING', '').lower() in ('1', 'true', 'yes')
         }
     }
 
     # Validate required configuration
-    if not config['GEMINI_API_KEY']:
+    if require_api_key and not config['GEMINI_API_KEY']:
         raise ValueError(
             "Gemini API key not found. Please add GEMINI_API_KEY to your .env file"
         )
@@ -2,64 +2,30 @@ import pandas as pd
 import pm4py
 import numpy as np
 
+from utils.columnar_log import NAT, ColumnarEventLog, as_columnar_log, ns_to_hours
+from utils.compaction import compact_log
+from utils.ingestion import read_csv_columnar, read_xes_columnar
+from process_mining.parallel import map_cases, concat_metrics, case_metrics
+from utils.profiling import profiled, profiler
+from utils.timestamps import parse_timestamps
+
+# Columns whose missing values make an event unusable (see clean_event_log)
+CRITICAL_COLUMNS = ('case:concept:name', 'concept:name', 'time:timestamp', 'org:resource')
+
 class EventLogProcessor:
-    def __init__(self):
-        pass
+    def __init__(self, executor=None, case_level_attributes=True):
+        self.executor = executor
+        # Store attributes constant within every case once per case (see utils.compaction)
+        self.case_level_attributes = case_level_attributes
 
+    @profiled('EventLogProcessor.convert_csv_to_event_log', category='ingest')
     def convert_csv_to_event_log(self, df):
         """
         Convert a pandas DataFrame to PM4Py event log format with enhanced attributes.
         """
         try:
-            # Check and process required columns
-            required_columns = {
-                'case:concept:name': str,
-                'concept:name': str,
-                'time:timestamp': 'datetime64[ns]',
-                'org:resource': str
-            }
-            
-            # Validate required columns
-            for col, dtype in required_columns.items():
-                if col not in df.columns:
-                    raise ValueError(f"Missing required column: {col}")
-                if dtype == 'datetime64[ns]':
-                    if not pd.api.types.is_datetime64_any_dtype(df[col]):
-                        df[col] = pd.to_datetime(df[col], format='%Y-%m-%d %H:%M:%S')
-                else:
-                    df[col] = df[col].astype(dtype)
+            df = self._prepare_dataframe(df)
 
-            # Sort by case ID and timestamp
-            df = df.sort_values(['case:concept:name', 'time:timestamp'])
-            
-            # Calculate additional metrics
-            case_groups = df.groupby('case:concept:name')
-            
-            # Add case duration
-            df['case_duration'] = case_groups['time:timestamp'].transform(
-                lambda x: (x.max() - x.min()).total_seconds() / 3600
-            )
-            
-            # Add activity wait time
-            df['wait_time'] = case_groups['time:timestamp'].transform(
-                lambda x: x.diff().dt.total_seconds() / 3600
-            )
-            
-            # Add case complexity score (based on number of events and duration)
-            complexity_scores = case_groups.agg({
-                'time:timestamp': 'count',
-                'case_duration': 'first'
-            })
-            complexity_scores['complexity_score'] = (
-                (complexity_scores['time:timestamp'] / complexity_scores['time:timestamp'].max()) * 0.5 +
-                (complexity_scores['case_duration'] / complexity_scores['case_duration'].max()) * 0.5
-            )
-            df = df.merge(
-                complexity_scores['complexity_score'],
-                left_on='case:concept:name',
-                right_index=True
-            )
-            
             # Convert to event log format
             try:
                 parameters = {
@@ -68,7 +34,8 @@ class EventLogProcessor:
                     pm4py.utils.constants.PARAMETER_CONSTANT_TIMESTAMP_KEY: 'time:timestamp'
                 }
                 
-                event_log = pm4py.convert_to_event_log(df, parameters=parameters)
+                with profiler.stage('pm4py conversion', category='ingest', rows=len(df)):
+                    event_log = pm4py.convert_to_event_log(df, parameters=parameters)
                 
                 if len(event_log) == 0:
                     raise ValueError("Converted event log is empty")
@@ -81,89 +48,258 @@ class EventLogProcessor:
         except Exception as e:
             raise ValueError(f"Error converting CSV to event log: {e}")
 
-    def clean_event_log(self, event_log):
+    @profiled('EventLogProcessor.convert_csv_to_columnar_log', category='ingest')
+    def convert_csv_to_columnar_log(self, df, column_mapping=None):
         """
-        Clean and preprocess the event log with enhanced filtering.
+        Convert a pandas DataFrame to the columnar log shared by all analyzers.
+
+        ``column_mapping`` is the renaming applied to ``df``; the timestamp
+        format inferred for it is reused for later files with the same mapping.
         """
         try:
-            # Convert to DataFrame for advanced cleaning
-            df = pm4py.convert_to_dataframe(event_log)
-            
-            # Remove cases with missing critical attributes
-            critical_cols = ['case:concept:name', 'concept:name', 'time:timestamp', 'org:resource']
-            df = df.dropna(subset=critical_cols)
-            
-            # Remove cases with invalid timestamps (future dates or too old)
-            current_time = pd.Timestamp.now()
-            df = df[
-                (df['time:timestamp'] <= current_time) & 
-                (df['time:timestamp'] >= current_time - pd.Timedelta(days=365))
-            ]
-            
-            # Remove cases with suspicious patterns (e.g., zero duration)
-            case_durations = df.groupby('case:concept:name')['time:timestamp'].agg(['min', 'max'])
-            valid_cases = case_durations[case_durations['max'] > case_durations['min']].index
-            df = df[df['case:concept:name'].isin(valid_cases)]
-            
-            # Convert back to event log
-            cleaned_log = pm4py.convert_to_event_log(df)
-            return cleaned_log
-            
+            # Encoding sorts the events; derived columns are computed on first read
+            df = self.parse_columns(df, column_mapping)
+            with profiler.stage('columnar encoding', category='ingest', rows=len(df)):
+                log = ColumnarEventLog.from_dataframe(df)
+            if log.n_cases == 0:
+                raise ValueError("Converted event log is empty")
+            return self._compact(log)
+        except Exception as e:
+            raise ValueError(f"Error converting CSV to columnar log: {e}")
+
+    @profiled('EventLogProcessor.stream_csv_to_columnar_log', category='ingest')
+    def stream_csv_to_columnar_log(self, source, column_mapping=None, memory_budget_mb=512,
+                                   spill_dir=None):
+        """
+        Read a CSV in chunks straight into a columnar log within a memory budget.
+        """
+        try:
+            log = read_csv_columnar(
+                source, column_mapping=column_mapping,
+                memory_budget_mb=memory_budget_mb, spill_dir=spill_dir
+            )
+            if log.n_cases == 0:
+                raise ValueError("Converted event log is empty")
+            return self._compact(log)
+        except Exception as e:
+            raise ValueError(f"Error streaming CSV to columnar log: {e}")
+
+    @profiled('EventLogProcessor.stream_xes_to_columnar_log', category='ingest')
+    def stream_xes_to_columnar_log(self, source, memory_budget_mb=512, spill_dir=None):
+        """
+        Stream an XES or .xes.gz file into a columnar log, one trace in memory at a time.
+        """
+        try:
+            log = read_xes_columnar(source, memory_budget_mb=memory_budget_mb, spill_dir=spill_dir)
+            if log.n_cases == 0:
+                raise ValueError("Converted event log is empty")
+            return self._compact(log)
+        except Exception as e:
+            raise ValueError(f"Error streaming XES to columnar log: {e}")
+
+    def _compact(self, log):
+        with profiler.stage('attribute compaction', category='ingest', rows=log.n_events):
+            return compact_log(log, case_level=self.case_level_attributes)
+
+    def _prepare_dataframe(self, df):
+        """
+        Validate, sort and enrich an event DataFrame with PM4Py column names.
+
+        The columnar log computes the same derived columns lazily (see
+        ``utils.columnar_log.derived_column``); this eager version is for
+        the PM4Py EventLog, which has no such hook.
+        """
+        df = self.parse_columns(df)
+
+        # Sort by case ID and timestamp
+        with profiler.stage('sort', category='ingest', rows=len(df)):
+            df = df.sort_values(['case:concept:name', 'time:timestamp'])
+        
+        with profiler.stage('enrich', category='ingest', rows=len(df)):
+            timestamps = df.groupby('case:concept:name')['time:timestamp']
+            case_sizes = timestamps.transform('size')
+        
+            # Add case duration
+            df['case_duration'] = (
+                (timestamps.transform('max') - timestamps.transform('min')).dt.total_seconds() / 3600
+            )
+        
+            # Add activity wait time
+            df['wait_time'] = timestamps.diff().dt.total_seconds() / 3600
+        
+            # Add case complexity score (based on number of events and duration)
+            df['complexity_score'] = (
+                (case_sizes / case_sizes.max()) * 0.5 +
+                (df['case_duration'] / df['case_duration'].max()) * 0.5
+            )
+        
+        return df
+
+    def parse_columns(self, df, column_mapping=None):
+        """
+        Validate and convert the PM4Py columns of an event DataFrame, e.g. a batch to append.
+
+        Timestamps are parsed with a format inferred from a sample (see
+        ``utils.timestamps``) and cached per ``column_mapping``.
+        """
+        # Check and process required columns
+        required_columns = {
+            'case:concept:name': str,
+            'concept:name': str,
+            'time:timestamp': 'datetime64[ns]',
+            'org:resource': str
+        }
+        
+        with profiler.stage('parse columns', category='ingest', rows=len(df)):
+            # Validate required columns
+            for col, dtype in required_columns.items():
+                if col not in df.columns:
+                    raise ValueError(f"Missing required column: {col}")
+                if dtype == 'datetime64[ns]':
+                    if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                        df[col] = parse_timestamps(df[col], column_mapping, col)
+                else:
+                    df[col] = df[col].astype(dtype)
+        return df
+
+    @profiled('EventLogProcessor.clean_event_log')
+    def clean_event_log(self, event_log, critical_columns=CRITICAL_COLUMNS, window_days=365,
+                        drop_zero_duration=True, drop_duplicates=True):
+        """
+        Find the events that fail the cleaning rules, in one vectorized pass over the columnar log.
+
+        Rules, applied in this order (None or False disables one):
+
+        - ``missing_values``: a value of ``critical_columns`` is missing; the
+          resource is only checked if the log has resources at all
+        - ``duplicates``: a repeat of an earlier event with the same case,
+          activity, timestamp and resource
+        - ``time_window``: older than ``window_days`` before the log's latest
+          timestamp, so historical logs keep their recent part
+        - ``zero_duration``: the case's remaining events all share one
+          timestamp (including single-event cases)
+
+        Returns a boolean keep-mask over the events in log order and the
+        number of events each rule dropped; an event counts for the first
+        rule that drops it. ``process_mining.filters.event_view(log, keep)``
+        builds the cleaned log.
+        """
+        try:
+            log = as_columnar_log(event_log)
+            keep = np.ones(log.n_events, dtype=bool)
+            drops = {}
+
+            def apply(rule, dropped):
+                drops[rule] = int(np.count_nonzero(keep & dropped))
+                keep[dropped] = False
+
+            if critical_columns:
+                missing = np.zeros(log.n_events, dtype=bool)
+                for col in critical_columns:
+                    if col == 'concept:name':
+                        missing |= log.activity_codes < 0
+                    elif col == 'time:timestamp':
+                        missing |= log.timestamps == NAT
+                    elif col == 'org:resource':
+                        if len(log.resources):
+                            missing |= log.resource_codes < 0
+                    elif col != 'case:concept:name':
+                        missing |= log.column(col).isna().to_numpy()
+                apply('missing_values', missing)
+
+            if drop_duplicates:
+                # Equal events are adjacent in this order, the earliest first
+                keys = (log.resource_codes, log.activity_codes, log.timestamps, log.case_codes)
+                order = np.lexsort(keys)
+                repeated = np.ones(max(log.n_events - 1, 0), dtype=bool)
+                for values in keys:
+                    repeated &= values[order[1:]] == values[order[:-1]]
+                duplicate = np.zeros(log.n_events, dtype=bool)
+                duplicate[order[1:][repeated]] = True
+                apply('duplicates', duplicate)
+
+            if window_days is not None:
+                valid = log.timestamps[log.timestamps != NAT]
+                too_old = np.zeros(log.n_events, dtype=bool)
+                if len(valid):
+                    too_old = log.timestamps < valid.max() - int(window_days * 86400 * 10**9)
+                apply('time_window', too_old)
+
+            if drop_zero_duration:
+                # Events are sorted by (case, timestamp), so a case's first and
+                # last remaining events hold its start and end
+                kept = np.flatnonzero(keep)
+                case_codes = log.case_codes[kept]
+                starts = np.flatnonzero(np.diff(case_codes, prepend=-1))
+                ends = np.append(starts[1:], len(kept))[:len(starts)] - 1
+                timestamps = log.timestamps[kept]
+                flat = np.zeros(log.n_cases, dtype=bool)
+                flat[case_codes[starts]] = timestamps[ends] == timestamps[starts]
+                apply('zero_duration', flat[log.case_codes])
+
+            return keep, drops
+
         except Exception as e:
             raise ValueError(f"Error cleaning event log: {e}")
 
+    @profiled('EventLogProcessor.extract_case_attributes')
     def extract_case_attributes(self, event_log):
         """
         Extract enhanced case-level attributes from the event log.
         """
         try:
-            df = pm4py.convert_to_dataframe(event_log)
+            log = as_columnar_log(event_log)
+            attribute_names = log.attribute_names
+            sum_columns = ['costs'] if 'costs' in attribute_names else []
+            mean_columns = ['claim_value'] if 'claim_value' in attribute_names else []
+            metrics = concat_metrics(map_cases(
+                self.executor, log, case_metrics, columns=sum_columns + mean_columns,
+                sum_columns=sum_columns, mean_columns=mean_columns
+            ))
+
+            # Basic temporal metrics
+            start_times = log.to_datetime(metrics['start'])
+            end_times = log.to_datetime(metrics['end'])
+            durations = ns_to_hours(metrics['end'] - metrics['start'])
+
+            # Cost and risk metrics
+            if sum_columns:
+                total_costs = metrics['costs_sum']
+                if pd.api.types.is_integer_dtype(log.column('costs')):
+                    total_costs = total_costs.astype(np.int64)
+            else:
+                total_costs = [None] * log.n_cases
+            claim_values = metrics['claim_value_mean'] if mean_columns else [None] * log.n_cases
+            if 'risk_level' in attribute_names:
+                risk_levels = log.case_column('risk_level').to_numpy()
+            else:
+                risk_levels = [None] * log.n_cases
+
+            activity_names = log.decode(log.activity_codes, log.activities)
+            sequences = np.split(activity_names, log.case_offsets[1:-1])
+
             case_attributes = {}
-            
-            for case_id, case_data in df.groupby('case:concept:name'):
-                # Basic temporal metrics
-                start_time = case_data['time:timestamp'].min()
-                end_time = case_data['time:timestamp'].max()
-                duration = (end_time - start_time).total_seconds() / 3600
-                
-                # Process metrics
-                unique_activities = len(case_data['concept:name'].unique())
-                unique_resources = len(case_data['org:resource'].unique())
-                total_cost = case_data['costs'].sum() if 'costs' in case_data.columns else None
-                
-                # Advanced metrics
-                if 'claim_value' in case_data.columns:
-                    avg_claim_value = case_data['claim_value'].mean()
-                else:
-                    avg_claim_value = None
-                
-                if 'risk_level' in case_data.columns:
-                    risk_level = case_data['risk_level'].iloc[0]
-                else:
-                    risk_level = None
-                
-                attributes = {
+            for i, case_id in enumerate(log.cases):
+                case_attributes[case_id] = {
                     'temporal': {
-                        'start_time': start_time,
-                        'end_time': end_time,
-                        'duration_hours': duration
+                        'start_time': start_times[i],
+                        'end_time': end_times[i],
+                        'duration_hours': durations[i]
                     },
                     'process': {
-                        'num_events': len(case_data),
-                        'unique_activities': unique_activities,
-                        'unique_resources': unique_resources,
-                        'total_cost': total_cost
+                        'num_events': int(metrics['num_events'][i]),
+                        'unique_activities': int(metrics['unique_activities'][i]),
+                        'unique_resources': int(metrics['unique_resources'][i]),
+                        'total_cost': total_costs[i]
                     },
                     'business': {
-                        'claim_value': avg_claim_value,
-                        'risk_level': risk_level,
-                        'activities_sequence': list(case_data['concept:name'])
+                        'claim_value': claim_values[i],
+                        'risk_level': risk_levels[i],
+                        'activities_sequence': sequences[i].tolist()
                     }
                 }
-                
-                case_attributes[case_id] = attributes
-            
+
             return case_attributes
-            
+
         except Exception as e:
             raise ValueError(f"Error extracting case attributes: {e}")
@@ -0,0 +1,461 @@
+import gzip
+import os
+import tempfile
+from contextlib import contextmanager
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+
+from utils.columnar_log import (
+    ColumnarEventLog, CASE_KEY, ACTIVITY_KEY, TIMESTAMP_KEY, RESOURCE_KEY
+)
+from utils.timestamps import TimestampParser, timestamp_parser
+
+SAMPLE_ROWS = 1000
+# pandas needs a few times the in-memory size of a chunk while parsing it
+PARSE_OVERHEAD = 4
+# Rough size of one parsed XES event (a dict of attribute strings) before encoding
+XES_EVENT_BYTES = 2048
+XES_VALUE_TYPES = {'string', 'date', 'int', 'float', 'boolean', 'id'}
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class CategoryEncoder:
+    """
+    Assign int32 codes to values in order of first appearance across chunks.
+    """
+
+    def __init__(self):
+        self.codes = {}
+
+    def encode(self, values):
+        """
+        Encode one chunk of values, with -1 for missing ones.
+        """
+        chunk_codes, uniques = pd.factorize(values)
+        mapping = np.fromiter(
+            (self.codes.setdefault(value, len(self.codes)) for value in uniques),
+            dtype=np.int32, count=len(uniques)
+        )
+        codes = np.full(len(chunk_codes), -1, dtype=np.int32)
+        valid = chunk_codes >= 0
+        codes[valid] = mapping[chunk_codes[valid]]
+        return codes
+
+    def finalize(self):
+        """
+        Return the sorted categories and the array remapping old codes to sorted ones.
+        """
+        values = np.empty(len(self.codes), dtype=object)
+        values[:] = list(self.codes)
+        order = np.argsort(values, kind='stable')
+        remap = np.empty(len(values), dtype=np.int32)
+        remap[order] = np.arange(len(values), dtype=np.int32)
+        return values[order], remap
+
+
+class RunBuffer:
+    """
+    Accumulate encoded column chunks, spilling them to disk past a byte budget.
+    """
+
+    def __init__(self, budget_bytes, spill_dir=None):
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir
+        self._tempdir = None
+        self.pending = []
+        self.pending_bytes = 0
+        self.runs = []
+        self.run_rows = []
+
+    @staticmethod
+    def _part(chunk, name, rows):
+        # A code column first seen in a later chunk is missing (-1) in earlier ones
+        if name in chunk:
+            return chunk[name]
+        return np.full(rows, -1, dtype=np.int32)
+
+    @staticmethod
+    def _rows(chunk):
+        return len(next(iter(chunk.values())))
+
+    def add(self, columns):
+        self.pending.append(columns)
+        self.pending_bytes += sum(values.nbytes for values in columns.values())
+        if self.pending_bytes > self.budget_bytes:
+            self.spill()
+
+    def spill(self):
+        """
+        Write the pending chunks to disk as one run of .npy column files.
+        """
+        if not self.pending:
+            return
+        if self._tempdir is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix='pm_ingest_', dir=self.spill_dir)
+        run_dir = os.path.join(self._tempdir.name, f"run_{len(self.runs)}")
+        os.makedirs(run_dir)
+        run = {}
+        names = dict.fromkeys(name for chunk in self.pending for name in chunk)
+        for name in names:
+            path = os.path.join(run_dir, f"{len(run)}.npy")
+            np.save(path, np.concatenate([
+                self._part(chunk, name, self._rows(chunk)) for chunk in self.pending
+            ]))
+            run[name] = path
+        self.runs.append(run)
+        self.run_rows.append(sum(self._rows(chunk) for chunk in self.pending))
+        self.pending, self.pending_bytes = [], 0
+
+    def column(self, name):
+        """
+        Concatenate one column across spilled runs (memory-mapped) and pending chunks.
+        """
+        parts = [np.load(run[name], mmap_mode='r') if name in run else self._part(run, name, rows)
+                 for run, rows in zip(self.runs, self.run_rows)]
+        parts += [self._part(chunk, name, self._rows(chunk)) for chunk in self.pending]
+        return np.concatenate(parts)
+
+    def close(self):
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+            self._tempdir = None
+
+
+def estimate_chunk_rows(source, budget_bytes, **read_kwargs):
+    """
+    Size CSV chunks so that parsing one stays within ``budget_bytes``.
+    """
+    sample = pd.read_csv(source, nrows=SAMPLE_ROWS, **read_kwargs)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    bytes_per_row = max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1)
+    return max(int(budget_bytes / (bytes_per_row * PARSE_OVERHEAD)), SAMPLE_ROWS), sample
+
+
+def _sort_encoded(buffer, encoders):
+    """
+    Remap first-appearance codes to sorted categories, then sort all events by (case, timestamp) once.
+
+    Returns the categories and sorted codes of every encoded column, the
+    sorted timestamps and the sort order.
+    """
+    categories, codes = {}, {}
+    for col, encoder in encoders.items():
+        categories[col], remap = encoder.finalize()
+        raw_codes = buffer.column(col)
+        codes[col] = np.where(raw_codes >= 0, remap[raw_codes], -1).astype(np.int32)
+
+    timestamps = buffer.column(TIMESTAMP_KEY)
+    order = np.lexsort((timestamps, codes[CASE_KEY]))
+    timestamps = timestamps[order]
+    for col in codes:
+        codes[col] = codes[col][order]
+    return categories, codes, timestamps, order
+
+
+def _mixed_column(numbers, text_codes, text_categories):
+    """
+    Categorical text column of a numeric column that also holds text.
+
+    Numbers are written back as text, integral ones without a decimal point.
+    """
+    values = np.full(len(numbers), None, dtype=object)
+    is_number = ~np.isnan(numbers)
+    values[is_number] = [str(int(x)) if x.is_integer() else repr(x) for x in numbers[is_number].tolist()]
+    is_text = text_codes >= 0
+    values[is_text] = text_categories[text_codes[is_text]]
+    return pd.Categorical(values)
+
+
+def read_csv_columnar(source, column_mapping=None, memory_budget_mb=512, spill_dir=None,
+                      timestamp_format=None):
+    """
+    Stream a CSV into a ColumnarEventLog with bounded working memory.
+
+    Chunks are dictionary-encoded as they arrive and spilled to disk once the
+    encoded buffer exceeds half the budget. Working memory stays around
+    ``memory_budget_mb`` on top of the compact result. Columns numeric in
+    the sample become categorical text if a later chunk holds text.
+    Timestamps are parsed with ``timestamp_format`` if given, otherwise with
+    the format inferred from the sample (see ``utils.timestamps``); chunks
+    with values it does not fit are parsed with a format inferred from them.
+    """
+    column_mapping = column_mapping or {}
+    budget_bytes = memory_budget_mb * 1024 * 1024
+    chunk_rows, sample = estimate_chunk_rows(source, budget_bytes / 2)
+    sample = sample.rename(columns=column_mapping)
+
+    for col in (CASE_KEY, ACTIVITY_KEY, TIMESTAMP_KEY):
+        if col not in sample.columns:
+            raise ValueError(f"Missing required column: {col}")
+
+    # Text columns are read as text; numeric ones are inferred per chunk, since a
+    # later chunk may hold text. Columns empty in the sample are taken as text.
+    reverse_mapping = {new: old for old, new in column_mapping.items()}
+    numeric_cols = [col for col in sample.columns
+                    if col not in (CASE_KEY, ACTIVITY_KEY, TIMESTAMP_KEY, RESOURCE_KEY)
+                    and pd.api.types.is_numeric_dtype(sample[col]) and sample[col].notna().any()]
+    dtypes = {reverse_mapping.get(col, col): str for col in sample.columns if col not in numeric_cols}
+    has_resource = RESOURCE_KEY in sample.columns
+    string_cols = [col for col in sample.columns
+                   if col not in numeric_cols and col != TIMESTAMP_KEY]
+    encoders = {col: CategoryEncoder() for col in string_cols}
+    # Numeric columns found to hold text too, with the text values encoded under (col, 'text')
+    mixed_cols = set()
+    if timestamp_format is not None:
+        parser = TimestampParser(format=timestamp_format)
+    else:
+        parser = timestamp_parser(sample[TIMESTAMP_KEY], column_mapping, TIMESTAMP_KEY)
+
+    timezone = None
+
+    buffer = RunBuffer(budget_bytes / 2, spill_dir=spill_dir)
+    try:
+        reader = pd.read_csv(source, chunksize=chunk_rows, dtype=dtypes)
+        for chunk in reader:
+            chunk = chunk.rename(columns=column_mapping)
+            chunk = chunk[chunk[CASE_KEY].notna()]
+            columns = {col: encoders[col].encode(chunk[col]) for col in string_cols}
+            timestamps = parser.parse(chunk[TIMESTAMP_KEY])
+            timezone = timestamps.tz
+            columns[TIMESTAMP_KEY] = timestamps.as_unit('ns').asi8
+            for col in numeric_cols:
+                values = chunk[col]
+                if pd.api.types.is_numeric_dtype(values):
+                    columns[col] = values.to_numpy(dtype=np.float64)
+                    continue
+                numbers = pd.to_numeric(values, errors='coerce')
+                is_text = numbers.isna() & values.notna()
+                if is_text.any():
+                    mixed_cols.add(col)
+                    text_encoder = encoders.setdefault((col, 'text'), CategoryEncoder())
+                    columns[(col, 'text')] = text_encoder.encode(values.where(is_text))
+                columns[col] = numbers.to_numpy(dtype=np.float64)
+            buffer.add(columns)
+
+        categories, codes, timestamps, order = _sort_encoded(buffer, encoders)
+
+        attributes = {}
+        for col in sample.columns:
+            if col in (CASE_KEY, ACTIVITY_KEY, TIMESTAMP_KEY, RESOURCE_KEY):
+                continue
+            if col in mixed_cols:
+                attributes[col] = _mixed_column(
+                    buffer.column(col)[order], codes.pop((col, 'text')), categories[(col, 'text')]
+                )
+            elif col in numeric_cols:
+                values = buffer.column(col)[order]
+                if not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+                    values = values.astype(np.int64)
+                attributes[col] = values
+            else:
+                attributes[col] = pd.Categorical.from_codes(codes.pop(col), categories[col])
+    finally:
+        buffer.close()
+
+    if has_resource:
+        resource_codes, resources = codes[RESOURCE_KEY], categories[RESOURCE_KEY]
+    else:
+        resource_codes, resources = np.full(len(order), -1, dtype=np.int32), []
+
+    return ColumnarEventLog(
+        codes[CASE_KEY], codes[ACTIVITY_KEY], resource_codes, timestamps,
+        categories[CASE_KEY], categories[ACTIVITY_KEY], resources,
+        attributes=pd.DataFrame(attributes, index=pd.RangeIndex(len(order))), timezone=timezone
+    )
+
+
+@contextmanager
+def _open_xes(source):
+    """
+    Binary stream of an XES file (path or file-like), decompressing gzip (.xes.gz) on the fly.
+
+    File-like sources are rewound afterwards so they can be read again.
+    """
+    stream = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    try:
+        compressed = stream.read(2) == GZIP_MAGIC
+        stream.seek(0)
+        yield gzip.GzipFile(fileobj=stream, mode='rb') if compressed else stream
+    finally:
+        if stream is source:
+            stream.seek(0)
+        else:
+            stream.close()
+
+
+def _xes_attributes(element):
+    """
+    Direct attributes of an XES element as {key: (type, value)}; nested attributes are ignored.
+    """
+    attributes = {}
+    for child in element:
+        kind = child.tag.rsplit('}', 1)[-1]
+        if kind not in XES_VALUE_TYPES:
+            continue
+        value = child.get('value')
+        # Writers export missing values of float columns as NaN
+        if value is None or (kind == 'float' and value.lower() == 'nan'):
+            continue
+        attributes[child.get('key')] = (kind, value)
+    return attributes
+
+
+def iter_xes_traces(source):
+    """
+    Yield the (trace attributes, [event attributes]) of every trace of an XES file.
+
+    Parsing is incremental: elements are discarded once their trace has been
+    yielded, so only one trace is held in memory at a time.
+    """
+    with _open_xes(source) as stream:
+        context = ElementTree.iterparse(stream, events=('start', 'end'))
+        _, root = next(context)
+        events = []
+        for kind, element in context:
+            if kind != 'end':
+                continue
+            tag = element.tag.rsplit('}', 1)[-1]
+            if tag == 'event':
+                events.append(_xes_attributes(element))
+                element.clear()
+            elif tag == 'trace':
+                yield _xes_attributes(element), events
+                events = []
+                # Drop the finished trace from the tree
+                root.clear()
+
+
+def _xes_rows(trace, events, trace_index):
+    """
+    Flat rows of a trace's events: event attributes plus trace attributes prefixed with ``case:``.
+    """
+    trace_values = {f'case:{key}': value for key, value in trace.items()}
+    # Traces without a name are numbered in file order
+    trace_values.setdefault(CASE_KEY, ('string', str(trace_index)))
+    return [dict(event, **trace_values) for event in events]
+
+
+def _typed_column(values, types):
+    """
+    Convert XES attribute value strings to a column of the type their XES types agree on.
+
+    Integer attributes become int64 (float64 with NaN if some are missing),
+    numbers float64, complete booleans bool and dates UTC datetimes; any
+    other mix stays text. ``values`` holds None for missing values.
+    """
+    values = pd.Series(values, dtype=object)
+    if types and types <= {'int'} and values.notna().all():
+        return values.astype(np.int64).to_numpy()
+    if types and types <= {'int', 'float'}:
+        return pd.to_numeric(values).to_numpy(dtype=np.float64)
+    if types == {'boolean'} and values.notna().all():
+        return (values.str.lower() == 'true').to_numpy()
+    if types == {'date'}:
+        return pd.to_datetime(values, utc=True, format='ISO8601')
+    return values.to_numpy()
+
+
+def _typed_categories(categories, codes, types):
+    """
+    Column of typed values from dictionary codes; text columns stay categorical.
+    """
+    if not types or not types <= {'int', 'float', 'boolean', 'date'}:
+        return pd.Categorical.from_codes(codes, categories)
+    missing = codes < 0
+    if missing.any() and types == {'int'}:
+        # Missing integers need NaN
+        types = {'float'}
+    values = pd.Series(_typed_column(categories, types)).take(np.maximum(codes, 0))
+    values = values.reset_index(drop=True)
+    return values.where(~missing) if missing.any() else values
+
+
+def preview_xes(source, n_rows=5):
+    """
+    The first ``n_rows`` events of an XES file as a DataFrame, parsing no further than needed.
+    """
+    rows, types = [], {}
+    for trace_index, (trace, events) in enumerate(iter_xes_traces(source)):
+        rows.extend(_xes_rows(trace, events, trace_index))
+        if len(rows) >= n_rows:
+            break
+    rows = rows[:n_rows]
+    for row in rows:
+        for key, (kind, _) in row.items():
+            types.setdefault(key, set()).add(kind)
+    return pd.DataFrame({
+        key: _typed_column([row[key][1] if key in row else None for row in rows], kinds)
+        for key, kinds in types.items()
+    })
+
+
+def read_xes_columnar(source, memory_budget_mb=512, spill_dir=None):
+    """
+    Stream an XES or gzip-compressed XES file into a ColumnarEventLog with bounded working memory.
+
+    Traces are parsed one at a time and their events dictionary-encoded in
+    chunks, spilled to disk past half the budget as for CSV ingestion, so
+    the full object tree of the file never exists. Trace attributes become
+    ``case:`` columns as in PM4Py's dataframes; attribute columns get the
+    type their XES values agree on, and timestamps are stored in UTC.
+    """
+    budget_bytes = memory_budget_mb * 1024 * 1024
+    chunk_events = max(int(budget_bytes / 2 / XES_EVENT_BYTES), SAMPLE_ROWS)
+    encoders, types = {}, {}
+    timezone = parser = None
+
+    buffer = RunBuffer(budget_bytes / 2, spill_dir=spill_dir)
+
+    def flush(rows):
+        nonlocal timezone, parser
+        columns = {}
+        for row in rows:
+            for key, (kind, _) in row.items():
+                types.setdefault(key, set()).add(kind)
+        for key in types:
+            values = pd.Series([row[key][1] if key in row else None for row in rows], dtype=object)
+            if key == TIMESTAMP_KEY:
+                # XES dates are ISO 8601; chunks the first chunk's parser does not fit fall back
+                parser = parser or TimestampParser.infer(values, utc=True)
+                timestamps = parser.parse(values)
+                timezone = timestamps.tz
+                columns[key] = timestamps.as_unit('ns').asi8
+            else:
+                columns[key] = encoders.setdefault(key, CategoryEncoder()).encode(values)
+        buffer.add(columns)
+
+    try:
+        rows = []
+        for trace_index, (trace, events) in enumerate(iter_xes_traces(source)):
+            rows.extend(_xes_rows(trace, events, trace_index))
+            if len(rows) >= chunk_events:
+                flush(rows)
+                rows = []
+        if rows:
+            flush(rows)
+
+        for col in (CASE_KEY, ACTIVITY_KEY, TIMESTAMP_KEY):
+            if col not in types:
+                raise ValueError(f"Missing required attribute: {col}")
+        categories, codes, timestamps, order = _sort_encoded(buffer, encoders)
+
+        attributes = {
+            col: _typed_categories(categories[col], codes.pop(col), types[col])
+            for col in types if col not in (CASE_KEY, ACTIVITY_KEY, TIMESTAMP_KEY, RESOURCE_KEY)
+        }
+    finally:
+        buffer.close()
+
+    if RESOURCE_KEY in codes:
+        resource_codes, resources = codes[RESOURCE_KEY], categories[RESOURCE_KEY]
+    else:
+        resource_codes, resources = np.full(len(order), -1, dtype=np.int32), []
+
+    return ColumnarEventLog(
+        codes[CASE_KEY], codes[ACTIVITY_KEY], resource_codes, timestamps,
+        categories[CASE_KEY], categories[ACTIVITY_KEY], resources,
+        attributes=pd.DataFrame(attributes, index=pd.RangeIndex(len(order))), timezone=timezone
+    )
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from process_mining.incremental import append_events
+from utils.columnar_log import ColumnarEventLog
+
+# Bump when the processing pipeline changes so stale entries are not reused
+STORE_VERSION = 3
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+EVENT_COLUMNS = ['case_code', 'activity_code', 'resource_code', 'timestamp']
+DICTIONARIES = ['cases', 'activities', 'resources']
+
+
+def _write_table(path, table):
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_table(path):
+    """
+    Memory-map an Arrow IPC file; numeric columns are then zero-copy.
+    """
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def _column_array(table, name):
+    column = table.column(name)
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=False)
+    return column.combine_chunks().to_numpy(zero_copy_only=False)
+
+
+class LogStore:
+    """
+    On-disk store of processed columnar logs, keyed by input content and column mapping.
+
+    A log with batches appended is stored under a key derived from its
+    parent's key and the batch (see ``append``), next to its parent.
+
+    Each log is a directory holding ``events.arrow`` (codes, timestamps and
+    attributes), ``case_attributes.arrow`` (attributes stored once per case),
+    one Arrow IPC file per dictionary and ``meta.json``.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def make_key(self, source, column_mapping=None):
+        """
+        Hash the raw input (path, bytes or file-like) together with the column mapping.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps(
+            {'version': STORE_VERSION, 'mapping': column_mapping or {}}, sort_keys=True
+        ).encode())
+        if isinstance(source, (bytes, bytearray)):
+            digest.update(source)
+        elif isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                    digest.update(block)
+        else:
+            position = source.tell()
+            for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+            source.seek(position)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def contains(self, key):
+        return os.path.exists(os.path.join(self._path(key), 'meta.json'))
+
+    def save(self, key, log, name=None, column_mapping=None):
+        """
+        Persist a columnar log under ``key`` and return its metadata entry.
+
+        ``column_mapping`` is remembered so batches appended later can be
+        mapped the same way.
+        """
+        meta = {
+            'key': key,
+            'name': name or key[:12],
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'column_mapping': column_mapping,
+        }
+        return self._write(key, log, meta)
+
+    def contains_source(self, key):
+        """
+        Whether ``key`` holds the log built from the input it hashes, not one with batches appended.
+
+        Entries that older versions appended to in place are not.
+        """
+        if not self.contains(key):
+            return False
+        meta = self.meta(key)
+        return meta.get('parent') is None and not meta.get('appended_batches')
+
+    def make_append_key(self, key, batch):
+        """
+        Key of the log stored under ``key`` with ``batch`` appended.
+
+        Derived from the parent key and the batch content, so it never equals
+        the key of an uploaded file.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps({'version': STORE_VERSION, 'parent': key}, sort_keys=True).encode())
+        digest.update(repr(list(batch.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(batch, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def append(self, key, batch, log=None):
+        """
+        Append a batch of events to a stored log and persist the result under a new key.
+
+        ``batch`` is a DataFrame with PM4Py column names. Only the cases the
+        batch touches are recomputed (see ``append_events``); pass the already
+        loaded ``log`` so the derived structures built on it are carried over
+        too. The entry under ``key`` is kept; the new one records it as its
+        ``parent``. Returns the new log and its metadata entry.
+        """
+        parent = self.meta(key)
+        new_key = self.make_append_key(key, batch)
+        if log is None:
+            log = self.load(key)
+        log, _ = append_events(log, batch)
+        batches = parent.get('appended_batches', 0) + 1
+        source_name = parent.get('source_name', parent['name'])
+        meta = dict(
+            parent, key=new_key, parent=key, source_name=source_name,
+            name=f"{source_name} + {batches} batch{'es' if batches > 1 else ''}",
+            created=datetime.now().isoformat(timespec='seconds'), appended_batches=batches
+        )
+        return log, self._write(new_key, log, meta)
+
+    def meta(self, key):
+        if not self.contains(key):
+            raise ValueError(f"No stored log for key {key}")
+        with open(os.path.join(self._path(key), 'meta.json')) as f:
+            return json.load(f)
+
+    def _write(self, key, log, meta):
+        tmp_path = self._path(key) + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        events = pa.Table.from_pandas(log.attributes, preserve_index=False)
+        codes = [log.case_codes, log.activity_codes, log.resource_codes, log.timestamps]
+        for position, (column, values) in enumerate(zip(EVENT_COLUMNS, codes)):
+            events = events.add_column(position, column, pa.array(values))
+        _write_table(os.path.join(tmp_path, 'events.arrow'), events)
+        _write_table(os.path.join(tmp_path, 'case_attributes.arrow'),
+                     pa.Table.from_pandas(log.case_attributes, preserve_index=False))
+
+        for dictionary in DICTIONARIES:
+            values = pa.array(getattr(log, dictionary).tolist())
+            _write_table(os.path.join(tmp_path, f"{dictionary}.arrow"),
+                         pa.table({'value': values}))
+
+        meta = dict(meta, n_cases=log.n_cases, n_events=log.n_events,
+                    timezone=str(log.timezone) if log.timezone is not None else None)
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        # Swap in atomically so readers never see a half-written entry
+        shutil.rmtree(self._path(key), ignore_errors=True)
+        os.replace(tmp_path, self._path(key))
+        return meta
+
+    def load(self, key):
+        """
+        Load a stored log, memory-mapping its code and timestamp columns.
+        """
+        meta = self.meta(key)
+        path = self._path(key)
+
+        events = _read_table(os.path.join(path, 'events.arrow'))
+        case_codes, activity_codes, resource_codes, timestamps = (
+            _column_array(events, column) for column in EVENT_COLUMNS
+        )
+        dictionaries = {
+            dictionary: np.asarray(
+                _read_table(os.path.join(path, f"{dictionary}.arrow")).column('value').to_pylist(),
+                dtype=object
+            )
+            for dictionary in DICTIONARIES
+        }
+        attributes = events.drop_columns(EVENT_COLUMNS).to_pandas()
+        attributes.index = pd.RangeIndex(len(attributes))
+        case_attributes = None
+        # Logs stored before case-level attributes have no such file
+        if os.path.exists(os.path.join(path, 'case_attributes.arrow')):
+            case_attributes = _read_table(os.path.join(path, 'case_attributes.arrow')).to_pandas()
+            case_attributes.index = pd.RangeIndex(len(case_attributes))
+
+        return ColumnarEventLog(
+            case_codes, activity_codes, resource_codes, timestamps,
+            dictionaries['cases'], dictionaries['activities'], dictionaries['resources'],
+            attributes=attributes, timezone=meta['timezone'], case_attributes=case_attributes
+        )
+
+    def list_logs(self):
+        """
+        Metadata of all stored logs, most recent first.
+        """
+        entries = []
+        for key in os.listdir(self.root):
+            meta_path = os.path.join(self.root, key, 'meta.json')
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    entries.append(json.load(f))
+        return sorted(entries, key=lambda entry: entry['created'], reverse=True)
+
+    def delete(self, key):
+        shutil.rmtree(self._path(key), ignore_errors=True)
@@ -0,0 +1,290 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+# Completed spans kept for the panel and exports; older ones are dropped
+MAX_SPANS = 10_000
+# Interval between resident-memory samples while a stage is running
+SAMPLE_INTERVAL = 0.005
+
+# Session (one browser session of the app) the running code records for; None outside the app
+_session = contextvars.ContextVar('profiling_session', default=None)
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def current_rss():
+    """
+    Resident memory of this process in bytes, or None where it cannot be read cheaply.
+    """
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Span:
+    """
+    One timed stage: name, category, wall time, row count and peak memory growth.
+    """
+    __slots__ = ('name', 'category', 'start', 'duration', 'rows', 'start_rss', 'peak_rss',
+                 'thread', 'depth', 'session')
+
+    def __init__(self, name, category, rows, start_rss, thread, depth, session):
+        self.name = name
+        self.category = category
+        self.rows = rows
+        self.start_rss = start_rss
+        self.peak_rss = start_rss
+        self.thread = thread
+        self.depth = depth
+        self.session = session
+        self.start = time.perf_counter()
+        self.duration = None
+
+    @property
+    def peak_memory_mb(self):
+        if self.start_rss is None or self.peak_rss is None:
+            return None
+        return (self.peak_rss - self.start_rss) / 1024 ** 2
+
+    def to_dict(self, origin):
+        return {
+            'name': self.name,
+            'category': self.category,
+            'start_ms': (self.start - origin) * 1000,
+            'duration_ms': self.duration * 1000,
+            'rows': self.rows,
+            'peak_memory_mb': self.peak_memory_mb,
+            'thread': self.thread,
+            'depth': self.depth,
+            'session': self.session
+        }
+
+
+class _NullSpan:
+    """
+    Stand-in returned while profiling is off; accepts and ignores row counts.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _ActiveStage:
+    __slots__ = ('profiler', 'span')
+
+    def __init__(self, profiler, span):
+        self.profiler = profiler
+        self.span = span
+
+    def __enter__(self):
+        return self.span
+
+    def __exit__(self, *exc):
+        self.profiler._finish(self.span)
+        return False
+
+
+class Profiler:
+    """
+    Collect per-stage timings, row counts and peak resident memory.
+
+    Profiling is switched on per session: code run after ``bind_session``
+    records spans tagged with that session only while the session has
+    called ``enable``, and ``spans`` and its exports return the current
+    session's spans. Threads started through ``contextvars.copy_context``
+    keep the session. ``stage`` and ``profiled`` cost a set and a context
+    variable lookup while disabled. While any session is enabled, a daemon
+    thread samples resident memory so every open stage records its peak
+    growth over its starting footprint; the memory is the process's, so
+    stages of sessions running at the same time see each other's
+    allocations. Spans are kept in a bounded buffer and export to JSON or
+    the Chrome trace-event format.
+    """
+
+    def __init__(self, enabled=False):
+        self._sessions = set()
+        self._spans = deque(maxlen=MAX_SPANS)
+        self._open = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sampler = None
+        self._origin = time.perf_counter()
+        if enabled:
+            self.enable()
+
+    @staticmethod
+    def bind_session(session_id):
+        """
+        Record the stages run from now on in this context (thread or task) for ``session_id``.
+        """
+        _session.set(session_id)
+
+    @property
+    def enabled(self):
+        return bool(self._sessions) and _session.get() in self._sessions
+
+    def enable(self):
+        """
+        Switch profiling on for the current session.
+        """
+        with self._lock:
+            self._sessions.add(_session.get())
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._sample, name='profiler-sampler', daemon=True)
+                self._sampler.start()
+
+    def disable(self):
+        """
+        Switch profiling off for the current session; other sessions keep recording.
+        """
+        # The sampler thread notices no session is left and exits on its next wake-up
+        with self._lock:
+            self._sessions.discard(_session.get())
+
+    def _sample(self):
+        while self._sessions:
+            rss = current_rss()
+            if rss is not None:
+                with self._lock:
+                    for span in self._open:
+                        if span.peak_rss is None or rss > span.peak_rss:
+                            span.peak_rss = rss
+            time.sleep(SAMPLE_INTERVAL)
+
+    def stage(self, name, category='analysis', rows=None):
+        """
+        Context manager timing one stage; set ``.rows`` on the returned span to record a row count.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        span = Span(name, category, rows, current_rss(), threading.get_ident(), depth, _session.get())
+        with self._lock:
+            self._open.add(span)
+        return _ActiveStage(self, span)
+
+    def _finish(self, span):
+        span.duration = time.perf_counter() - span.start
+        rss = current_rss()
+        self._local.depth = span.depth
+        with self._lock:
+            self._open.discard(span)
+            if rss is not None and (span.peak_rss is None or rss > span.peak_rss):
+                span.peak_rss = rss
+            self._spans.append(span)
+
+    def mark(self):
+        """
+        Current profiler clock, to select the spans recorded after this point.
+        """
+        return time.perf_counter()
+
+    def spans(self, since=None):
+        """
+        The current session's completed spans, optionally only those started after ``since``.
+        """
+        session = _session.get()
+        with self._lock:
+            return [span.to_dict(self._origin) for span in self._spans
+                    if span.session == session and (since is None or span.start >= since)]
+
+    def summary(self, since=None):
+        """
+        Per-stage totals: calls, total/mean/max milliseconds, rows and peak memory growth.
+        """
+        spans = pd.DataFrame(self.spans(since))
+        if spans.empty:
+            return spans
+        return spans.groupby(['category', 'name'], sort=False).agg(
+            calls=('duration_ms', 'count'),
+            total_ms=('duration_ms', 'sum'),
+            mean_ms=('duration_ms', 'mean'),
+            max_ms=('duration_ms', 'max'),
+            rows=('rows', 'max'),
+            peak_memory_mb=('peak_memory_mb', 'max')
+        ).reset_index().sort_values('total_ms', ascending=False)
+
+    def to_json(self, since=None):
+        return json.dumps({'spans': self.spans(since)}, indent=2, default=str)
+
+    def to_trace_events(self, since=None):
+        """
+        Spans in the Chrome trace-event format (load in chrome://tracing or Perfetto).
+        """
+        pid = os.getpid()
+        events = []
+        for span in self.spans(since):
+            events.append({
+                'name': span['name'],
+                'cat': span['category'],
+                'ph': 'X',
+                'ts': span['start_ms'] * 1000,
+                'dur': span['duration_ms'] * 1000,
+                'pid': pid,
+                'tid': span['thread'],
+                'args': {'rows': span['rows'], 'peak_memory_mb': span['peak_memory_mb']}
+            })
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, default=str)
+
+    def reset(self):
+        """
+        Drop the current session's spans.
+        """
+        session = _session.get()
+        with self._lock:
+            kept = [span for span in self._spans if span.session != session]
+            self._spans.clear()
+            self._spans.extend(kept)
+
+
+def _row_count(value):
+    rows = getattr(value, 'n_events', None)
+    if rows is None and hasattr(value, '__len__'):
+        rows = len(value)
+    return rows
+
+
+def profiled(name, category='analysis'):
+    """
+    Time a method as one stage, recording the row count of its first argument.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not profiler.enabled:
+                return method(self, *args, **kwargs)
+            with profiler.stage(name, category) as span:
+                if args:
+                    span.rows = _row_count(args[0])
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Process-wide profiler used by all instrumented stages, enabled per session
+profiler = Profiler()
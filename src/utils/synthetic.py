@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+# Activities of the documented insurance claims process, in flow order
+BASE_ACTIVITIES = [
+    'register request', 'examine casually', 'examine thoroughly', 'check ticket',
+    'request additional info', 'decide', 'pay compensation', 'reject request'
+]
+REQUEST_TYPES = ['SIMPLE', 'COMPLEX', 'URGENT']
+CLAIM_CATEGORIES = ['MEDICAL', 'PROPERTY', 'LIABILITY']
+CUSTOMER_SEGMENTS = ['PREMIUM', 'STANDARD', 'NEW']
+RISK_LEVELS = ['LOW', 'MEDIUM', 'HIGH']
+
+
+def generate_event_log(n_cases=1000, events_per_case=8, n_activities=len(BASE_ACTIVITIES),
+                       n_resources=20, loop_probability=0.15, noise_probability=0.05,
+                       start='2024-01-01', span_days=365, seed=0):
+    """
+    Generate a reproducible synthetic event log with the schema of ``enhanced_event_log.csv``.
+
+    Cases walk forward through the activity alphabet, jump back one or two
+    activities with ``loop_probability`` (rework loops) and to a random
+    activity with ``noise_probability``; cases still running after the last
+    activity are reworked from an earlier one. Case lengths are Poisson around
+    ``events_per_case`` (at least 2). Alphabets larger than the documented
+    process are padded with generic activities. Returns a DataFrame with
+    PM4Py column names; the same arguments always give the same log.
+    """
+    rng = np.random.default_rng(seed)
+    activities = np.array(
+        BASE_ACTIVITIES[:n_activities]
+        + [f'activity {i + 1}' for i in range(max(n_activities - len(BASE_ACTIVITIES), 0))],
+        dtype=object
+    )
+    resources = np.array([f'Resource_{i + 1:03d}' for i in range(n_resources)], dtype=object)
+
+    lengths = np.maximum(rng.poisson(events_per_case, n_cases), 2)
+    n_events = int(lengths.sum())
+    offsets = np.zeros(n_cases + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    case_of_event = np.repeat(np.arange(n_cases), lengths)
+    position = np.arange(n_events) - offsets[case_of_event]
+
+    # Random walk over the alphabet, advanced one event position at a time for all cases
+    activity_codes = np.zeros(n_events, dtype=np.int64)
+    state = np.zeros(n_cases, dtype=np.int64)
+    last = n_activities - 1
+    for step in range(1, int(lengths.max())):
+        active = np.flatnonzero(lengths > step)
+        draw = rng.random(len(active))
+        current = state[active]
+        forward = np.minimum(current + 1 + (rng.random(len(active)) < 0.3), last)
+        back = np.maximum(current - rng.integers(1, 3, len(active)), 1)
+        jump = rng.integers(0, n_activities, len(active))
+        # Cases that reached the final activity but continue are reworked
+        forward = np.where(current >= last, back, forward)
+        state[active] = np.where(
+            draw < noise_probability, jump,
+            np.where(draw < noise_probability + loop_probability, back, forward)
+        )
+        activity_codes[offsets[active] + step] = state[active]
+
+    # Case start spread over the time span, activity-dependent exponential gaps
+    case_start = pd.Timestamp(start).value + rng.integers(
+        0, span_days * 86400, n_cases, dtype=np.int64
+    ) * 10**9
+    mean_gap_seconds = rng.uniform(600, 8 * 3600, n_activities)
+    gaps = np.round(rng.exponential(mean_gap_seconds[activity_codes])).astype(np.int64) * 10**9
+    gaps[position == 0] = 0
+    elapsed = np.cumsum(gaps)
+    elapsed -= np.repeat(elapsed[offsets[:-1]], lengths)
+    timestamps = case_start[case_of_event] + elapsed
+
+    # Each activity is handled by a small pool of resources
+    pool_size = max(n_resources // max(n_activities, 1), 3)
+    resource_codes = (activity_codes * pool_size + rng.integers(0, pool_size, n_events)) % n_resources
+    base_costs = rng.integers(20, 500, n_activities)
+    costs = np.round(base_costs[activity_codes] * rng.lognormal(0, 0.25, n_events)).astype(np.int64)
+
+    def case_attribute(values):
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), n_cases)][case_of_event]
+
+    claim_values = np.round(rng.lognormal(8, 0.8, n_cases), -1).astype(np.int64)
+    return pd.DataFrame({
+        'case:concept:name': case_of_event + 1,
+        'concept:name': activities[activity_codes],
+        'time:timestamp': pd.to_datetime(timestamps, unit='ns'),
+        'org:resource': resources[resource_codes],
+        'costs': costs,
+        'request_type': case_attribute(REQUEST_TYPES),
+        'claim_category': case_attribute(CLAIM_CATEGORIES),
+        'customer_segment': case_attribute(CUSTOMER_SEGMENTS),
+        'claim_value': claim_values[case_of_event],
+        'risk_level': case_attribute(RISK_LEVELS),
+    })
+
+
+def generate_event_log_by_events(n_events, events_per_case=8, **kwargs):
+    """
+    Generate a synthetic log of about ``n_events`` events (see ``generate_event_log``).
+    """
+    n_cases = max(int(round(n_events / events_per_case)), 1)
+    return generate_event_log(n_cases=n_cases, events_per_case=events_per_case, **kwargs)
@@ -0,0 +1,198 @@
+import json
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.profiling import profiler
+
+SAMPLE_ROWS = 1000
+# ISO columns with at most this share of distinct values in the sample are parsed once
+# per distinct value; other formats go through strptime, where that always pays off
+UNIQUE_RATIO = 0.5
+# Inferred formats remembered, by column mapping and column
+MAX_CACHED_FORMATS = 256
+
+# Formats tried in order; the first that parses the whole sample wins. ISO 8601
+# text of any precision, with 'T' or ' ', with or without an offset, is one format
+CANDIDATE_FORMATS = [
+    'ISO8601',
+    '%d.%m.%Y %H:%M:%S',
+    '%d.%m.%Y %H:%M',
+    '%d.%m.%Y',
+    '%d/%m/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%m/%d/%Y %H:%M',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+]
+# Upper bounds of epoch values in each unit, for timestamps before the year 5000
+EPOCH_UNITS = [('s', 1e11), ('ms', 1e14), ('us', 1e17), ('ns', np.inf)]
+NS_PER_UNIT = {'s': 10**9, 'ms': 10**6, 'us': 10**3, 'ns': 1}
+
+_UTC_OFFSET = re.compile(r'(?:Z|[+-]\d{2}:?\d{2})$')
+_DIGITS = re.compile(r'^-?\d+(?:\.\d*)?$')
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class TimestampParser:
+    """
+    Parse a timestamp column with a format inferred once from a sample.
+
+    ``format`` is a strftime format or 'ISO8601'; ``unit`` is set instead
+    for epoch numbers. Text with UTC offsets is parsed to UTC (``utc``).
+    With ``unique``, every distinct value is parsed once and mapped back to
+    the events; pandas parses ISO formats fast enough that this only pays
+    off for columns with many repeated values. Values the inferred format
+    does not fit, e.g. in rows after the sample, are parsed with a format
+    inferred from those values, or failing that by pandas' mixed-format parser.
+    """
+
+    def __init__(self, format=None, unit=None, utc=False, unique=False):
+        self.format = format
+        self.unit = unit
+        self.utc = utc
+        self.unique = unique
+
+    @classmethod
+    def infer(cls, values, utc=False):
+        """
+        Parser for a sample of a column, raising ValueError if no known format fits.
+        """
+        sample = pd.Series(values).dropna().head(SAMPLE_ROWS)
+        if pd.api.types.is_datetime64_any_dtype(sample):
+            return cls(utc=utc or getattr(sample.dt, 'tz', None) is not None)
+        if not len(sample):
+            return cls(format='ISO8601', utc=utc)
+        unique = sample.nunique() <= UNIQUE_RATIO * len(sample)
+
+        if pd.api.types.is_numeric_dtype(sample) or sample.astype(str).str.match(_DIGITS).all():
+            magnitude = np.abs(pd.to_numeric(sample)).median()
+            unit = next(unit for unit, bound in EPOCH_UNITS if magnitude < bound)
+            return cls(unit=unit, utc=utc)
+
+        text = sample.astype(str)
+        utc = utc or bool(text.str.contains(_UTC_OFFSET).any())
+        for candidate in CANDIDATE_FORMATS:
+            parser = cls(format=candidate, utc=utc, unique=unique or candidate != 'ISO8601')
+            try:
+                parser._parse_text(text)
+            except (ValueError, TypeError, OverflowError):
+                continue
+            return parser
+        raise ValueError(f"Unrecognized timestamp format, e.g. {text.iloc[0]!r}")
+
+    def _parse_text(self, values):
+        return pd.to_datetime(values, format=self.format, utc=self.utc)
+
+    def parse(self, values):
+        """
+        Parse a column (Series or array) to a DatetimeIndex.
+        """
+        values = pd.Series(values)
+        try:
+            return self._parse(values)
+        except (ValueError, TypeError, OverflowError):
+            return self._parse_fallback(values)
+
+    def _parse(self, values):
+        """
+        Parse with this parser's format only, raising if any value does not fit.
+        """
+        if pd.api.types.is_datetime64_any_dtype(values):
+            parsed = pd.DatetimeIndex(values)
+            if self.utc and parsed.tz is None:
+                parsed = parsed.tz_localize('UTC')
+            return parsed
+
+        if self.unit is not None:
+            numbers = pd.to_numeric(values)
+            if pd.api.types.is_integer_dtype(numbers):
+                # Scale integers to nanoseconds directly instead of going through floats
+                ns = numbers.to_numpy(dtype=np.int64) * NS_PER_UNIT[self.unit]
+                parsed = pd.DatetimeIndex(ns.view('datetime64[ns]'))
+            else:
+                parsed = pd.DatetimeIndex(pd.to_datetime(numbers, unit=self.unit))
+            return parsed.tz_localize('UTC') if self.utc else parsed
+
+        if self.unique:
+            codes, uniques = pd.factorize(values)
+            parsed = pd.DatetimeIndex(self._parse_text(pd.Series(uniques, dtype=object)))
+            parsed = parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+        else:
+            parsed = pd.DatetimeIndex(self._parse_text(values))
+        return parsed
+
+    def _parse_fallback(self, values):
+        """
+        Parse values this parser's format does not all fit: those that fit with it,
+        the others with a format inferred from them or pandas' mixed-format parser.
+        """
+        if self.unit is not None:
+            fits = pd.to_numeric(values, errors='coerce').notna()
+        elif self.format is not None:
+            fits = pd.Series(pd.to_datetime(values, format=self.format, utc=self.utc, errors='coerce'),
+                             index=values.index).notna()
+        else:
+            fits = pd.Series(False, index=values.index)
+        dtype = 'datetime64[ns, UTC]' if self.utc else 'datetime64[ns]'
+        parsed = pd.Series(pd.NaT, index=values.index, dtype=dtype)
+        parsed[fits] = self._parse(values[fits])
+
+        rest = values[~fits & values.notna()]
+        try:
+            parsed[rest.index] = TimestampParser.infer(rest, utc=self.utc)._parse(rest)
+        except (ValueError, TypeError, OverflowError):
+            parsed[rest.index] = pd.to_datetime(rest, format='mixed', utc=self.utc)
+        return pd.DatetimeIndex(parsed)
+
+    def __repr__(self):
+        kind = f"unit={self.unit!r}" if self.unit is not None else f"format={self.format!r}"
+        return f"TimestampParser({kind}, utc={self.utc}, unique={self.unique})"
+
+
+def _cache_key(column_mapping, column):
+    if column_mapping is None:
+        return None
+    return json.dumps({'mapping': column_mapping, 'column': column}, sort_keys=True)
+
+
+def timestamp_parser(values, column_mapping=None, column=None, utc=False):
+    """
+    Parser for a timestamp column, reusing the one inferred earlier for the same column mapping.
+
+    The cached parser is checked against the sample of ``values`` first and
+    inferred again if its format no longer fits.
+    """
+    key = _cache_key(column_mapping, column)
+    with _cache_lock:
+        parser = _cache.get(key) if key is not None else None
+        if parser is not None:
+            _cache.move_to_end(key)
+    if parser is not None:
+        try:
+            parser._parse(pd.Series(values).dropna().head(SAMPLE_ROWS))
+            return parser
+        except (ValueError, TypeError, OverflowError):
+            pass
+
+    parser = TimestampParser.infer(values, utc=utc)
+    if key is not None:
+        with _cache_lock:
+            _cache[key] = parser
+            while len(_cache) > MAX_CACHED_FORMATS:
+                _cache.popitem(last=False)
+    return parser
+
+
+def parse_timestamps(values, column_mapping=None, column=None, utc=False):
+    """
+    Parse a timestamp column to a DatetimeIndex with an inferred, cached format.
+    """
+    with profiler.stage('parse timestamps', category='ingest', rows=len(values)):
+        return timestamp_parser(values, column_mapping, column, utc=utc).parse(values)
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+# Cases drawn individually before a timeline switches to an aggregated overview
+MAX_TIMELINE_CASES = 2000
+TIMELINE_BINS = 200
+# Duration distributions draw every point as Scattergl only up to this many values
+FULL_POINT_LIMIT = 5000
+DISTRIBUTION_BINS = 50
+MAX_OUTLIER_POINTS = 500
+
+
+def longest_cases(durations, max_cases, candidates=None):
+    """
+    Indices of the ``max_cases`` longest cases, longest first.
+
+    ``candidates`` restricts the choice to a subset of case indices. All
+    candidates are returned when they fit.
+    """
+    durations = np.asarray(durations)
+    if candidates is None:
+        candidates = np.arange(len(durations))
+    candidates = np.asarray(candidates)
+    if len(candidates) > max_cases:
+        top = np.argpartition(-durations[candidates], max_cases - 1)[:max_cases]
+        candidates = candidates[top]
+    return candidates[np.argsort(-durations[candidates], kind='stable')]
+
+
+def bin_by_time(times, values, n_bins=TIMELINE_BINS):
+    """
+    Histogram of int64 ns ``times`` with count, mean and max of ``values`` per bin.
+
+    Returns a DataFrame with ``bin_start``/``bin_end`` (int64 ns), ``count``,
+    ``mean`` and ``max``; empty bins have count 0 and NaN statistics.
+    """
+    times = np.asarray(times, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(times) == 0:
+        return pd.DataFrame(columns=['bin_start', 'bin_end', 'count', 'mean', 'max'])
+    low, high = int(times.min()), int(times.max())
+    edges = np.linspace(low, high + 1, n_bins + 1).astype(np.int64)
+    bins = np.clip(np.searchsorted(edges, times, side='right') - 1, 0, n_bins - 1)
+
+    counts = np.bincount(bins, minlength=n_bins)
+    sums = np.bincount(bins, weights=values, minlength=n_bins)
+    maxima = np.full(n_bins, -np.inf)
+    np.maximum.at(maxima, bins, values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    return pd.DataFrame({
+        'bin_start': edges[:-1],
+        'bin_end': edges[1:],
+        'count': counts,
+        'mean': means,
+        'max': np.where(counts > 0, maxima, np.nan)
+    })
+
+
+def segment_coordinates(starts, ends, rows):
+    """
+    Coordinates of one horizontal segment per case for a single line trace.
+
+    Every case contributes (start, row), (end, row) and a gap point, so
+    thousands of cases draw as one WebGL trace instead of one trace each.
+    """
+    n = len(starts)
+    x = np.empty(3 * n, dtype=np.int64)
+    x[0::3], x[1::3], x[2::3] = starts, ends, ends
+    y = np.empty(3 * n, dtype=object)
+    y[0::3], y[1::3], y[2::3] = rows, rows, None
+    return x, y
+
+
+def duration_summary(values, n_bins=DISTRIBUTION_BINS, max_outliers=MAX_OUTLIER_POINTS, seed=0):
+    """
+    Quantiles, histogram and a stratified outlier sample of a duration array.
+
+    Outliers lie outside the Tukey fences (1.5 IQR beyond the quartiles);
+    ``lower_fence``/``upper_fence`` are the whisker ends, the most extreme
+    values inside the fences. When there are more than ``max_outliers``
+    outliers, each histogram bin keeps a share proportional to its outlier
+    count, at least one while the cap allows, so extreme but rare values
+    stay visible; at most ``max_outliers`` are kept. Returns a dict with
+    ``count``, ``mean``, ``quantiles`` (min, q1, median, q3, p90, p99,
+    max), the fences, ``histogram`` (counts and edges), the sampled
+    ``outlier_index`` and the total ``outlier_count``.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid_index = np.flatnonzero(~np.isnan(values))
+    finite = values[valid_index]
+    if len(finite) == 0:
+        return None
+
+    q = np.quantile(finite, [0, 0.25, 0.5, 0.75, 0.9, 0.99, 1])
+    quantiles = dict(zip(['min', 'q1', 'median', 'q3', 'p90', 'p99', 'max'], q))
+    iqr = quantiles['q3'] - quantiles['q1']
+    lower_fence = finite[finite >= quantiles['q1'] - 1.5 * iqr].min()
+    upper_fence = finite[finite <= quantiles['q3'] + 1.5 * iqr].max()
+    counts, edges = np.histogram(finite, bins=n_bins)
+
+    outliers = np.flatnonzero((finite < lower_fence) | (finite > upper_fence))
+    outlier_count = len(outliers)
+    if outlier_count > max_outliers:
+        rng = np.random.default_rng(seed)
+        strata = np.clip(np.searchsorted(edges, finite[outliers], side='right') - 1, 0, n_bins - 1)
+        per_stratum = np.bincount(strata, minlength=n_bins)
+        quota = np.maximum(np.floor(per_stratum * max_outliers / outlier_count), per_stratum > 0)
+        # The minimum of one can overshoot the cap; take back from the largest quotas,
+        # then from the fullest bins, which are the least extreme
+        for _ in range(int(quota.sum()) - max_outliers):
+            quota[np.lexsort((per_stratum, quota))[-1]] -= 1
+        # Random order within each stratum, then keep the first `quota` of each
+        order = np.lexsort((rng.random(outlier_count), strata))
+        rank = np.arange(outlier_count) - np.repeat(np.cumsum(per_stratum) - per_stratum, per_stratum)
+        outliers = np.sort(outliers[order][rank < quota[strata[order]]])
+
+    return {
+        'count': len(finite),
+        'mean': float(finite.mean()),
+        'quantiles': quantiles,
+        'lower_fence': lower_fence,
+        'upper_fence': upper_fence,
+        'histogram': {'counts': counts, 'edges': edges},
+        'outlier_index': valid_index[outliers],
+        'outlier_count': outlier_count
+    }
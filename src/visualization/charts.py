@@ -1,54 +1,111 @@
 import plotly.graph_objects as go
 import plotly.express as px
+from plotly.subplots import make_subplots
 import pandas as pd
+import numpy as np
 import streamlit as st
 import pm4py
 
+from utils.columnar_log import as_columnar_log
+from utils.profiling import profiled, profiler
+from visualization.aggregation import (
+    MAX_TIMELINE_CASES, TIMELINE_BINS, FULL_POINT_LIMIT, DISTRIBUTION_BINS, MAX_OUTLIER_POINTS,
+    bin_by_time, duration_summary, longest_cases, segment_coordinates
+)
+
 class ChartGenerator:
-    def __init__(self):
-        pass
+    def __init__(self, max_timeline_cases=MAX_TIMELINE_CASES, timeline_bins=TIMELINE_BINS,
+                 full_point_limit=FULL_POINT_LIMIT, distribution_bins=DISTRIBUTION_BINS,
+                 max_outlier_points=MAX_OUTLIER_POINTS):
+        self.max_timeline_cases = max_timeline_cases
+        self.timeline_bins = timeline_bins
+        self.full_point_limit = full_point_limit
+        self.distribution_bins = distribution_bins
+        self.max_outlier_points = max_outlier_points
 
+    @profiled('ChartGenerator.create_cycle_time_chart', category='render')
     def create_cycle_time_chart(self, cycle_times):
         """
-        Create a combined box plot and scatter plot of cycle times.
+        Create a box plot of cycle times with the individual cases or their distribution.
+
+        ``cycle_times`` is a list of (case id, hours) pairs or a Series of hours
+        indexed by case id. Box statistics are computed server-side. Up to
+        ``full_point_limit`` cases every case is drawn with Scattergl; above it,
+        a histogram and a stratified sample of the outliers replace the points.
         """
         try:
-            df = pd.DataFrame(cycle_times, columns=['Case ID', 'Duration (hours)'])
-            
-            # Create a figure with secondary y-axis
-            fig = go.Figure()
+            if isinstance(cycle_times, pd.Series):
+                case_ids, durations = cycle_times.index.to_numpy(), cycle_times.to_numpy(dtype=float)
+            else:
+                df = pd.DataFrame(cycle_times, columns=['Case ID', 'Duration (hours)'])
+                case_ids, durations = df['Case ID'].to_numpy(), df['Duration (hours)'].to_numpy(dtype=float)
             
-            # Add box plot
-            fig.add_trace(go.Box(
-                y=df['Duration (hours)'],
+            summary = duration_summary(durations, self.distribution_bins, self.max_outlier_points)
+            if summary is None:
+                st.info("No case durations to show.")
+                return None
+            quantiles = summary['quantiles']
+            box = go.Box(
                 name='Distribution',
-                boxpoints='all',
-                jitter=0.3,
-                pointpos=-1.8
-            ))
+                q1=[quantiles['q1']],
+                median=[quantiles['median']],
+                q3=[quantiles['q3']],
+                lowerfence=[summary['lower_fence']],
+                upperfence=[summary['upper_fence']],
+                mean=[summary['mean']],
+                boxpoints=False
+            )
             
-            # Add scatter plot for individual cases
-            fig.add_trace(go.Scatter(
-                x=df['Case ID'],
-                y=df['Duration (hours)'],
-                mode='markers',
-                name='Individual Cases',
-                marker=dict(size=8)
-            ))
+            if len(durations) <= self.full_point_limit:
+                fig = go.Figure(box)
+                fig.add_trace(go.Scattergl(
+                    x=case_ids.astype(str),
+                    y=durations,
+                    mode='markers',
+                    name='Individual Cases',
+                    marker=dict(size=8)
+                ))
+                title = 'Case Cycle Times'
+            else:
+                outliers = summary['outlier_index']
+                fig = make_subplots(rows=1, cols=2, column_widths=[0.35, 0.65],
+                                    subplot_titles=('Distribution', 'Histogram'))
+                fig.add_trace(box, row=1, col=1)
+                fig.add_trace(go.Scattergl(
+                    x=['Outliers'] * len(outliers),
+                    y=durations[outliers],
+                    mode='markers',
+                    name='Outliers (sampled)',
+                    marker=dict(size=5, opacity=0.6),
+                    hovertext=[f"Case {case_id}" for case_id in case_ids[outliers]],
+                ), row=1, col=1)
+                counts, edges = summary['histogram']['counts'], summary['histogram']['edges']
+                fig.add_trace(go.Bar(
+                    x=(edges[:-1] + edges[1:]) / 2,
+                    y=counts,
+                    width=np.diff(edges),
+                    name='Cases',
+                    hovertemplate='%{x:.2f} h: %{y} cases<extra></extra>'
+                ), row=1, col=2)
+                fig.update_xaxes(title_text='Duration (hours)', row=1, col=2)
+                title = (f"Case Cycle Times ({summary['count']:,} cases; "
+                         f"{len(outliers):,} of {summary['outlier_count']:,} outliers shown)")
             
             fig.update_layout(
-                title='Case Cycle Times',
+                title=title,
                 yaxis_title='Duration (hours)',
                 showlegend=True,
                 boxmode='group'
             )
             
-            st.plotly_chart(fig)
+            with profiler.stage('plotly_chart', category='render'):
+                st.plotly_chart(fig)
             return fig
         except Exception as e:
             st.error(f"Error creating cycle time chart: {e}")
             return None
 
+    @profiled('ChartGenerator.create_activity_frequency_chart', category='render')
     def create_activity_frequency_chart(self, activity_stats):
         """
         Create a bar chart of activity frequencies with hover information.
@@ -73,67 +130,125 @@ class ChartGenerator:
                 height=max(400, len(df) * 30)  # Adjust height based on number of activities
             )
             
-            st.plotly_chart(fig)
+            with profiler.stage('plotly_chart', category='render'):
+                st.plotly_chart(fig)
             return fig
         except Exception as e:
             st.error(f"Error creating activity frequency chart: {e}")
             return None
 
+    @profiled('ChartGenerator.create_performance_timeline', category='render')
     def create_performance_timeline(self, event_log):
         """
-        Create an interactive timeline showing case durations and activities.
+        Create an interactive timeline with one segment per case from start to end.
+
+        All cases are drawn as a single WebGL trace up to ``max_timeline_cases``.
+        Larger logs show either the longest cases or a histogram of case starts,
+        where a box selection drills down to the longest cases started in that
+        window, so the figure size is bounded whatever the number of cases.
         """
         try:
-            # Convert to dataframe if needed
-            if not isinstance(event_log, pd.DataFrame):
-                df = pm4py.convert_to_dataframe(event_log)
-            else:
-                df = event_log
-
-            # Ensure timestamp is datetime
-            if not pd.api.types.is_datetime64_any_dtype(df['time:timestamp']):
-                df['time:timestamp'] = pd.to_datetime(df['time:timestamp'])
+            log = as_columnar_log(event_log)
+            durations = log.case_durations_hours()
+            candidates = None
             
-            # Calculate case durations
-            durations = df.groupby('case:concept:name').agg({
-                'time:timestamp': ['min', 'max']
-            }).reset_index()
+            if log.n_cases > self.max_timeline_cases:
+                view = st.radio(
+                    f"{log.n_cases:,} cases; showing an aggregated view",
+                    ["Longest cases", "Case starts over time"],
+                    horizontal=True,
+                    key="timeline_view"
+                )
+                if view == "Case starts over time":
+                    overview, window = self._render_case_start_histogram(log, durations)
+                    if window is None:
+                        st.caption("Box-select a time range to see its longest cases.")
+                        return overview
+                    starts = log.case_start
+                    candidates = np.flatnonzero((starts >= window[0]) & (starts <= window[1]))
+                    st.caption(f"{len(candidates):,} cases started in the selected range")
             
-            # Rename columns
-            durations.columns = ['case:concept:name', 'start_time', 'end_time']
-            durations['duration'] = (durations['end_time'] - 
-                                   durations['start_time']).dt.total_seconds() / 3600
+            cases = longest_cases(durations, self.max_timeline_cases, candidates)
+            total = log.n_cases if candidates is None else len(candidates)
+            fig = self._case_segments_figure(log, cases, durations, total)
             
-            # Create timeline visualization
-            fig = go.Figure()
-            
-            # Add cases as Gantt chart bars
-            for idx, row in durations.iterrows():
-                fig.add_trace(go.Bar(
-                    name=f"Case {row['case:concept:name']}",
-                    x=[row['duration']],
-                    y=[row['case:concept:name']],
-                    orientation='h',
-                    marker=dict(
-                        color='rgba(0,100,200,0.7)',
-                        line=dict(color='rgba(0,100,200,1.0)', width=2)
-                    ),
-                    hovertext=[f"Duration: {row['duration']:.2f} hours<br>"
-                              f"Start: {row['start_time']}<br>"
-                              f"End: {row['end_time']}"],
-                    hoverinfo='text'
-                ))
-            
-            fig.update_layout(
-                title='Case Duration Timeline',
-                xaxis_title='Duration (hours)',
-                yaxis_title='Case ID',
-                showlegend=False,
-                height=max(400, len(durations) * 30)
-            )
-            
-            st.plotly_chart(fig)
+            with profiler.stage('plotly_chart', category='render'):
+                st.plotly_chart(fig)
             return fig
         except Exception as e:
             st.error(f"Error creating performance timeline: {e}")
             return None
+
+    def _case_segments_figure(self, log, cases, durations, total):
+        """
+        Single Scattergl trace with one start-to-end segment per case, longest on top.
+        """
+        case_ids = log.cases[cases].astype(str)
+        x, y = segment_coordinates(log.case_start[cases], log.case_end[cases], np.arange(len(cases)))
+        hover = np.empty(len(x), dtype=object)
+        hover[0::3] = [f"Case {case_id}<br>Duration: {duration:.2f} hours"
+                       for case_id, duration in zip(case_ids, durations[cases])]
+        hover[1::3] = hover[0::3]
+        hover[2::3] = None
+        
+        fig = go.Figure(go.Scattergl(
+            x=log.to_datetime(x),
+            y=y,
+            mode='lines',
+            line=dict(color='rgba(0,100,200,0.7)', width=4 if len(cases) <= 200 else 2),
+            hovertext=hover,
+            hoverinfo='text'
+        ))
+        title = 'Case Duration Timeline'
+        if len(cases) < total:
+            title += f' ({len(cases):,} longest of {total:,} cases)'
+        fig.update_layout(
+            title=title,
+            xaxis_title='Time',
+            yaxis=dict(
+                title='Case ID' if len(cases) <= 50 else 'Cases (longest first)',
+                autorange='reversed',
+                tickmode='array' if len(cases) <= 50 else 'auto',
+                tickvals=np.arange(len(cases)) if len(cases) <= 50 else None,
+                ticktext=case_ids if len(cases) <= 50 else None
+            ),
+            showlegend=False,
+            height=min(max(400, len(cases) * 30), 800)
+        )
+        return fig
+
+    def _render_case_start_histogram(self, log, durations):
+        """
+        Render case starts binned over time; return the figure and the box-selected (start, end) in ns.
+        """
+        bins = bin_by_time(log.case_start, durations, self.timeline_bins)
+        bin_start = log.to_datetime(bins['bin_start'].to_numpy())
+        bin_width_ms = (bins['bin_end'] - bins['bin_start']).to_numpy() / 10**6
+        
+        fig = go.Figure(go.Bar(
+            x=bin_start + pd.to_timedelta(bin_width_ms / 2, unit='ms'),
+            y=bins['count'],
+            width=bin_width_ms,
+            marker=dict(color=bins['mean'], colorscale='Blues', colorbar=dict(title='Mean hours')),
+            customdata=np.column_stack([bins['mean'], bins['max']]),
+            hovertemplate='%{x}<br>Cases: %{y}<br>Mean: %{customdata[0]:.2f} h'
+                          '<br>Max: %{customdata[1]:.2f} h<extra></extra>'
+        ))
+        fig.update_layout(
+            title='Case Starts Over Time (color: mean duration)',
+            xaxis_title='Case start',
+            yaxis_title='Cases',
+            dragmode='select',
+            height=400
+        )
+        
+        with profiler.stage('plotly_chart', category='render'):
+            event = st.plotly_chart(fig, key="timeline_overview", on_select="rerun", selection_mode="box")
+        boxes = event.selection.get('box', []) if event else []
+        if not boxes:
+            return fig, None
+        
+        low, high = sorted(pd.Timestamp(value) for value in boxes[0]['x'])
+        if log.timezone is not None:
+            low, high = low.tz_localize(log.timezone), high.tz_localize(log.timezone)
+        return fig, (low.value, high.value)
@@ -1,11 +1,37 @@
+import graphviz
 import pm4py
 import matplotlib.pyplot as plt
 import streamlit as st
 
+from process_mining.pruning import model_hash, prune_dfg
+from utils.profiling import profiled, profiler
+
 class ProcessMapVisualizer:
-    def __init__(self):
-        pass
+    def __init__(self, render_cache=None):
+        self.render_cache = render_cache
+
+    def _display(self, gviz, key):
+        """
+        Lay the graph out to SVG server-side, cached under ``key``, and show it.
+
+        Without a render cache or the Graphviz binaries the graph is laid out
+        in the browser by ``st.graphviz_chart`` instead.
+        """
+        if self.render_cache is not None:
+            def layout():
+                with profiler.stage('graphviz layout', category='render'):
+                    return gviz.pipe(format='svg').decode('utf-8')
+            try:
+                svg = self.render_cache.get_or_compute_key(key, layout)
+                with profiler.stage('svg display', category='render'):
+                    st.image(svg)
+                return
+            except graphviz.ExecutableNotFound:
+                self.render_cache = None
+        with profiler.stage('graphviz_chart', category='render'):
+            st.graphviz_chart(gviz)
 
+    @profiled('ProcessMapVisualizer.visualize_process_map', category='render')
     def visualize_process_map(self, net, initial_marking, final_marking):
         """
         Visualize a process map using PM4Py and matplotlib.
@@ -22,14 +48,23 @@ class ProcessMapVisualizer:
             }
             
             # Create Petri net visualization
-            gviz = pm4py.visualization.petri_net.visualizer.apply(
-                net, initial_marking, final_marking,
-                parameters=parameters,
-                variant=pm4py.visualization.petri_net.visualizer.Variants.FREQUENCY
-            )
+            with profiler.stage('graphviz build', category='render'):
+                gviz = pm4py.visualization.petri_net.visualizer.apply(
+                    net, initial_marking, final_marking,
+                    parameters=parameters,
+                    variant=pm4py.visualization.petri_net.visualizer.Variants.FREQUENCY
+                )
             
-            # Display the visualization
-            st.graphviz_chart(gviz)
+            # Display the visualization, reusing the layout of an identical net
+            key = model_hash(
+                'petri_net',
+                [(t.name, t.label) for t in net.transitions],
+                [(arc.source.name, arc.target.name) for arc in net.arcs],
+                {place.name: tokens for place, tokens in initial_marking.items()},
+                {place.name: tokens for place, tokens in final_marking.items()},
+                parameters
+            )
+            self._display(gviz, key)
             
             # Show additional information
             st.subheader("Process Model Information")
@@ -46,14 +81,30 @@ class ProcessMapVisualizer:
             st.error(f"Error visualizing process map: {e}")
             return None
 
-    def visualize_dfg(self, dfg, start_activities, end_activities):
+    @profiled('ProcessMapVisualizer.visualize_dfg', category='render')
+    def visualize_dfg(self, dfg, start_activities, end_activities, performance_dfg=None,
+                      activities_count=None, aggregation_measure='mean',
+                      activity_keep=1.0, edge_keep=1.0, pruning_method='coverage'):
         """
         Visualize a Directly-Follows Graph (DFG) using PM4Py and matplotlib.
+
+        With ``performance_dfg`` the edges show durations for ``aggregation_measure``
+        ('mean', 'median' or 'p95') instead of frequencies. ``activity_keep`` and
+        ``edge_keep`` prune infrequent activities and edges first (see ``prune_dfg``).
         """
         try:
-            # Convert start/end activities to list if they're dictionaries
-            start_acts = list(start_activities.keys()) if isinstance(start_activities, dict) else list(start_activities)
-            end_acts = list(end_activities.keys()) if isinstance(end_activities, dict) else list(end_activities)
+            total_edges = len(dfg)
+            total_activities = len(activities_count) if activities_count else len({act for edge in dfg for act in edge})
+            dfg, start_activities, end_activities, activities_count = prune_dfg(
+                dfg, start_activities, end_activities, activities_count,
+                activity_keep=activity_keep, edge_keep=edge_keep, method=pruning_method
+            )
+            if performance_dfg is not None:
+                performance_dfg = {edge: values for edge, values in performance_dfg.items() if edge in dfg}
+            
+            # PM4Py expects start/end activities as {activity: count} dictionaries
+            start_acts = start_activities if isinstance(start_activities, dict) else dict.fromkeys(start_activities, 1)
+            end_acts = end_activities if isinstance(end_activities, dict) else dict.fromkeys(end_activities, 1)
             
             # Create DFG visualization
             parameters = {
@@ -64,14 +115,34 @@ class ProcessMapVisualizer:
                 "end_activities": end_acts,
             }
             
-            gviz = pm4py.visualization.dfg.visualizer.apply(
-                dfg,
-                log=None,
-                parameters=parameters
-            )
+            with profiler.stage('graphviz build', category='render'):
+                if performance_dfg is not None:
+                    parameters["aggregation_measure"] = aggregation_measure
+                    gviz = pm4py.visualization.dfg.visualizer.apply(
+                        performance_dfg,
+                        log=None,
+                        activities_count=activities_count,
+                        parameters=parameters,
+                        variant=pm4py.visualization.dfg.visualizer.Variants.PERFORMANCE
+                    )
+                else:
+                    gviz = pm4py.visualization.dfg.visualizer.apply(
+                        dfg,
+                        log=None,
+                        activities_count=activities_count,
+                        parameters=parameters
+                    )
             
-            # Display the visualization
-            st.graphviz_chart(gviz)
+            # Display the visualization, reusing the layout of an identical pruned graph
+            key = model_hash(
+                'dfg', performance_dfg if performance_dfg is not None else dfg,
+                start_activities, end_activities, activities_count, aggregation_measure,
+                parameters
+            )
+            self._display(gviz, key)
+            if len(dfg) < total_edges or len(activities_count) < total_activities:
+                st.caption(f"Showing {len(activities_count)} of {total_activities} activities "
+                           f"and {len(dfg)} of {total_edges} edges")
             
             # Show additional information
             st.subheader("DFG Information")
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The app imports its packages relative to src/, as streamlit runs src/main.py
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+SAMPLE_LOGS = ['sample_event_log.csv', 'enhanced_event_log.csv', 'large_event_log.csv']
+
+
+@pytest.fixture(params=SAMPLE_LOGS + ['synthetic'])
+def event_df(request):
+    """
+    One of the event logs bundled with the repository, as read by the upload page,
+    or a synthetic log with rework loops and noise.
+    """
+    if request.param == 'synthetic':
+        from utils.synthetic import generate_event_log
+        return generate_event_log(n_cases=300, events_per_case=8, seed=7)
+    return pd.read_csv(os.path.join(ROOT, request.param))
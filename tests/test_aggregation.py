@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from visualization.aggregation import duration_summary
+
+
+def test_whiskers_end_at_data_points_inside_fences():
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 30.0, np.nan])
+    summary = duration_summary(values)
+    # q1 = 2.75 and q3 = 7.25, so the fences are -4 and 14
+    assert summary['lower_fence'] == 1.0
+    assert summary['upper_fence'] == 8.0
+    assert summary['outlier_count'] == 1
+    assert values[summary['outlier_index']].tolist() == [30.0]
+
+
+@pytest.mark.parametrize('max_outliers', [500, 40, 5])
+def test_outlier_sample_respects_cap(max_outliers):
+    values = np.random.default_rng(3).lognormal(2, 1.2, 50000)
+    summary = duration_summary(values, max_outliers=max_outliers)
+    assert summary['outlier_count'] > max_outliers
+    assert len(summary['outlier_index']) == max_outliers
+    sampled = values[summary['outlier_index']]
+    assert ((sampled < summary['lower_fence']) | (sampled > summary['upper_fence'])).all()
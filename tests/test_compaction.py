@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from process_mining.statistics import ProcessStatistics
+from utils.data_processing import EventLogProcessor
+from utils.synthetic import generate_event_log
+
+
+def test_cost_totals_survive_compaction():
+    df = generate_event_log(n_cases=20000, seed=5)
+    # Quarter amounts are exact in float32 too, but their sums are not
+    df['costs'] = df['costs'] + np.random.default_rng(0).choice([0, 0.25, 0.5, 0.75], len(df))
+    log = EventLogProcessor().convert_csv_to_columnar_log(df.copy())
+    assert log.column('costs').dtype == np.float64
+
+    result = ProcessStatistics().compute_all(log)
+    assert result['kpis']['business']['total_process_cost'] == df['costs'].sum()
+    expected = df.groupby('concept:name')['costs'].sum()
+    pd.testing.assert_series_equal(
+        result['activities']['total_cost'].reindex(expected.index), expected,
+        check_names=False, check_index_type=False
+    )
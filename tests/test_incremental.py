@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from process_mining.dfg import compute_dfg
+from process_mining.discovery import ProcessDiscovery
+from process_mining.incremental import append_events
+from process_mining.statistics import ProcessStatistics
+from process_mining.variants import VariantIndex
+from utils.data_processing import EventLogProcessor
+from utils.synthetic import generate_event_log
+
+
+def split_batches(df):
+    """
+    An initial log and batches adding events to existing cases, new cases,
+    a new activity and a new resource.
+    """
+    case = df['case:concept:name']
+    position = df.groupby('case:concept:name').cumcount()
+    length = df.groupby('case:concept:name')['concept:name'].transform('size')
+    head = position < length // 2
+
+    initial = df[(case <= 300) & (head | (case > 200))]
+    batch1 = df[((case <= 100) & ~head) | case.between(301, 350)]
+    batch2 = df[(case.between(101, 200) & ~head) | (case > 350)].copy()
+    rework = batch2['concept:name'] == 'check ticket'
+    batch2.loc[rework, 'concept:name'] = 'escalate'
+    batch2.loc[rework, 'org:resource'] = 'Resource_new'
+    # Interleave the batch so it is not already sorted by case
+    batch2 = batch2.sample(frac=1, random_state=0)
+    return initial, [batch1, batch2]
+
+
+def warm(log):
+    """
+    Build the structures that append_events carries forward instead of recomputing.
+    """
+    ProcessStatistics().compute_all(log)
+    ProcessDiscovery().discover_dfg(log)
+    VariantIndex.for_log(log)
+    log.derived('case_duration')
+
+
+def assert_dfg_equal(result, expected):
+    assert result['frequency'] == expected['frequency']
+    assert list(result['frequency']) == list(expected['frequency'])
+    for key in ('start_activities', 'end_activities', 'activities_count'):
+        assert result[key] == expected[key]
+    assert result['performance'].keys() == expected['performance'].keys()
+    for edge, stats in expected['performance'].items():
+        assert result['performance'][edge] == pytest.approx(stats)
+
+
+def assert_statistics_equal(result, expected):
+    for key in ('cases', 'activities', 'resources', 'activity_resources'):
+        pd.testing.assert_frame_equal(result[key], expected[key])
+    assert result['kpis'].keys() == expected['kpis'].keys()
+    for group, kpis in expected['kpis'].items():
+        assert result['kpis'][group] == pytest.approx(kpis)
+
+
+@pytest.mark.parametrize('case_level_attributes', [True, False])
+def test_append_matches_full_rebuild(case_level_attributes):
+    processor = EventLogProcessor(case_level_attributes=case_level_attributes)
+    df = generate_event_log(n_cases=400, events_per_case=8, seed=11)
+    initial, batches = split_batches(df)
+
+    log = processor.convert_csv_to_columnar_log(initial.copy())
+    appended = [initial]
+    for batch in batches:
+        warm(log)
+        log, delta = append_events(log, processor.parse_columns(batch.copy()))
+        appended.append(batch)
+        expected = processor.convert_csv_to_columnar_log(pd.concat(appended, ignore_index=True))
+
+        assert len(delta.touched) == batch['case:concept:name'].nunique()
+        assert log.fingerprint == expected.fingerprint
+        pd.testing.assert_frame_equal(log.attributes, expected.attributes)
+        pd.testing.assert_frame_equal(log.case_attributes, expected.case_attributes)
+        for name in ('case_duration', 'wait_time', 'complexity_score'):
+            np.testing.assert_allclose(log.derived(name), expected.derived(name))
+
+        # Carried forward from the log before the append
+        assert_dfg_equal(log.memo('dfg', lambda: None), compute_dfg(expected))
+        variants = VariantIndex.for_log(log)
+        assert variants.to_uvcl() == VariantIndex.for_log(expected).to_uvcl()
+        pd.testing.assert_frame_equal(variants.top_k(20), VariantIndex.for_log(expected).top_k(20))
+        assert_statistics_equal(ProcessStatistics().compute_all(log),
+                                ProcessStatistics().compute_all(expected))
+
+    assert 'escalate' in log.activities
+    assert 'Resource_new' in log.resources
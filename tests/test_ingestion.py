@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_processing import EventLogProcessor
+from utils.ingestion import SAMPLE_ROWS, read_csv_columnar
+from utils.synthetic import generate_event_log
+
+
+def write_csv(tmp_path, df):
+    path = tmp_path / 'log.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def late_values_frame():
+    df = generate_event_log(n_cases=3 * SAMPLE_ROWS // 8, seed=2)
+    assert len(df) > 2 * SAMPLE_ROWS
+    # Empty throughout the sample, text at the very end
+    df['note'] = pd.Series(np.nan, index=df.index, dtype=object)
+    df.loc[df.index[-1], 'note'] = 'escalated by phone'
+    # Numeric throughout the sample, text in a later chunk
+    df['reference'] = np.arange(len(df)).astype(object)
+    df.loc[df.index[-2], 'reference'] = 'pending'
+    return df
+
+
+def test_stream_late_text_values(tmp_path):
+    df = late_values_frame()
+    path = write_csv(tmp_path, df)
+    log = read_csv_columnar(path, memory_budget_mb=0)
+
+    events = log.to_dataframe().sort_values(['case:concept:name', 'time:timestamp'])
+    assert events['note'].dropna().tolist() == ['escalated by phone']
+    references = events['reference'].astype(str)
+    assert sorted(references) == sorted(df['reference'].astype(str))
+
+
+def test_stream_matches_in_memory_conversion(tmp_path):
+    df = late_values_frame()
+    path = write_csv(tmp_path, df)
+    processor = EventLogProcessor()
+    streamed = processor.stream_csv_to_columnar_log(path, memory_budget_mb=0)
+    loaded = processor.convert_csv_to_columnar_log(pd.read_csv(path, low_memory=False))
+
+    assert streamed.n_events == loaded.n_events
+    np.testing.assert_array_equal(streamed.timestamps, loaded.timestamps)
+    np.testing.assert_array_equal(streamed.cases[streamed.case_codes], loaded.cases[loaded.case_codes])
+    for col in ('note', 'reference', 'costs'):
+        assert streamed.column(col).astype(str).tolist() == loaded.column(col).astype(str).tolist()
@@ -0,0 +1,32 @@
+from utils.data_processing import EventLogProcessor
+from utils.log_store import LogStore
+from utils.synthetic import generate_event_log
+
+
+def test_append_keeps_the_raw_entry(tmp_path):
+    processor = EventLogProcessor()
+    df = generate_event_log(n_cases=60, events_per_case=6, seed=3)
+    initial = df[df['case:concept:name'] <= 40]
+    batch = df[df['case:concept:name'] > 40]
+    store = LogStore(str(tmp_path))
+    raw = initial.to_csv(index=False).encode()
+    key = store.make_key(raw)
+    log = processor.convert_csv_to_columnar_log(initial.copy())
+    store.save(key, log, name='initial.csv')
+
+    appended, meta = store.append(key, processor.parse_columns(batch.copy()))
+
+    assert meta['key'] != key
+    assert meta['parent'] == key
+    assert meta['appended_batches'] == 1
+    assert store.contains_source(key)
+    assert not store.contains_source(meta['key'])
+    assert store.load(key).fingerprint == log.fingerprint
+    assert store.load(meta['key']).fingerprint == appended.fingerprint
+    assert appended.n_cases == 60
+
+    # A second batch chains onto the appended entry
+    _, second = store.append(meta['key'], processor.parse_columns(batch.head(3).copy()))
+    assert second['parent'] == meta['key']
+    assert second['appended_batches'] == 2
+    assert second['name'] == 'initial.csv + 2 batches'
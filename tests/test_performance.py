@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pm4py
+import pytest
+
+from process_mining.performance import PerformanceAnalyzer
+from utils.data_processing import EventLogProcessor
+
+
+# Reference implementations: PerformanceAnalyzer before it was vectorized
+def baseline_cycle_time(event_log):
+    df = pm4py.convert_to_dataframe(event_log)
+    cycle_times = []
+    for case_id in df['case:concept:name'].unique():
+        case_data = df[df['case:concept:name'] == case_id]
+        start_time = case_data['time:timestamp'].min()
+        end_time = case_data['time:timestamp'].max()
+        duration = (end_time - start_time).total_seconds() / 3600
+        cycle_times.append((case_id, duration))
+    return cycle_times
+
+
+def baseline_waiting_times(event_log):
+    """
+    Waiting times per transition "A → B", as lists (the baseline averaged them).
+    """
+    df = pm4py.convert_to_dataframe(event_log)
+    df = df.sort_values(['case:concept:name', 'time:timestamp'], kind='stable')
+    waiting_times = {}
+    for case_id in df['case:concept:name'].unique():
+        case_data = df[df['case:concept:name'] == case_id].reset_index()
+        for i in range(len(case_data) - 1):
+            activity = case_data.loc[i, 'concept:name']
+            next_activity = case_data.loc[i + 1, 'concept:name']
+            wait_time = (case_data.loc[i + 1, 'time:timestamp'] -
+                         case_data.loc[i, 'time:timestamp']).total_seconds() / 3600
+            waiting_times.setdefault(f"{activity} → {next_activity}", []).append(wait_time)
+    return waiting_times
+
+
+def baseline_sojourn_time(event_log):
+    df = pm4py.convert_to_dataframe(event_log)
+    activity_times = {}
+    for activity in df['concept:name'].unique():
+        activity_data = df[df['concept:name'] == activity]
+        activity_times[activity] = {
+            'count': len(activity_data),
+            'avg_timestamp': activity_data['time:timestamp'].mean(),
+            'min_timestamp': activity_data['time:timestamp'].min(),
+            'max_timestamp': activity_data['time:timestamp'].max()
+        }
+    return activity_times
+
+
+def logs(df):
+    """
+    The PM4Py event log the baseline took and the columnar log built at upload.
+    """
+    processor = EventLogProcessor()
+    event_log = processor.convert_csv_to_event_log(df.copy())
+    columnar_log = processor.convert_csv_to_columnar_log(df.copy())
+    return event_log, columnar_log
+
+
+@pytest.fixture
+def event_logs(event_df):
+    return logs(event_df)
+
+
+def test_cycle_time_matches_baseline(event_logs):
+    event_log, columnar_log = event_logs
+    expected = dict(baseline_cycle_time(event_log))
+    for log in (event_log, columnar_log):
+        result = PerformanceAnalyzer().calculate_cycle_time(log)
+        assert len(result) == len(expected)
+        assert dict(result) == pytest.approx(expected)
+
+
+def test_waiting_time_matches_baseline(event_logs):
+    event_log, columnar_log = event_logs
+    waits = baseline_waiting_times(event_log)
+    expected = {key: sum(values) / len(values) for key, values in waits.items()}
+    for log in (event_log, columnar_log):
+        result = PerformanceAnalyzer().calculate_waiting_time(log)
+        # Same transitions in the same order of first occurrence
+        assert list(result) == list(expected)
+        assert result == pytest.approx(expected)
+
+
+def test_waiting_time_statistics_match_baseline(event_logs):
+    event_log, columnar_log = event_logs
+    waits = baseline_waiting_times(event_log)
+    stats = PerformanceAnalyzer().calculate_waiting_time_statistics(columnar_log)
+
+    keys = [f"{row.source} → {row.target}" for row in stats.itertuples()]
+    assert keys == list(waits)
+    for key, row in zip(keys, stats.itertuples()):
+        values = np.asarray(waits[key])
+        assert row.count == len(values)
+        assert row.mean == pytest.approx(values.mean())
+        assert row.median == pytest.approx(np.median(values))
+        assert row.p90 == pytest.approx(np.quantile(values, 0.9))
+        assert row.p99 == pytest.approx(np.quantile(values, 0.99))
+
+
+def test_sojourn_time_matches_baseline(event_logs):
+    event_log, columnar_log = event_logs
+    expected = baseline_sojourn_time(event_log)
+    for log in (event_log, columnar_log):
+        result = PerformanceAnalyzer().calculate_sojourn_time(log)
+        assert list(result) == list(expected)
+        for activity, times in expected.items():
+            assert result[activity]['count'] == times['count']
+            for key in ('min_timestamp', 'max_timestamp'):
+                assert result[activity][key] == times[key]
+            # The baseline averaged at the microsecond resolution of the parsed column
+            delta = result[activity]['avg_timestamp'] - times['avg_timestamp']
+            assert abs(delta) < pd.Timedelta(microseconds=1)
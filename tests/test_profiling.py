@@ -0,0 +1,46 @@
+import contextvars
+import threading
+
+from utils.profiling import Profiler
+
+
+def run_in_session(profiler, session, enable, barrier, results):
+    def run():
+        profiler.bind_session(session)
+        if enable:
+            profiler.enable()
+        barrier.wait()
+        with profiler.stage(f'stage of {session}'):
+            pass
+        barrier.wait()
+        results[session] = [span['name'] for span in profiler.spans()]
+        profiler.disable()
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(run,))
+    thread.start()
+    return thread
+
+
+def test_sessions_record_and_see_only_their_own_stages():
+    profiler = Profiler()
+    barrier = threading.Barrier(3)
+    results = {}
+    threads = [run_in_session(profiler, 'a', True, barrier, results),
+               run_in_session(profiler, 'b', True, barrier, results),
+               run_in_session(profiler, 'c', False, barrier, results)]
+    for thread in threads:
+        thread.join()
+    assert results == {'a': ['stage of a'], 'b': ['stage of b'], 'c': []}
+    assert not profiler._sessions
+
+
+def test_disabling_one_session_keeps_others_recording():
+    profiler = Profiler()
+    profiler.bind_session('a')
+    profiler.enable()
+    context_b = contextvars.copy_context()
+    context_b.run(profiler.bind_session, 'b')
+    context_b.run(profiler.disable)
+    with profiler.stage('still recorded'):
+        pass
+    assert [span['name'] for span in profiler.spans()] == ['still recorded']
+    profiler.disable()
@@ -0,0 +1,57 @@
+import pandas as pd
+import pm4py
+import pytest
+
+from utils.ingestion import read_csv_columnar, read_xes_columnar
+from utils.timestamps import SAMPLE_ROWS, TimestampParser, parse_timestamps
+
+
+def event_frame(n_events, events_per_case=5):
+    timestamps = pd.date_range('2024-01-01 09:00:00', periods=n_events, freq='17min')
+    # Fractional seconds only after the rows a format is inferred from
+    timestamps = timestamps + pd.to_timedelta([0] * SAMPLE_ROWS + [123] * (n_events - SAMPLE_ROWS), unit='ms')
+    return pd.DataFrame({
+        'case:concept:name': [str(i // events_per_case) for i in range(n_events)],
+        'concept:name': [f'activity {i % events_per_case}' for i in range(n_events)],
+        'time:timestamp': timestamps,
+        'org:resource': 'Mike',
+    })
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('2024-03-01 09:30:00', '2024-03-01 09:30:00'),
+    ('2024-03-01T09:30:00.250', '2024-03-01 09:30:00.250'),
+    ('2024-03-01 09:30', '2024-03-01 09:30:00'),
+    ('01.03.2024 09:30:00', '2024-03-01 09:30:00'),
+])
+def test_later_values_in_another_format_fall_back(text, expected):
+    values = ['2024-01-01 09:00:00'] * SAMPLE_ROWS + [text]
+    parser = TimestampParser.infer(values)
+    parsed = parser.parse(values)
+    assert parsed[-1] == pd.Timestamp(expected)
+    assert parsed[0] == pd.Timestamp('2024-01-01 09:00:00')
+
+
+def test_unparseable_values_still_raise():
+    with pytest.raises(ValueError):
+        parse_timestamps(pd.Series(['2024-01-01 09:00:00', 'not a date']))
+
+
+def test_csv_chunks_with_fractional_seconds(tmp_path):
+    df = event_frame(3 * SAMPLE_ROWS)
+    path = tmp_path / 'log.csv'
+    df.to_csv(path, index=False)
+    log = read_csv_columnar(str(path), memory_budget_mb=0)
+    expected = pd.DatetimeIndex(df['time:timestamp']).as_unit('ns').asi8
+    assert sorted(log.timestamps) == sorted(expected)
+
+
+def test_xes_with_fractional_seconds_after_first_chunk(tmp_path):
+    df = event_frame(3 * SAMPLE_ROWS)
+    path = str(tmp_path / 'log.xes')
+    pm4py.write_xes(pm4py.convert_to_event_log(df), path)
+
+    log = read_xes_columnar(path, memory_budget_mb=0)
+    reference = pm4py.convert_to_dataframe(pm4py.read_xes(path))
+    expected = pd.DatetimeIndex(reference['time:timestamp']).tz_convert('UTC').as_unit('ns').asi8
+    assert sorted(log.timestamps) == sorted(expected)